@@ -190,6 +190,14 @@ async def graceful_shutdown():  # sourcery skip: use-named-expression
         # 停止所有异步任务
         await async_task_manager.stop_and_wait_all_tasks()
 
+        # 写入暂存的LLM使用记录
+        try:
+            from src.llm_models.utils import llm_usage_recorder
+
+            llm_usage_recorder.stop()
+        except Exception as e:
+            logger.warning(f"写入LLM使用记录时出错: {e}")
+
         # 获取所有剩余任务，排除当前任务
         remaining_tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
 
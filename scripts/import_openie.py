@@ -4,10 +4,11 @@
 #     print("未找到quick_algo库，无法使用quick_algo算法")
 #     print("请安装quick_algo库 - 在lib.quick_algo中，执行命令：python setup.py build_ext --inplace")
 
+import argparse
 import sys
 import os
 import asyncio
-from time import sleep
+from typing import Any, Dict, Iterator, List, Tuple
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from src.chat.knowledge.embedding_store import EmbeddingManager
@@ -21,6 +22,8 @@ from src.chat.knowledge.utils.hash import get_sha256
 ROOT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 OPENIE_DIR = os.path.join(ROOT_PATH, "data", "openie")
 
+IMPORT_CHUNK_SIZE = 1000  # 每批导入的段落数，每批完成后保存一次Embedding库与KG作为检查点
+
 logger = get_logger("OpenIE导入")
 
 
@@ -33,148 +36,145 @@ def ensure_openie_dir():
         logger.info(f"OpenIE数据目录已存在：{OPENIE_DIR}")
 
 
-def hash_deduplicate(
-    raw_paragraphs: dict[str, str],
-    triple_list_data: dict[str, list[list[str]]],
-    stored_pg_hashes: set,
-    stored_paragraph_hashes: set,
-):
-    """Hash去重
+def check_doc(doc: Dict[str, Any]) -> List[str]:
+    """检查文档字段是否完整，返回非法原因列表（为空表示合法）"""
+    missing = []
+    # 检查字段是否存在且非空
+    if "passage" not in doc or not doc.get("passage"):
+        missing.append("passage")
+    if "extracted_entities" not in doc or not isinstance(doc.get("extracted_entities"), list):
+        missing.append("名词列表缺失")
+    elif len(doc.get("extracted_entities", [])) == 0:
+        missing.append("名词列表为空")
+    if "extracted_triples" not in doc or not isinstance(doc.get("extracted_triples"), list):
+        missing.append("主谓宾三元组缺失")
+    elif len(doc.get("extracted_triples", [])) == 0:
+        missing.append("主谓宾三元组为空")
+    return missing
+
+
+class InvalidDocFilter:
+    """过滤非法文段：首次遇到非法文段时询问用户是否跳过全部非法文段"""
+
+    def __init__(self):
+        self.skip_confirmed = False
+        self.invalid_count = 0
+
+    def accept(self, doc: Dict[str, Any]) -> bool:
+        missing = check_doc(doc)
+        if not missing:
+            return True
+        self.invalid_count += 1
+        logger.error("数据缺失：")
+        logger.error(f"对应哈希值：{doc.get('idx', '<无idx>')}")
+        logger.error(f"对应文段内容内容：{doc.get('passage', '<无passage>')}")
+        logger.error(f"非法原因：{', '.join(missing)}")
+        if not self.skip_confirmed:
+            logger.error("请保证你的原始数据分段良好，不要有类似于 “.....” 单独成一段的情况")
+            logger.error("或者一段中只有符号的情况")
+            user_choice = input("检测到非法文段，是否跳过所有非法文段后继续导入？(y/n): ").strip().lower()
+            if user_choice != "y":
+                logger.info(
+                    "用户选择不跳过非法文段，程序终止。此前已完成的批次均已保存，修正数据后重新执行即可继续导入。"
+                )
+                sys.exit(1)
+            self.skip_confirmed = True
+        return False
+
+
+def iter_new_paragraph_chunks(
+    docs: Iterator[Tuple[str, Dict[str, Any]]],
+    doc_filter: InvalidDocFilter,
+    embed_manager: EmbeddingManager,
+    kg_manager: KGManager,
+    chunk_size: int,
+) -> Iterator[Tuple[Dict[str, str], Dict[str, List[List[str]]]]]:
+    """将文档流去重后按固定大小分批
+
+    以Embedding库与KG中持久化的段落hash集合去重：二者都已包含的段落视为已导入，
+    因此中断后重新执行会跳过已完成的批次，从断点继续。
 
     Args:
-        raw_paragraphs: 索引的段落原文
-        triple_list_data: 索引的三元组列表
-        stored_pg_hashes: 已存储的段落hash集合
-        stored_paragraph_hashes: 已存储的段落hash集合
+        docs: (文件路径, 文档)的迭代器
+        doc_filter: 非法文段过滤器
+        embed_manager: EmbeddingManager对象
+        kg_manager: KGManager对象
+        chunk_size: 每批的段落数
 
     Returns:
-        new_raw_paragraphs: 去重后的段落
-        new_triple_list_data: 去重后的三元组
+        (段落hash -> 段落原文, 段落hash -> 三元组列表)的批次迭代器
     """
-    # 保存去重后的段落
-    new_raw_paragraphs = {}
-    # 保存去重后的三元组
-    new_triple_list_data = {}
-
-    for _, (raw_paragraph, triple_list) in enumerate(
-        zip(raw_paragraphs.values(), triple_list_data.values(), strict=False)
-    ):
+    raw_paragraphs: Dict[str, str] = {}
+    triple_list_data: Dict[str, List[List[str]]] = {}
+    for _, doc in docs:
+        if not doc_filter.accept(doc):
+            continue
         # 段落hash
-        paragraph_hash = get_sha256(raw_paragraph)
+        paragraph_hash = get_sha256(doc["passage"])
         # 使用与EmbeddingStore中一致的命名空间格式：namespace-hash
         paragraph_key = f"paragraph-{paragraph_hash}"
-        if paragraph_key in stored_pg_hashes and paragraph_hash in stored_paragraph_hashes:
+        if paragraph_key in embed_manager.stored_pg_hashes and paragraph_hash in kg_manager.stored_paragraph_hashes:
             continue
-        new_raw_paragraphs[paragraph_hash] = raw_paragraph
-        new_triple_list_data[paragraph_hash] = triple_list
-
-    return new_raw_paragraphs, new_triple_list_data
-
-
-def handle_import_openie(openie_data: OpenIE, embed_manager: EmbeddingManager, kg_manager: KGManager) -> bool:
-    # sourcery skip: extract-method
-    # 从OpenIE数据中提取段落原文与三元组列表
-    # 索引的段落原文
-    raw_paragraphs = openie_data.extract_raw_paragraph_dict()
-    # 索引的实体列表
-    entity_list_data = openie_data.extract_entity_dict()
-    # 索引的三元组列表
-    triple_list_data = openie_data.extract_triple_dict()
-    # print(openie_data.docs)
-    if len(raw_paragraphs) != len(entity_list_data) or len(raw_paragraphs) != len(triple_list_data):
-        logger.error("OpenIE数据存在异常")
-        logger.error(f"原始段落数量：{len(raw_paragraphs)}")
-        logger.error(f"实体列表数量：{len(entity_list_data)}")
-        logger.error(f"三元组列表数量：{len(triple_list_data)}")
-        logger.error("OpenIE数据段落数量与实体列表数量或三元组列表数量不一致")
-        logger.error("请保证你的原始数据分段良好，不要有类似于 “.....” 单独成一段的情况")
-        logger.error("或者一段中只有符号的情况")
-        # 新增：检查docs中每条数据的完整性
-        logger.error("系统将于2秒后开始检查数据完整性")
-        sleep(2)
-        found_missing = False
-        missing_idxs = []
-        for doc in getattr(openie_data, "docs", []):
-            idx = doc.get("idx", "<无idx>")
-            passage = doc.get("passage", "<无passage>")
-            missing = []
-            # 检查字段是否存在且非空
-            if "passage" not in doc or not doc.get("passage"):
-                missing.append("passage")
-            if "extracted_entities" not in doc or not isinstance(doc.get("extracted_entities"), list):
-                missing.append("名词列表缺失")
-            elif len(doc.get("extracted_entities", [])) == 0:
-                missing.append("名词列表为空")
-            if "extracted_triples" not in doc or not isinstance(doc.get("extracted_triples"), list):
-                missing.append("主谓宾三元组缺失")
-            elif len(doc.get("extracted_triples", [])) == 0:
-                missing.append("主谓宾三元组为空")
-            # 输出所有doc的idx
-            # print(f"检查: idx={idx}")
-            if missing:
-                found_missing = True
-                missing_idxs.append(idx)
-                logger.error("\n")
-                logger.error("数据缺失：")
-                logger.error(f"对应哈希值：{idx}")
-                logger.error(f"对应文段内容内容：{passage}")
-                logger.error(f"非法原因：{', '.join(missing)}")
-        # 确保提示在所有非法数据输出后再输出
-        if not found_missing:
-            logger.info("所有数据均完整，没有发现缺失字段。")
-            return False
-        # 新增：提示用户是否删除非法文段继续导入
-        # 将print移到所有logger.error之后，确保不会被冲掉
-        logger.info(f"\n检测到非法文段，共{len(missing_idxs)}条。")
-        logger.info("\n是否删除所有非法文段后继续导入？(y/n): ", end="")
-        user_choice = input().strip().lower()
-        if user_choice != "y":
-            logger.info("用户选择不删除非法文段，程序终止。")
-            sys.exit(1)
-        # 删除非法文段
-        logger.info("正在删除非法文段并继续导入...")
-        # 过滤掉非法文段
-        openie_data.docs = [
-            doc for doc in getattr(openie_data, "docs", []) if doc.get("idx", "<无idx>") not in missing_idxs
-        ]
-        # 重新提取数据
-        raw_paragraphs = openie_data.extract_raw_paragraph_dict()
-        entity_list_data = openie_data.extract_entity_dict()
-        triple_list_data = openie_data.extract_triple_dict()
-    # 再次校验
-    if len(raw_paragraphs) != len(entity_list_data) or len(raw_paragraphs) != len(triple_list_data):
-        logger.error("删除非法文段后，数据仍不一致，程序终止。")
-        sys.exit(1)
-    # 将索引换为对应段落的hash值
-    logger.info("正在进行段落去重与重索引")
-    raw_paragraphs, triple_list_data = hash_deduplicate(
-        raw_paragraphs,
-        triple_list_data,
-        embed_manager.stored_pg_hashes,
-        kg_manager.stored_paragraph_hashes,
-    )
-    if len(raw_paragraphs) != 0:
-        # 获取嵌入并保存
-        logger.info(f"段落去重完成，剩余待处理的段落数量：{len(raw_paragraphs)}")
-        logger.info("开始Embedding")
-        embed_manager.store_new_data_set(raw_paragraphs, triple_list_data)
-        # Embedding-Faiss重索引
-        logger.info("正在重新构建向量索引")
-        embed_manager.rebuild_faiss_index()
-        logger.info("向量索引构建完成")
-        embed_manager.save_to_file()
-        logger.info("Embedding完成")
-        # 构建新段落的RAG
-        logger.info("开始构建RAG")
-        kg_manager.build_kg(triple_list_data, embed_manager)
-        kg_manager.save_to_file()
-        logger.info("RAG构建完成")
-    else:
+        if paragraph_hash in raw_paragraphs:
+            continue
+        raw_paragraphs[paragraph_hash] = doc["passage"]
+        triple_list_data[paragraph_hash] = doc["extracted_triples"]
+        if len(raw_paragraphs) >= chunk_size:
+            yield raw_paragraphs, triple_list_data
+            raw_paragraphs, triple_list_data = {}, {}
+    if raw_paragraphs:
+        yield raw_paragraphs, triple_list_data
+
+
+def import_chunk(
+    raw_paragraphs: Dict[str, str],
+    triple_list_data: Dict[str, List[List[str]]],
+    embed_manager: EmbeddingManager,
+    kg_manager: KGManager,
+):
+    """导入一批段落并保存（保存后即为可恢复的检查点）"""
+    # 获取嵌入并保存
+    logger.info("开始Embedding")
+    embed_manager.store_new_data_set(raw_paragraphs, triple_list_data)
+    # Embedding-Faiss增量索引
+    logger.info("正在更新向量索引")
+    embed_manager.update_faiss_index()
+    embed_manager.save_to_file()
+    logger.info("Embedding完成")
+    # 构建新段落的RAG（须在Embedding保存之后保存KG，保证KG中的段落均已存在于Embedding库）
+    logger.info("开始构建RAG")
+    kg_manager.build_kg(triple_list_data, embed_manager)
+    kg_manager.save_to_file()
+    logger.info("RAG构建完成")
+
+
+def handle_import_openie(embed_manager: EmbeddingManager, kg_manager: KGManager, chunk_size: int) -> bool:
+    """流式读取OpenIE数据，分批去重、导入并保存检查点"""
+    try:
+        json_files = OpenIE.list_files()
+    except Exception as e:
+        logger.error(f"导入OpenIE数据文件时发生错误：{e}")
+        return False
+
+    doc_filter = InvalidDocFilter()
+    imported_count = 0
+    chunks = iter_new_paragraph_chunks(OpenIE.iter_docs(json_files), doc_filter, embed_manager, kg_manager, chunk_size)
+    for chunk_idx, (raw_paragraphs, triple_list_data) in enumerate(chunks, start=1):
+        logger.info(f"正在导入第{chunk_idx}批段落，数量：{len(raw_paragraphs)}（此前已导入{imported_count}个）")
+        import_chunk(raw_paragraphs, triple_list_data, embed_manager, kg_manager)
+        imported_count += len(raw_paragraphs)
+        logger.info(f"第{chunk_idx}批段落已导入并保存")
+
+    if doc_filter.invalid_count:
+        logger.info(f"共跳过{doc_filter.invalid_count}条非法文段")
+    if imported_count == 0:
         logger.info("无新段落需要处理")
+    else:
+        logger.info(f"OpenIE数据导入完成，共导入{imported_count}个新段落")
     return True
 
 
-async def main_async():  # sourcery skip: dict-comprehension
+async def main_async(chunk_size: int = IMPORT_CHUNK_SIZE):  # sourcery skip: dict-comprehension
     # 新增确认提示
     print("=== 重要操作确认 ===")
     print("OpenIE导入时会大量发送请求，可能会撞到请求速度上限，请注意选用的模型")
@@ -209,6 +209,8 @@ async def main_async():  # sourcery skip: dict-comprehension
         if "不存在" in str(e):
             logger.error("如果你是第一次导入知识，请忽略此错误")
     logger.info("Embedding库加载完成")
+    # 加载KG期间在后台进行嵌入模型一致性校验
+    embed_manager.start_embedding_model_consistency_check()
     # 初始化KG
     kg_manager = KGManager()
     logger.info("正在从文件加载KG")
@@ -219,8 +221,8 @@ async def main_async():  # sourcery skip: dict-comprehension
         logger.error("如果你是第一次导入知识，请忽略此错误")
     logger.info("KG加载完成")
 
-    logger.info(f"KG节点数量：{len(kg_manager.graph.get_node_list())}")
-    logger.info(f"KG边数量：{len(kg_manager.graph.get_edge_list())}")
+    logger.info(f"KG节点数量：{kg_manager.node_count}")
+    logger.info(f"KG边数量：{kg_manager.edge_count}")
 
     # 数据比对：Embedding库与KG的段落hash集合
     for pg_hash in kg_manager.stored_paragraph_hashes:
@@ -230,12 +232,7 @@ async def main_async():  # sourcery skip: dict-comprehension
             logger.warning(f"KG中存在Embedding库中不存在的段落：{key}")
 
     logger.info("正在导入OpenIE数据文件")
-    try:
-        openie_data = OpenIE.load()
-    except Exception as e:
-        logger.error(f"导入OpenIE数据文件时发生错误：{e}")
-        return False
-    if handle_import_openie(openie_data, embed_manager, kg_manager) is False:
+    if handle_import_openie(embed_manager, kg_manager, chunk_size) is False:
         logger.error("处理OpenIE数据时发生错误")
         return False
     return None
@@ -243,6 +240,15 @@ async def main_async():  # sourcery skip: dict-comprehension
 
 def main():
     """主函数 - 设置新的事件循环并运行异步主函数"""
+    parser = argparse.ArgumentParser(description="将OpenIE数据导入LPMM知识库（流式分批导入，中断后重新执行即可继续）")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=IMPORT_CHUNK_SIZE,
+        help=f"每批导入的段落数，每批完成后保存检查点（默认{IMPORT_CHUNK_SIZE}）",
+    )
+    args = parser.parse_args()
+
     # 检查是否有现有的事件循环
     try:
         loop = asyncio.get_running_loop()
@@ -257,7 +263,7 @@ def main():
 
     try:
         # 在新的事件循环中运行异步主函数
-        loop.run_until_complete(main_async())
+        loop.run_until_complete(main_async(args.chunk_size))
     finally:
         # 确保事件循环被正确关闭
         if not loop.is_closed():
@@ -1,33 +1,19 @@
+import asyncio
+import glob
 import json
 import os
-import signal
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Lock, Event
 import sys
 import datetime
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 # 添加项目根目录到 sys.path
 
-from rich.progress import Progress  # 替换为 rich 进度条
-
 from src.common.logger import get_logger
 
 # from src.chat.knowledge.lpmmconfig import global_config
-from src.chat.knowledge.ie_process import info_extract_from_str
-from src.chat.knowledge.open_ie import OpenIE
-from rich.progress import (
-    BarColumn,
-    TimeElapsedColumn,
-    TimeRemainingColumn,
-    TaskProgressColumn,
-    MofNCompleteColumn,
-    SpinnerColumn,
-    TextColumn,
-)
+from src.chat.knowledge.ie_pipeline import ExtractionCheckpoint, OpenIEExtractionPipeline, STATUS_DONE
 from raw_data_preprocessor import RAW_DATA_PATH, load_raw_data
-from src.config.config import global_config, model_config
-from src.llm_models.utils_model import LLMRequest
+from src.config.config import global_config
 
 logger = get_logger("LPMM知识库-信息提取")
 
@@ -36,6 +22,7 @@ ROOT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 TEMP_DIR = os.path.join(ROOT_PATH, "temp")
 # IMPORTED_DATA_PATH = os.path.join(ROOT_PATH, "data", "imported_lpmm_data")
 OPENIE_OUTPUT_DIR = os.path.join(ROOT_PATH, "data", "openie")
+CHECKPOINT_DB_PATH = os.path.join(TEMP_DIR, "info_extraction.db")
 
 
 def ensure_dirs():
@@ -51,73 +38,32 @@ def ensure_dirs():
         logger.info(f"已创建原始数据目录: {RAW_DATA_PATH}")
 
 
-# 创建一个线程安全的锁，用于保护文件操作和共享数据
-file_lock = Lock()
-open_ie_doc_lock = Lock()
-
-# 创建一个事件标志，用于控制程序终止
-shutdown_event = Event()
-
-lpmm_entity_extract_llm = LLMRequest(
-    model_set=model_config.model_task_config.lpmm_entity_extract, request_type="lpmm.entity_extract"
-)
-lpmm_rdf_build_llm = LLMRequest(model_set=model_config.model_task_config.lpmm_rdf_build, request_type="lpmm.rdf_build")
-
-
-def process_single_text(pg_hash, raw_data):
-    """处理单个文本的函数，用于线程池"""
-    temp_file_path = f"{TEMP_DIR}/{pg_hash}.json"
-
-    # 使用文件锁检查和读取缓存文件
-    with file_lock:
-        if os.path.exists(temp_file_path):
+def migrate_temp_json_cache(checkpoint: ExtractionCheckpoint, paragraphs: dict[str, str]) -> None:
+    """将旧版逐段落JSON缓存（TEMP_DIR/<hash>.json）导入检查点（待导出），导入后删除缓存文件"""
+    states = checkpoint.load_states()
+    migrated = 0
+    for temp_file_path in glob.glob(os.path.join(TEMP_DIR, "*.json")):
+        pg_hash = os.path.splitext(os.path.basename(temp_file_path))[0]
+        if pg_hash not in paragraphs:
+            continue
+        if states.get(pg_hash, ("", None))[0] != STATUS_DONE:
             try:
-                # 存在对应的提取结果
-                logger.info(f"找到缓存的提取结果：{pg_hash}")
                 with open(temp_file_path, "r", encoding="utf-8") as f:
-                    return json.load(f), None
+                    doc_item = json.load(f)
             except json.JSONDecodeError:
-                # 如果JSON文件损坏，删除它并重新处理
-                logger.warning(f"缓存文件损坏，重新处理：{pg_hash}")
-                os.remove(temp_file_path)
-
-    entity_list, rdf_triple_list = info_extract_from_str(
-        lpmm_entity_extract_llm,
-        lpmm_rdf_build_llm,
-        raw_data,
-    )
-    if entity_list is None or rdf_triple_list is None:
-        return None, pg_hash
-    doc_item = {
-        "idx": pg_hash,
-        "passage": raw_data,
-        "extracted_entities": entity_list,
-        "extracted_triples": rdf_triple_list,
-    }
-    # 保存临时提取结果
-    with file_lock:
-        try:
-            with open(temp_file_path, "w", encoding="utf-8") as f:
-                json.dump(doc_item, f, ensure_ascii=False, indent=4)
-        except Exception as e:
-            logger.error(f"保存缓存文件失败：{pg_hash}, 错误：{e}")
-            # 如果保存失败，确保不会留下损坏的文件
-            if os.path.exists(temp_file_path):
+                logger.warning(f"缓存文件损坏，将重新处理：{pg_hash}")
                 os.remove(temp_file_path)
-            sys.exit(0)
-            return None, pg_hash
-    return doc_item, None
-
-
-def signal_handler(_signum, _frame):
-    """处理Ctrl+C信号"""
-    logger.info("\n接收到中断信号，正在优雅地关闭程序...")
-    sys.exit(0)
+                continue
+            # 旧版只在运行结束时汇总缓存，中断遗留的缓存从未写入输出文件，因此保持未导出状态，
+            # 由本次运行写入新的输出文件（导入时按段落hash去重，重复导出无害）
+            checkpoint.save_result(pg_hash, doc_item["extracted_entities"], doc_item["extracted_triples"])
+            migrated += 1
+        os.remove(temp_file_path)
+    if migrated:
+        logger.info(f"已将{migrated}个旧版缓存的提取结果导入检查点")
 
 
 def main():  # sourcery skip: comprehension-to-generator, extract-method
-    # 设置信号处理器
-    signal.signal(signal.SIGINT, signal_handler)
     ensure_dirs()  # 确保目录存在
     # 新增用户确认提示
     print("=== 重要操作确认，请认真阅读以下内容哦 ===")
@@ -138,81 +84,35 @@ def main():  # sourcery skip: comprehension-to-generator, extract-method
     # 加载原始数据
     logger.info("正在加载原始数据")
     all_sha256_list, all_raw_datas = load_raw_data()
-
-    failed_sha256 = []
-    open_ie_doc = []
-
-    workers = global_config.lpmm_knowledge.info_extraction_workers
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        future_to_hash = {
-            executor.submit(process_single_text, pg_hash, raw_data): pg_hash
-            for pg_hash, raw_data in zip(all_sha256_list, all_raw_datas, strict=False)
-        }
-
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TaskProgressColumn(),
-            MofNCompleteColumn(),
-            "•",
-            TimeElapsedColumn(),
-            "<",
-            TimeRemainingColumn(),
-            transient=False,
-        ) as progress:
-            task = progress.add_task("正在进行提取：", total=len(future_to_hash))
-            try:
-                for future in as_completed(future_to_hash):
-                    if shutdown_event.is_set():
-                        for f in future_to_hash:
-                            if not f.done():
-                                f.cancel()
-                        break
-
-                    doc_item, failed_hash = future.result()
-                    if failed_hash:
-                        failed_sha256.append(failed_hash)
-                        logger.error(f"提取失败：{failed_hash}")
-                    elif doc_item:
-                        with open_ie_doc_lock:
-                            open_ie_doc.append(doc_item)
-                        logger.info('已处理"%s"', doc_item.get("passage", ""))
-                    progress.update(task, advance=1)
-            except KeyboardInterrupt:
-                logger.info("\n接收到中断信号，正在优雅地关闭程序...")
-                shutdown_event.set()
-                for f in future_to_hash:
-                    if not f.done():
-                        f.cancel()
-
-    # 合并所有文件的提取结果并保存
-    if open_ie_doc:
-        sum_phrase_chars = sum([len(e) for chunk in open_ie_doc for e in chunk["extracted_entities"]])
-        sum_phrase_words = sum([len(e.split()) for chunk in open_ie_doc for e in chunk["extracted_entities"]])
-        num_phrases = sum([len(chunk["extracted_entities"]) for chunk in open_ie_doc])
-        openie_obj = OpenIE(
-            open_ie_doc,
-            round(sum_phrase_chars / num_phrases, 4) if num_phrases else 0,
-            round(sum_phrase_words / num_phrases, 4) if num_phrases else 0,
-        )
-        # 输出文件名格式：MM-DD-HH-ss-openie.json
-        now = datetime.datetime.now()
-        filename = now.strftime("%m-%d-%H-%S-openie.json")
-        output_path = os.path.join(OPENIE_OUTPUT_DIR, filename)
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(
-                openie_obj.to_dict() if hasattr(openie_obj, "to_dict") else openie_obj.__dict__,
-                f,
-                ensure_ascii=False,
-                indent=4,
-            )
+    paragraphs = dict(zip(all_sha256_list, all_raw_datas, strict=False))
+
+    checkpoint = ExtractionCheckpoint(CHECKPOINT_DB_PATH)
+    migrate_temp_json_cache(checkpoint, paragraphs)
+
+    # 输出文件名格式：MM-DD-HH-ss-openie.jsonl（每行一个段落，提取完成即写入）
+    now = datetime.datetime.now()
+    output_path = os.path.join(OPENIE_OUTPUT_DIR, now.strftime("%m-%d-%H-%S-openie.jsonl"))
+    pipeline = OpenIEExtractionPipeline(
+        checkpoint,
+        output_path,
+        workers_per_provider=global_config.lpmm_knowledge.info_extraction_workers,
+    )
+    try:
+        stats = asyncio.run(pipeline.run(paragraphs))
+    except KeyboardInterrupt:
+        logger.info("\n接收到中断信号，已完成的提取结果均已保存，重新执行将从断点继续")
+        sys.exit(0)
+    finally:
+        checkpoint.close()
+
+    if os.path.exists(output_path):
         logger.info(f"信息提取结果已保存到: {output_path}")
     else:
-        logger.warning("没有可保存的信息提取结果")
+        logger.warning("没有新的信息提取结果")
 
     logger.info("--------信息提取完成--------")
-    logger.info(f"提取失败的文段SHA256：{failed_sha256}")
+    if stats.failed:
+        logger.info(f"{stats.failed}个文段提取失败，重新执行本脚本将重试这些文段（状态记录于{CHECKPOINT_DB_PATH}）")
 
 
 if __name__ == "__main__":
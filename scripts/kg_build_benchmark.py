@@ -0,0 +1,110 @@
+"""
+LPMM知识图谱构建基准测试
+
+在随机生成的大图（默认100万条边）上测试：
+1. 旧实现（边列表字符串成员判断）与新实现（哈希判断+批量加边）更新图结构的耗时
+2. 同义词连接中逐实体检索与整体批量检索的耗时
+
+用法：
+    python scripts/kg_build_benchmark.py --edges 1000000 --new-edges 100000 --entities 20000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import faiss
+import numpy as np
+from quick_algo import di_graph
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.chat.knowledge.kg_manager import KGManager  # noqa: E402
+
+OLD_METHOD_PROBES = 200  # 旧实现耗时过长，仅测量少量边后按比例估算
+
+
+def random_edges(num_edges: int, num_nodes: int, rng: random.Random) -> dict[tuple[str, str], float]:
+    """生成随机有向边（节点名不带entity/paragraph前缀，更新图时不查询嵌入库）"""
+    edges = {}
+    while len(edges) < num_edges:
+        src, dst = rng.randrange(num_nodes), rng.randrange(num_nodes)
+        if src != dst:
+            edges[(f"n{src}", f"n{dst}")] = 1.0
+    return edges
+
+
+def benchmark_update_graph(num_edges: int, num_new_edges: int) -> None:
+    rng = random.Random(0)
+    num_nodes = max(2, num_edges // 5)
+    base_edges = random_edges(num_edges, num_nodes, rng)
+
+    kg_manager = KGManager()
+    start = time.perf_counter()
+    kg_manager.graph.add_edges_from(
+        [
+            di_graph.DiEdge(src, dst, {"weight": w, "create_time": 0.0, "update_time": 0.0})
+            for (src, dst), w in base_edges.items()
+        ]
+    )
+    print(f"构建基础图: {num_edges}条边, {num_nodes}个节点, 耗时{time.perf_counter() - start:.2f}s")
+
+    # 新数据：一半为已存在的边（更新权重），一半为新边
+    existing = rng.sample(list(base_edges), num_new_edges // 2)
+    node_to_node = dict.fromkeys(existing, 1.0)
+    node_to_node.update(random_edges(num_new_edges - len(node_to_node), num_nodes * 2, rng))
+
+    # 旧实现：每条边都在字符串化的边列表中线性查找
+    start = time.perf_counter()
+    existed_edges = [str((edge[0], edge[1])) for edge in kg_manager.graph.get_edge_list()]
+    build_time = time.perf_counter() - start
+    probes = list(node_to_node)[:OLD_METHOD_PROBES]
+    start = time.perf_counter()
+    for src_tgt in probes:
+        _ = str(src_tgt) in existed_edges
+    probe_time = time.perf_counter() - start
+    estimated = build_time + probe_time / len(probes) * len(node_to_node)
+    print(f"旧实现（列表成员判断）: 估算{estimated:.1f}s（按{len(probes)}条边的实测耗时外推，不含加边）")
+    del existed_edges
+
+    start = time.perf_counter()
+    kg_manager._update_graph(node_to_node, None)  # type: ignore
+    print(f"新实现（哈希判断+批量加边）: {len(node_to_node)}条边, 实际耗时{time.perf_counter() - start:.2f}s")
+
+
+def benchmark_synonym_search(num_entities: int, dimension: int, top_k: int) -> None:
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(size=(num_entities, dimension)).astype(np.float32)
+    faiss.normalize_L2(matrix)
+    index = faiss.IndexFlatIP(dimension)
+    index.add(matrix)
+
+    start = time.perf_counter()
+    for row in matrix:
+        index.search(row.reshape(1, -1), top_k)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index.search(matrix, top_k)
+    batch_time = time.perf_counter() - start
+    print(
+        f"同义词检索（{num_entities}个实体, 维度{dimension}, k={top_k}）: 逐个{loop_time:.2f}s, 批量{batch_time:.2f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LPMM知识图谱构建基准测试")
+    parser.add_argument("--edges", type=int, default=1_000_000, help="基础图的边数")
+    parser.add_argument("--new-edges", type=int, default=100_000, help="一次导入的边数")
+    parser.add_argument("--entities", type=int, default=20_000, help="同义词检索的实体数")
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    benchmark_update_graph(args.edges, args.new_edges)
+    benchmark_synonym_search(args.entities, args.dimension, args.top_k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+LPMM段落混合检索基准测试
+
+从段落库中随机抽取段落，截取其中一个片段作为查询（目标为原段落），比较：
+1. 仅向量检索
+2. 仅BM25检索
+3. 向量 + BM25（RRF融合）
+的命中率（hit@k）与检索延迟。查询向量需要调用嵌入模型。
+
+用法：
+    python scripts/lpmm_hybrid_benchmark.py --queries 200 --fragment-length 12 --top-k 10
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.chat.knowledge.embedding_store import EmbeddingManager  # noqa: E402
+from src.chat.knowledge.utils.rank_fusion import reciprocal_rank_fusion  # noqa: E402
+from src.common.logger import get_logger  # noqa: E402
+from src.config.config import global_config  # noqa: E402
+
+logger = get_logger("LPMM混合检索基准")
+
+
+def sample_queries(embed_manager: EmbeddingManager, num_queries: int, fragment_length: int) -> list[tuple[str, str]]:
+    """抽取(查询片段, 目标段落hash)"""
+    store = embed_manager.paragraphs_embedding_store.store
+    hashes = [item_hash for item_hash in store.ordered_hashes() if len(store[item_hash].str) > fragment_length]
+    rng = random.Random(42)
+    queries = []
+    for item_hash in rng.sample(hashes, min(num_queries, len(hashes))):
+        text = store[item_hash].str
+        start = rng.randrange(len(text) - fragment_length)
+        queries.append((text[start : start + fragment_length], item_hash))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LPMM段落混合检索命中率/延迟基准测试")
+    parser.add_argument("--queries", type=int, default=200, help="测试查询数")
+    parser.add_argument("--fragment-length", type=int, default=12, help="查询片段长度（字符）")
+    parser.add_argument("--top-k", type=int, default=10, help="统计命中率的k")
+    args = parser.parse_args()
+
+    lpmm_config = global_config.lpmm_knowledge
+    embed_manager = EmbeddingManager()
+    embed_manager.load_from_file()
+    start = time.perf_counter()
+    added = embed_manager.paragraph_bm25_index.sync_with_store(embed_manager.paragraphs_embedding_store)
+    logger.info(f"BM25索引就绪（新建{added}个段落），耗时{time.perf_counter() - start:.2f}s")
+
+    queries = sample_queries(embed_manager, args.queries, args.fragment_length)
+    if not queries:
+        logger.error("段落库为空或段落过短")
+        return
+    query_vectors = [
+        vector
+        for _, vector in embed_manager.paragraphs_embedding_store._get_embeddings_batch([query for query, _ in queries])
+    ]
+
+    hits = {"vector": 0, "bm25": 0, "hybrid": 0}
+    latencies = {"vector": [], "bm25": [], "hybrid": []}
+    for (query, target), vector in zip(queries, query_vectors, strict=True):
+        if not vector:
+            logger.warning(f"获取查询嵌入失败，跳过：{query}")
+            continue
+        start = time.perf_counter()
+        vector_res = embed_manager.paragraphs_embedding_store.search_top_k(
+            vector, lpmm_config.qa_paragraph_search_top_k
+        )
+        latencies["vector"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        bm25_res = embed_manager.paragraph_bm25_index.search(query, lpmm_config.qa_bm25_search_top_k)
+        latencies["bm25"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        hybrid_res = reciprocal_rank_fusion([vector_res, bm25_res], k=lpmm_config.qa_rrf_k)
+        # 混合检索延迟 = 两路检索 + 融合
+        latencies["hybrid"].append(time.perf_counter() - start + latencies["vector"][-1] + latencies["bm25"][-1])
+
+        for name, results in (("vector", vector_res), ("bm25", bm25_res), ("hybrid", hybrid_res)):
+            hits[name] += target in {item_hash for item_hash, _ in results[: args.top_k]}
+
+    num_evaluated = len(latencies["vector"])
+    print(
+        f"段落数: {len(embed_manager.paragraphs_embedding_store.store)}, 查询数: {num_evaluated}, "
+        f"片段长度: {args.fragment_length}, k={args.top_k}"
+    )
+    print(f"{'方式':<10}{'命中率':>10}{'平均延迟(ms)':>16}{'P95延迟(ms)':>16}")
+    for name in ("vector", "bm25", "hybrid"):
+        lat = np.array(latencies[name]) * 1000
+        print(
+            f"{name:<10}{hits[name] / max(num_evaluated, 1):>10.3f}"
+            f"{lat.mean() if len(lat) else 0:>16.3f}{np.percentile(lat, 95) if len(lat) else 0:>16.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
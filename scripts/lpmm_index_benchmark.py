@@ -0,0 +1,111 @@
+"""
+LPMM向量索引基准测试
+
+在指定嵌入库上分别构建 flat / ivf_flat / hnsw / ivf_pq 索引，
+以精确检索（flat）结果为基准，比较各索引的构建耗时、索引大小、召回率与检索延迟。
+
+用法：
+    python scripts/lpmm_index_benchmark.py --namespace paragraph --queries 200 --top-k 10
+"""
+
+import argparse
+import dataclasses
+import os
+import sys
+import time
+
+import faiss
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.chat.knowledge.embedding_store import (  # noqa: E402
+    EMBEDDING_DATA_DIR_STR,
+    EmbeddingStore,
+    FaissIndexSpec,
+    create_faiss_index,
+    get_faiss_index_type,
+)
+from src.common.logger import get_logger  # noqa: E402
+from src.config.config import global_config  # noqa: E402
+
+logger = get_logger("LPMM索引基准")
+
+INDEX_TYPES = ["flat", "ivf_flat", "hnsw", "ivf_pq"]
+
+
+def load_normalized_matrix(namespace: str) -> np.ndarray:
+    """加载嵌入库并返回L2归一化后的向量矩阵"""
+    store = EmbeddingStore(namespace, EMBEDDING_DATA_DIR_STR)
+    store.load_from_file()
+    matrix = store.store.to_matrix()
+    faiss.normalize_L2(matrix)
+    return matrix
+
+
+def build_index(spec: FaissIndexSpec, matrix: np.ndarray) -> tuple[faiss.Index, float]:
+    """构建索引，返回(索引, 构建耗时)"""
+    start = time.perf_counter()
+    index = create_faiss_index(spec, matrix.shape[1], len(matrix))
+    if not index.is_trained:
+        rng = np.random.default_rng(0)
+        rows = rng.choice(len(matrix), size=min(len(matrix), 100000), replace=False)
+        index.train(matrix[rows])
+    index.add(matrix)
+    return index, time.perf_counter() - start
+
+
+def evaluate(index: faiss.Index, queries: np.ndarray, ground_truth: np.ndarray, top_k: int) -> tuple[float, float]:
+    """逐条检索，返回(recall@k, 平均延迟毫秒)"""
+    hits = 0
+    latencies = []
+    for query, truth in zip(queries, ground_truth, strict=True):
+        start = time.perf_counter()
+        _, indices = index.search(query.reshape(1, -1), top_k)
+        latencies.append(time.perf_counter() - start)
+        hits += len(set(indices[0].tolist()) & set(truth.tolist()))
+    return hits / (len(queries) * top_k), float(np.mean(latencies) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LPMM向量索引召回率/延迟基准测试")
+    parser.add_argument("--namespace", default="paragraph", choices=["paragraph", "entity", "relation"])
+    parser.add_argument("--queries", type=int, default=200, help="测试查询数（从库中随机抽取向量并加噪声）")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=INDEX_TYPES, choices=INDEX_TYPES)
+    args = parser.parse_args()
+
+    matrix = load_normalized_matrix(args.namespace)
+    if len(matrix) == 0:
+        logger.error(f"{args.namespace}嵌入库为空")
+        return
+
+    rng = np.random.default_rng(42)
+    query_rows = rng.choice(len(matrix), size=min(args.queries, len(matrix)), replace=False)
+    queries = matrix[query_rows] + rng.normal(scale=0.01, size=(len(query_rows), matrix.shape[1])).astype(np.float32)
+    faiss.normalize_L2(queries)
+
+    top_k = min(args.top_k, len(matrix))
+    exact_index = faiss.IndexFlatIP(matrix.shape[1])
+    exact_index.add(matrix)
+    _, ground_truth = exact_index.search(queries, top_k)
+
+    base_spec = FaissIndexSpec.from_config()
+    print(
+        f"嵌入库: {args.namespace}, 向量数: {len(matrix)}, 维度: {matrix.shape[1]}, 查询数: {len(queries)}, k={top_k}"
+    )
+    print(f"{'配置类型':<10}{'实际类型':<10}{'构建(s)':>10}{'大小(MB)':>10}{'召回率':>10}{'延迟(ms)':>10}")
+    for index_type in args.types:
+        spec = dataclasses.replace(base_spec, index_type=index_type)
+        index, build_time = build_index(spec, matrix)
+        recall, latency = evaluate(index, queries, ground_truth, top_k)
+        size_mb = faiss.serialize_index(index).nbytes / 1024 / 1024
+        print(
+            f"{index_type:<10}{get_faiss_index_type(index):<10}{build_time:>10.2f}{size_mb:>10.1f}"
+            f"{recall:>10.3f}{latency:>10.3f}"
+        )
+
+    print(f"当前配置: faiss_index_type = {global_config.lpmm_knowledge.faiss_index_type}")
+
+
+if __name__ == "__main__":
+    main()
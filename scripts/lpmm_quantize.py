@@ -0,0 +1,141 @@
+"""
+LPMM嵌入库量化评估与迁移
+
+评估：以float32精确检索为基准，比较float16存储及fp16/int8标量量化索引的内存占用、召回率与相似度误差。
+迁移：使用 --apply 将已有嵌入库转换为指定的存储精度与索引量化方式（之后请在bot_config.toml中设置相同的值）。
+
+用法：
+    python scripts/lpmm_quantize.py --queries 200 --top-k 10
+    python scripts/lpmm_quantize.py --apply --storage-dtype float16 --scalar-quantizer int8
+"""
+
+import argparse
+import dataclasses
+import os
+import sys
+
+import faiss
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.chat.knowledge.embedding_store import (  # noqa: E402
+    EMBEDDING_DATA_DIR_STR,
+    EmbeddingStore,
+    FaissIndexSpec,
+    create_faiss_index,
+    get_faiss_index_type,
+    get_faiss_scalar_quantizer,
+)
+from src.common.logger import get_logger  # noqa: E402
+from src.config.config import global_config  # noqa: E402
+
+logger = get_logger("LPMM量化")
+
+NAMESPACES = ["paragraph", "entity", "relation"]
+
+
+def build_index(spec: FaissIndexSpec, matrix: np.ndarray) -> faiss.Index:
+    """按给定配置构建索引（matrix需已归一化）"""
+    index = create_faiss_index(spec, matrix.shape[1], len(matrix))
+    if not index.is_trained:
+        rng = np.random.default_rng(0)
+        rows = rng.choice(len(matrix), size=min(len(matrix), 100000), replace=False)
+        index.train(matrix[rows])
+    index.add(matrix)
+    return index
+
+
+def evaluate(
+    index: faiss.Index, queries: np.ndarray, truth_scores: np.ndarray, truth_ids: np.ndarray, top_k: int
+) -> tuple[float, float]:
+    """返回(recall@k, 前k项相似度平均绝对误差)"""
+    scores, ids = index.search(queries, top_k)
+    hits = sum(len(set(row.tolist()) & set(truth.tolist())) for row, truth in zip(ids, truth_ids, strict=True))
+    return hits / truth_ids.size, float(np.mean(np.abs(scores - truth_scores)))
+
+
+def report(namespace: str, num_queries: int, top_k: int) -> None:
+    """输出单个嵌入库的量化评估结果"""
+    store = EmbeddingStore(namespace, EMBEDDING_DATA_DIR_STR)
+    store.load_from_file()
+    matrix = store.store.to_matrix()
+    if len(matrix) == 0:
+        logger.warning(f"{namespace}嵌入库为空，跳过")
+        return
+    faiss.normalize_L2(matrix)
+
+    rng = np.random.default_rng(42)
+    query_rows = rng.choice(len(matrix), size=min(num_queries, len(matrix)), replace=False)
+    queries = matrix[query_rows] + rng.normal(scale=0.01, size=(len(query_rows), matrix.shape[1])).astype(np.float32)
+    faiss.normalize_L2(queries)
+    top_k = min(top_k, len(matrix))
+
+    exact_index = faiss.IndexFlatIP(matrix.shape[1])
+    exact_index.add(matrix)
+    truth_scores, truth_ids = exact_index.search(queries, top_k)
+
+    # float16存储：向量以半精度落盘，加入索引前恢复为float32
+    half_matrix = matrix.astype(np.float16).astype(np.float32)
+    half_index = faiss.IndexFlatIP(matrix.shape[1])
+    half_index.add(half_matrix)
+    half_recall, half_error = evaluate(half_index, queries, truth_scores, truth_ids, top_k)
+
+    print(f"\n嵌入库: {namespace}, 向量数: {len(matrix)}, 维度: {matrix.shape[1]}, 查询数: {len(queries)}, k={top_k}")
+    print(
+        f"存储矩阵: float32 {matrix.nbytes / 1024 / 1024:.1f}MB -> float16 {matrix.nbytes / 2 / 1024 / 1024:.1f}MB，"
+        f"召回率 {half_recall:.4f}，相似度误差 {half_error:.2e}"
+    )
+    print(f"{'索引类型':<10}{'量化':<8}{'大小(MB)':>10}{'召回率':>10}{'相似度误差':>14}")
+    base_spec = FaissIndexSpec.from_config()
+    for quantizer in ("none", "fp16", "int8"):
+        spec = dataclasses.replace(base_spec, scalar_quantizer=quantizer)
+        index = build_index(spec, matrix)
+        recall, error = evaluate(index, queries, truth_scores, truth_ids, top_k)
+        size_mb = faiss.serialize_index(index).nbytes / 1024 / 1024
+        print(
+            f"{get_faiss_index_type(index):<10}{get_faiss_scalar_quantizer(index):<8}{size_mb:>10.1f}"
+            f"{recall:>10.4f}{error:>14.2e}"
+        )
+
+
+def migrate(namespace: str, storage_dtype: str, scalar_quantizer: str) -> None:
+    """将嵌入库转换为指定的存储精度与索引量化方式"""
+    lpmm_config = global_config.lpmm_knowledge
+    lpmm_config.embedding_storage_dtype = storage_dtype
+    lpmm_config.faiss_scalar_quantizer = scalar_quantizer
+    store = EmbeddingStore(namespace, EMBEDDING_DATA_DIR_STR)
+    # 加载时检测到存储精度或索引量化方式与配置不一致，会自动重写矩阵文件并重建索引
+    store.load_from_file()
+    store.save_to_file()
+    logger.info(
+        f"{namespace}嵌入库已转换：存储精度 {storage_dtype}，索引量化 {get_faiss_scalar_quantizer(store.faiss_index)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LPMM嵌入库量化评估与迁移")
+    parser.add_argument("--namespaces", nargs="+", default=NAMESPACES, choices=NAMESPACES)
+    parser.add_argument("--queries", type=int, default=200, help="测试查询数（从库中随机抽取向量并加噪声）")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--apply", action="store_true", help="执行迁移，而非仅输出评估结果")
+    parser.add_argument("--storage-dtype", default="float16", choices=["float32", "float16"])
+    parser.add_argument("--scalar-quantizer", default="none", choices=["none", "fp16", "int8"])
+    args = parser.parse_args()
+
+    if not args.apply:
+        for namespace in args.namespaces:
+            report(namespace, args.queries, args.top_k)
+        return
+
+    for namespace in args.namespaces:
+        migrate(namespace, args.storage_dtype, args.scalar_quantizer)
+    print(
+        "迁移完成，请在bot_config.toml的[lpmm_knowledge]中设置：\n"
+        f'    embedding_storage_dtype = "{args.storage_dtype}"\n'
+        f'    faiss_scalar_quantizer = "{args.scalar_quantizer}"\n'
+        "否则下次加载时会按配置再次转换"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+提示词模板格式化微基准测试
+
+加载内置提示词模板，对其中最长的若干个对比：
+1. 参照实现（编译前的Prompt.format：每次重新构造Prompt、正则解析占位符并用str.format格式化）
+2. 当前实现（创建时编译模板，格式化时按片段拼接）
+同时校验两种实现的结果一致。
+
+用法：
+    python scripts/prompt_benchmark.py --top 8 --repeat 200
+"""
+
+import argparse
+import importlib
+import os
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.chat.utils.prompt_builder import Prompt, global_prompt_manager  # noqa: E402
+
+# 导入时会注册内置提示词模板的模块
+PROMPT_MODULES = [
+    "src.chat.planner_actions.planner",
+    "src.chat.brain_chat.brain_planner",
+    "src.chat.replyer.group_generator",
+    "src.chat.replyer.private_generator",
+    "src.chat.frequency_control.frequency_control",
+    "src.express.expression_learner",
+    "src.express.expression_selector",
+    "src.jargon.jargon_miner",
+    "src.hippo_memorizer.chat_history_summarizer",
+    "src.mood.mood_manager",
+]
+
+
+# ---------------------------------------------------------------------------
+# 参照实现（编译前的版本）
+# ---------------------------------------------------------------------------
+
+
+def ref_format(template: str, kwargs: Dict[str, Any]) -> str:
+    processed_template = Prompt._process_escaped_braces(template)
+    # 构造Prompt时解析一次
+    template_args = []
+    for expr in re.findall(r"\{(.*?)}", processed_template):
+        if expr and expr not in template_args:
+            template_args.append(expr)
+    # 格式化时再解析一次
+    processed_template = Prompt._process_escaped_braces(template)
+    template_args = []
+    for expr in re.findall(r"\{(.*?)}", processed_template):
+        if expr and expr not in template_args:
+            template_args.append(expr)
+    formatted_kwargs = {}
+    for key, value in kwargs.items():
+        formatted_kwargs[key] = value
+    processed_template = processed_template.format(**formatted_kwargs)
+    return Prompt._restore_escaped_braces(processed_template)
+
+
+# ---------------------------------------------------------------------------
+
+
+def bench(fn: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    """返回(平均每次耗时微秒, 结果)"""
+    result = fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6, result
+
+
+def load_prompts() -> List[Prompt]:
+    for module in PROMPT_MODULES:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            print(f"跳过模块 {module}：{e}")
+    prompts = [prompt for prompt in global_prompt_manager._prompts.values() if isinstance(prompt.template, str)]
+    return sorted(prompts, key=lambda prompt: len(prompt.template), reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="提示词模板格式化微基准测试")
+    parser.add_argument("--top", type=int, default=8, help="测试最长的前N个模板")
+    parser.add_argument("--repeat", type=int, default=200, help="每个模板的格式化次数")
+    args = parser.parse_args()
+
+    prompts = load_prompts()
+    if not prompts:
+        print("未加载到任何提示词模板")
+        return
+
+    total_ref = total_new = 0.0
+    for prompt in prompts[: args.top]:
+        # 每个占位符填充约200字的内容，接近实际构建的聊天记录片段长度
+        kwargs = {name: f"<{name}>" + "聊天内容" * 50 for name in prompt.args}
+        ref_us, ref_res = bench(lambda p=prompt, kw=kwargs: ref_format(p.template, kw), args.repeat)
+        new_us, new_res = bench(lambda p=prompt, kw=kwargs: p.format(**kw), args.repeat)
+        assert ref_res == new_res, prompt.name
+        total_ref += ref_us
+        total_new += new_us
+        print(
+            f"{prompt.name:<36} {len(prompt.template):>6}字 {len(prompt.args):>3}个占位符    "
+            f"参照 {ref_us:>8.1f} us    新实现 {new_us:>8.1f} us    加速 {ref_us / new_us:>5.1f}x"
+        )
+    print(
+        f"{'合计':<36} 参照 {total_ref:>8.1f} us    新实现 {total_new:>8.1f} us    加速 {total_ref / total_new:>5.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+相似度工具微基准测试
+
+对比 src/common/similarity 中的实现与此前各模块中的纯Python实现（作为参照保留在本脚本中）：
+1. 余弦相似度：逐对计算 vs numpy批量计算
+2. 编辑距离：动态规划 vs 位并行，一对多
+3. dyn_select_top_k：列表推导 vs numpy向量化
+4. 首个相似文本查找：逐个SequenceMatcher.ratio() vs 上界剪枝
+同时校验两种实现的结果一致。
+
+用法：
+    python scripts/similarity_benchmark.py --repeat 5
+"""
+
+import argparse
+import difflib
+import math
+import os
+import random
+import sys
+import time
+from typing import Any, Callable, List, Tuple
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.common.similarity import (  # noqa: E402
+    cosine_similarity_matrix,
+    dyn_select_top_k,
+    find_first_similar,
+    levenshtein_distances,
+    string_similarities,
+)
+
+
+# ---------------------------------------------------------------------------
+# 参照实现（迁移前的纯Python版本）
+# ---------------------------------------------------------------------------
+
+
+def ref_cosine_similarity(a, b):
+    dot = sum(x * y for x, y in zip(a, b, strict=False))
+    norm_a = math.sqrt(sum(x * x for x in a))
+    norm_b = math.sqrt(sum(x * x for x in b))
+    if norm_a == 0 or norm_b == 0:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+
+def ref_levenshtein_distance(s1: str, s2: str) -> int:
+    if len(s1) < len(s2):
+        return ref_levenshtein_distance(s2, s1)
+    if len(s2) == 0:
+        return len(s1)
+    previous_row = range(len(s2) + 1)
+    for i, c1 in enumerate(s1):
+        current_row = [i + 1]
+        for j, c2 in enumerate(s2):
+            insertions = previous_row[j + 1] + 1
+            deletions = current_row[j] + 1
+            substitutions = previous_row[j] + (c1 != c2)
+            current_row.append(min(insertions, deletions, substitutions))
+        previous_row = current_row
+    return previous_row[-1]
+
+
+def ref_string_similarity(s1: str, s2: str) -> float:
+    if s1 == s2:
+        return 1.0
+    if not s1 or not s2:
+        return 0.0
+    distance = ref_levenshtein_distance(s1, s2)
+    max_len = max(len(s1), len(s2))
+    return 1 - (distance / max_len if max_len > 0 else 0)
+
+
+def ref_dyn_select_top_k(
+    score: List[Tuple[Any, float]], jmp_factor: float, var_factor: float
+) -> List[Tuple[Any, float, float]]:
+    sorted_score = sorted(score, key=lambda x: x[1], reverse=True)
+    max_score = sorted_score[0][1]
+    min_score = sorted_score[-1][1]
+    normalized_score = [(s[0], s[1], (s[1] - min_score) / (max_score - min_score)) for s in sorted_score]
+    jump_idx = 0
+    for i in range(1, len(normalized_score)):
+        if abs(normalized_score[i][2] - normalized_score[i - 1][2]) > abs(
+            normalized_score[jump_idx][2] - normalized_score[jump_idx - 1][2]
+        ):
+            jump_idx = i
+    jump_threshold = normalized_score[jump_idx][2]
+    mean_score = sum([s[2] for s in normalized_score]) / len(normalized_score)
+    var_score = sum([(s[2] - mean_score) ** 2 for s in normalized_score]) / len(normalized_score)
+    threshold = jmp_factor * jump_threshold + (1 - jmp_factor) * (mean_score + var_factor * var_score)
+    return [s for s in normalized_score if s[2] > threshold]
+
+
+def ref_find_first_similar(query: str, candidates: List[str], threshold: float):
+    for i, c in enumerate(candidates):
+        if difflib.SequenceMatcher(None, c, query).ratio() >= threshold:
+            return i
+    return None
+
+
+# ---------------------------------------------------------------------------
+
+
+def bench(fn: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    """返回(最快一次耗时毫秒, 结果)"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def report(name: str, ref_ms: float, new_ms: float) -> None:
+    print(f"{name:<36} 参照 {ref_ms:>10.2f} ms    新实现 {new_ms:>10.2f} ms    加速 {ref_ms / new_ms:>7.1f}x")
+
+
+def random_text(rng: random.Random, alphabet: str, min_len: int, max_len: int) -> str:
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(min_len, max_len)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="相似度工具微基准测试")
+    parser.add_argument("--repeat", type=int, default=5, help="每项重复次数（取最快一次）")
+    args = parser.parse_args()
+    rng = random.Random(42)
+    np_rng = np.random.default_rng(42)
+    alphabet = "的一是了我不人在他有这个上们来到时大地为子中你说生国年着就那和要她出也得里后自以会开心难过生气"
+
+    # 1. 余弦相似度：1个查询 × 2000个1024维向量
+    query = np_rng.normal(size=1024)
+    matrix = np_rng.normal(size=(2000, 1024))
+    query_list, matrix_list = query.tolist(), matrix.tolist()
+    ref_ms, ref_res = bench(lambda: [ref_cosine_similarity(query_list, row) for row in matrix_list], args.repeat)
+    new_ms, new_res = bench(lambda: cosine_similarity_matrix(query, matrix), args.repeat)
+    assert np.allclose(ref_res, new_res, atol=1e-5)
+    report("余弦相似度 1×2000×1024", ref_ms, new_ms)
+
+    # 2. 编辑距离：表情包情感标签匹配（短串，一对多）
+    emotions = [random_text(rng, alphabet, 2, 6) for _ in range(3000)]
+    text_emotion = random_text(rng, alphabet, 2, 6)
+    ref_ms, ref_res = bench(lambda: [ref_string_similarity(text_emotion, e) for e in emotions], args.repeat)
+    new_ms, new_res = bench(lambda: string_similarities(text_emotion, emotions), args.repeat)
+    assert ref_res == new_res
+    report("字符串相似度 短串 1×3000", ref_ms, new_ms)
+
+    # 编辑距离：记忆点去重（中等长度，一对多）
+    memories = [random_text(rng, alphabet, 20, 80) for _ in range(300)]
+    memory_content = random_text(rng, alphabet, 20, 80)
+    ref_ms, ref_res = bench(lambda: [ref_levenshtein_distance(memory_content, m) for m in memories], args.repeat)
+    new_ms, new_res = bench(lambda: levenshtein_distances(memory_content, memories), args.repeat)
+    assert ref_res == new_res
+    report("编辑距离 20~80字 1×300", ref_ms, new_ms)
+
+    # 3. dyn_select_top_k：检索结果过滤
+    scores = [(f"paragraph-{i}", float(s)) for i, s in enumerate(np_rng.random(1000))]
+    ref_ms, ref_res = bench(lambda: ref_dyn_select_top_k(scores, 0.5, 1.0), args.repeat * 20)
+    new_ms, new_res = bench(lambda: dyn_select_top_k(scores, 0.5, 1.0), args.repeat * 20)
+    assert [r[0] for r in ref_res] == [r[0] for r in new_res]
+    report("dyn_select_top_k 1000项", ref_ms, new_ms)
+
+    # 4. 表达方式溯源：在聊天记录中查找首个相似度≥0.85的句子
+    lines = [random_text(rng, alphabet, 5, 40) for _ in range(200)]
+    contexts = [random_text(rng, alphabet, 5, 40) for _ in range(20)] + rng.sample(lines, 5)
+    ref_ms, ref_res = bench(lambda: [ref_find_first_similar(c, lines, 0.85) for c in contexts], args.repeat)
+    new_ms, new_res = bench(lambda: [find_first_similar(c, lines, 0.85) for c in contexts], args.repeat)
+    assert ref_res == new_res
+    report("首个相似句查找 25×200", ref_ms, new_ms)
+
+
+if __name__ == "__main__":
+    main()
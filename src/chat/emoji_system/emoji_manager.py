@@ -16,6 +16,7 @@ from rich.traceback import install
 from src.common.database.database_model import Emoji, EmojiDescriptionCache
 from src.common.database.database import db as peewee_db
 from src.common.logger import get_logger
+from src.common.similarity import string_similarities
 from src.config.config import global_config, model_config
 from src.chat.utils.utils_image import image_path_to_base64, get_image_manager
 from src.llm_models.utils_model import LLMRequest
@@ -439,24 +440,19 @@ class EmojiManager:
                 return None
 
             # 计算每个表情包与输入文本的最大情感相似度
+            active_emojis = [emoji for emoji in all_emojis if not emoji.is_deleted and emoji.emotion]
+            # 所有emotion标签与输入文本一次性批量计算编辑距离相似度（不同表情包的相同标签只计算一次）
+            unique_emotions = list(dict.fromkeys(emotion for emoji in active_emojis for emotion in emoji.emotion))
+            emotion_similarity = dict(
+                zip(unique_emotions, string_similarities(text_emotion, unique_emotions), strict=True)
+            )
             emoji_similarities = []
-            for emoji in all_emojis:
-                # 跳过已标记为删除的对象
-                if emoji.is_deleted:
-                    continue
-
-                emotions = emoji.emotion
-                if not emotions:
-                    continue
-
-                # 计算与每个emotion标签的相似度，取最大值
+            for emoji in active_emojis:
+                # 取与各emotion标签相似度的最大值
                 max_similarity = 0
                 best_matching_emotion = ""
-                for emotion in emotions:
-                    # 使用编辑距离计算相似度
-                    distance = self._levenshtein_distance(text_emotion, emotion)
-                    max_len = max(len(text_emotion), len(emotion))
-                    similarity = 1 - (distance / max_len if max_len > 0 else 0)
+                for emotion in emoji.emotion:
+                    similarity = emotion_similarity[emotion]
                     if similarity > max_similarity:
                         max_similarity = similarity
                         best_matching_emotion = emotion
@@ -492,35 +488,6 @@ class EmojiManager:
             logger.error(f"[错误] 获取表情包失败: {str(e)}")
             return None
 
-    def _levenshtein_distance(self, s1: str, s2: str) -> int:
-        # sourcery skip: simplify-empty-collection-comparison, simplify-len-comparison, simplify-str-len-comparison
-        """计算两个字符串的编辑距离
-
-        Args:
-            s1: 第一个字符串
-            s2: 第二个字符串
-
-        Returns:
-            int: 编辑距离
-        """
-        if len(s1) < len(s2):
-            return self._levenshtein_distance(s2, s1)
-
-        if len(s2) == 0:
-            return len(s1)
-
-        previous_row = range(len(s2) + 1)
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
-
-        return previous_row[-1]
-
     async def check_emoji_file_integrity(self) -> None:
         """检查表情包文件完整性
         遍历self.emoji_objects中的所有对象，检查文件是否存在
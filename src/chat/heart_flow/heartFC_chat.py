@@ -2,7 +2,7 @@ import asyncio
 import time
 import traceback
 import random
-from typing import List, Optional, Dict, Any, Tuple, TYPE_CHECKING
+from typing import List, Optional, Dict, Any, Tuple, Callable, Awaitable, TYPE_CHECKING
 from rich.traceback import install
 
 from src.config.config import global_config
@@ -261,13 +261,22 @@ class HeartFChatting:
         thinking_id,
         actions,
         selected_expressions: Optional[List[int]] = None,
+        already_sent: bool = False,
     ) -> Tuple[Dict[str, Any], str, Dict[str, float]]:
-        with Timer("回复发送", cycle_timers):
-            reply_text = await self._send_response(
-                reply_set=response_set,
-                message_data=action_message,
-                selected_expressions=selected_expressions,
+        if already_sent:
+            # 流式发送时回复已在生成过程中发出，这里只负责记录
+            reply_text = "".join(
+                reply_content.content  # type: ignore
+                for reply_content in response_set.reply_data
+                if reply_content.content_type == ReplyContentType.TEXT
             )
+        else:
+            with Timer("回复发送", cycle_timers):
+                reply_text = await self._send_response(
+                    reply_set=response_set,
+                    message_data=action_message,
+                    selected_expressions=selected_expressions,
+                )
 
         # 获取 platform，如果不存在则从 chat_stream 获取，如果还是 None 则使用默认值
         platform = action_message.chat_info.platform
@@ -348,6 +357,7 @@ class HeartFChatting:
                 action_reasoning=reason,
             )
 
+            stream_sender = self._build_stream_sender(force_reply_message)
             with Timer("提及回复生成", cycle_timers):
                 success, llm_response = await generator_api.generate_reply(
                     chat_stream=self.chat_stream,
@@ -359,6 +369,7 @@ class HeartFChatting:
                     request_type="replyer",
                     from_plugin=False,
                     reply_time_point=self.last_read_time,
+                    reply_sentence_callback=stream_sender,
                 )
 
             if not success or not llm_response or not llm_response.reply_set:
@@ -374,6 +385,7 @@ class HeartFChatting:
                 thinking_id=thinking_id,
                 actions=[],  # 独立回复，不依赖planner的动作
                 selected_expressions=selected_expressions,
+                already_sent=stream_sender is not None,
             )
             self.last_active_time = time.time()
             return {
@@ -674,12 +686,8 @@ class HeartFChatting:
             traceback.print_exc()
             return False, ""
 
-    async def _send_response(
-        self,
-        reply_set: "ReplySetModel",
-        message_data: "DatabaseMessages",
-        selected_expressions: Optional[List[int]] = None,
-    ) -> str:
+    def _need_quote_reply(self) -> bool:
+        """从思考到回复期间新消息较多时，使用引用回复"""
         new_message_count = message_api.count_new_messages(
             chat_id=self.chat_stream.stream_id, start_time=self.last_read_time, end_time=time.time()
         )
@@ -688,6 +696,48 @@ class HeartFChatting:
 
         if need_reply:
             logger.info(f"{self.log_prefix} 从思考到回复，共有{new_message_count}条新消息，使用引用回复")
+        return need_reply
+
+    def _build_stream_sender(
+        self, message_data: Optional["DatabaseMessages"]
+    ) -> Optional[Callable[[str, Optional[List[int]]], Awaitable[None]]]:
+        """构建流式发送回调，未启用流式发送时返回None"""
+        if not global_config.response_splitter.enable_stream_send:
+            return None
+
+        first_replied = False
+
+        async def send_sentence(text: str, selected_expressions: Optional[List[int]]) -> None:
+            nonlocal first_replied
+            if not first_replied:
+                await send_api.text_to_stream(
+                    text=text,
+                    stream_id=self.chat_stream.stream_id,
+                    reply_message=message_data,
+                    set_reply=bool(message_data) and self._need_quote_reply(),
+                    typing=False,
+                    selected_expressions=selected_expressions,
+                )
+                first_replied = True
+            else:
+                await send_api.text_to_stream(
+                    text=text,
+                    stream_id=self.chat_stream.stream_id,
+                    reply_message=message_data,
+                    set_reply=False,
+                    typing=True,
+                    selected_expressions=selected_expressions,
+                )
+
+        return send_sentence
+
+    async def _send_response(
+        self,
+        reply_set: "ReplySetModel",
+        message_data: "DatabaseMessages",
+        selected_expressions: Optional[List[int]] = None,
+    ) -> str:
+        need_reply = self._need_quote_reply()
 
         reply_text = ""
         first_replied = False
@@ -797,6 +847,7 @@ class HeartFChatting:
                         action_reasoning=reason,
                     )
 
+                    stream_sender = self._build_stream_sender(action_planner_info.action_message)  # type: ignore
                     success, llm_response = await generator_api.generate_reply(
                         chat_stream=self.chat_stream,
                         reply_message=action_planner_info.action_message,
@@ -807,6 +858,7 @@ class HeartFChatting:
                         request_type="replyer",
                         from_plugin=False,
                         reply_time_point=action_planner_info.action_data.get("loop_start_time", time.time()),
+                        reply_sentence_callback=stream_sender,
                     )
 
                     if not success or not llm_response or not llm_response.reply_set:
@@ -825,6 +877,7 @@ class HeartFChatting:
                         thinking_id=thinking_id,
                         actions=chosen_action_plan_infos,
                         selected_expressions=selected_expressions,
+                        already_sent=stream_sender is not None,
                     )
                     self.last_active_time = time.time()
                     return {
@@ -10,7 +10,7 @@ from src.chat.utils.utils import is_mentioned_bot_in_message
 from src.chat.utils.chat_message_builder import replace_user_references
 from src.common.logger import get_logger
 from src.person_info.person_info import Person
-from src.common.database.database_model import Images
+from src.chat.utils.utils_image import get_image_manager
 
 if TYPE_CHECKING:
     pass
@@ -69,11 +69,11 @@ class HeartFCMessageReceiver:
             # 创建替换后的文本
             processed_text = message.processed_plain_text
             if picid_list:
+                descriptions = get_image_manager().get_image_descriptions(picid_list)
                 for picid in picid_list:
-                    image = Images.get_or_none(Images.image_id == picid)
-                    if image and image.description:
+                    if description := descriptions.get(picid):
                         # 将[picid:xxxx]替换成图片描述
-                        processed_text = processed_text.replace(f"[picid:{picid}]", f"[图片：{image.description}]")
+                        processed_text = processed_text.replace(f"[picid:{picid}]", f"[图片：{description}]")
                     else:
                         # 如果没有找到图片描述，则移除[picid:xxxx]标记
                         processed_text = processed_text.replace(f"[picid:{picid}]", "[图片：网络不好，图片无法加载]")
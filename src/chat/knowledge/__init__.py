@@ -3,7 +3,10 @@ from src.chat.knowledge.qa_manager import QAManager
 from src.chat.knowledge.kg_manager import KGManager
 from src.chat.knowledge.global_logger import logger
 from src.config.config import global_config
+from typing import Optional
+import asyncio
 import os
+import time
 
 INVALID_ENTITY = [
     "",
@@ -30,15 +33,62 @@ DATA_PATH = os.path.join(ROOT_PATH, "data")
 qa_manager = None
 inspire_manager = None
 
+# 后台加载任务（由start_lpmm_in_background创建）
+_lpmm_start_up_task: Optional[asyncio.Task] = None
+
 
 def get_qa_manager():
     return qa_manager
 
 
+def is_lpmm_warming_up() -> bool:
+    """LPMM知识库是否仍在后台加载中"""
+    return _lpmm_start_up_task is not None and not _lpmm_start_up_task.done()
+
+
+def start_lpmm_in_background() -> None:
+    """在后台线程中加载LPMM知识库，不阻塞其他组件的初始化（需在事件循环中调用）"""
+    global _lpmm_start_up_task
+    if not global_config.lpmm_knowledge.enable:
+        logger.info("LPMM知识库已禁用，跳过初始化")
+        return
+    _lpmm_start_up_task = asyncio.create_task(asyncio.to_thread(lpmm_start_up))
+    _lpmm_start_up_task.add_done_callback(_on_lpmm_start_up_done)
+
+
+def _on_lpmm_start_up_done(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"LPMM知识库后台加载失败: {task.exception()}")
+
+
+async def wait_for_qa_manager(timeout: Optional[float] = None) -> Optional[QAManager]:
+    """
+    获取QAManager，知识库仍在后台加载时最多等待timeout秒
+    Args:
+        timeout: 最长等待时间（秒），默认使用配置中的lpmm_knowledge.warm_up_wait_timeout
+    Returns:
+        QAManager，未启用、加载失败或等待超时时返回None（可用is_lpmm_warming_up区分是否仍在加载）
+    """
+    task = _lpmm_start_up_task
+    if task is not None and not task.done():
+        if timeout is None:
+            timeout = global_config.lpmm_knowledge.warm_up_wait_timeout
+        try:
+            # shield：等待超时不应取消加载任务本身
+            await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        except Exception:
+            pass
+    return qa_manager
+
+
 def lpmm_start_up():  # sourcery skip: extract-duplicate-method
     # 检查LPMM知识库是否启用
     if global_config.lpmm_knowledge.enable:
         logger.info("正在初始化Mai-LPMM")
+        start_time = phase_start = time.perf_counter()
+        phase_times = {}  # 各阶段耗时
         logger.info("创建LLM客户端")
 
         # 初始化Embedding库
@@ -50,6 +100,12 @@ def lpmm_start_up():  # sourcery skip: extract-duplicate-method
             logger.warning(f"此消息不会影响正常使用：从文件加载Embedding库时，{e}")
             # logger.warning("如果你是第一次导入知识，或者还未导入知识，请忽略此错误")
         logger.info("Embedding库加载完成")
+        if embed_manager.stored_pg_hashes:
+            # 模型配置未变化时直接跳过，否则在后台校验，不阻塞启动
+            embed_manager.start_embedding_model_consistency_check()
+        phase_times["Embedding库"] = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
+
         # 初始化KG
         kg_manager = KGManager()
         logger.info("正在从文件加载KG")
@@ -59,9 +115,11 @@ def lpmm_start_up():  # sourcery skip: extract-duplicate-method
             logger.warning(f"此消息不会影响正常使用：从文件加载KG时，{e}")
             # logger.warning("如果你是第一次导入知识，或者还未导入知识，请忽略此错误")
         logger.info("KG加载完成")
+        phase_times["KG"] = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
 
-        logger.info(f"KG节点数量：{len(kg_manager.graph.get_node_list())}")
-        logger.info(f"KG边数量：{len(kg_manager.graph.get_edge_list())}")
+        logger.info(f"KG节点数量：{kg_manager.node_count}")
+        logger.info(f"KG边数量：{kg_manager.edge_count}")
 
         # 数据比对：Embedding库与KG的段落hash集合
         for pg_hash in kg_manager.stored_paragraph_hashes:
@@ -69,12 +127,21 @@ def lpmm_start_up():  # sourcery skip: extract-duplicate-method
             key = f"paragraph-{pg_hash}"
             if key not in embed_manager.stored_pg_hashes:
                 logger.warning(f"KG中存在Embedding库中不存在的段落：{key}")
+        phase_times["数据比对"] = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
+
         global qa_manager
         # 问答系统（用于知识库）
         qa_manager = QAManager(
             embed_manager,
             kg_manager,
         )
+        phase_times["问答系统"] = time.perf_counter() - phase_start
+        logger.info(
+            f"LPMM知识库初始化完成，总耗时{time.perf_counter() - start_time:.2f}s（"
+            + "，".join(f"{phase} {seconds:.2f}s" for phase, seconds in phase_times.items())
+            + "）"
+        )
 
         # # 记忆激活（用于记忆库）
         # global inspire_manager
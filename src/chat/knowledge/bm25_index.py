@@ -0,0 +1,185 @@
+"""
+段落的BM25关键词检索
+
+以jieba分词构建倒排索引，弥补向量检索对专有名词、黑话、数字等精确词匹配的不足。
+每个段落的词频以JSON行追加写入文件，加载时重建倒排表；导入中断时不完整的末行会被忽略。
+"""
+
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import jieba
+import numpy as np
+
+from .global_logger import logger
+
+BM25_K1 = 1.5  # 词频饱和参数
+BM25_B = 0.75  # 文档长度归一化参数
+
+_WORD_PATTERN = re.compile(r"\w")
+
+
+def tokenize(text: str) -> List[str]:
+    """搜索引擎模式分词，去除纯标点/空白词元，英文统一小写"""
+    return [token for token in jieba.lcut_for_search(text.lower()) if _WORD_PATTERN.search(token)]
+
+
+class BM25Index:
+    def __init__(self, file_path: str):
+        """
+        Args:
+            file_path: 词频文件路径（JSON行，每行为一个段落的hash与词频）
+        """
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._loaded = False
+
+        self._doc_hashes: List[str] = []
+        self._doc_index: Dict[str, int] = {}
+        self._doc_lens: List[int] = []
+        self._total_len = 0
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        """词 -> (文档编号列表, 词频列表)"""
+        self._array_cache: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        """倒排表的numpy数组缓存，新增文档后清空"""
+        self._doc_lens_array = np.zeros(0, dtype=np.float64)
+        self._file_needs_newline = False
+        """文件末行不完整（导入中断），追加前需先换行"""
+
+    def __len__(self) -> int:
+        return len(self._doc_hashes)
+
+    def __contains__(self, item_hash: object) -> bool:
+        return item_hash in self._doc_index
+
+    def _add_doc(self, item_hash: str, term_freqs: Dict[str, int]) -> None:
+        """加入内存倒排表（调用方需持有锁）"""
+        doc_id = len(self._doc_hashes)
+        self._doc_hashes.append(item_hash)
+        self._doc_index[item_hash] = doc_id
+        doc_len = sum(term_freqs.values())
+        self._doc_lens.append(doc_len)
+        self._total_len += doc_len
+        for term, freq in term_freqs.items():
+            doc_ids, freqs = self._postings.setdefault(term, ([], []))
+            doc_ids.append(doc_id)
+            freqs.append(freq)
+
+    def _ensure_loaded(self) -> None:
+        """首次使用时从文件加载（调用方需持有锁）"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.file_path):
+            return
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                self._file_needs_newline = not line.endswith("\n")
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"BM25词频文件{self.file_path}中存在不完整的行，已跳过")
+                    continue
+                if record["hash"] not in self._doc_index:
+                    self._add_doc(record["hash"], record["tf"])
+        self._array_cache.clear()
+        self._doc_lens_array = np.array(self._doc_lens, dtype=np.float64)
+        logger.info(f"BM25索引已加载：{len(self._doc_hashes)}个段落，{len(self._postings)}个词")
+
+    def load(self) -> None:
+        with self._lock:
+            self._ensure_loaded()
+
+    def add_items(self, items: Dict[str, str]) -> int:
+        """
+        分词并加入索引（已存在的hash跳过），同时追加写入词频文件
+        Args:
+            items: hash -> 段落原文
+        Returns:
+            新加入的段落数
+        """
+        with self._lock:
+            self._ensure_loaded()
+            records = []
+            for item_hash, text in items.items():
+                if item_hash in self._doc_index:
+                    continue
+                term_freqs = dict(Counter(tokenize(text)))
+                self._add_doc(item_hash, term_freqs)
+                records.append(json.dumps({"hash": item_hash, "tf": term_freqs}, ensure_ascii=False))
+            if not records:
+                return 0
+            self._array_cache.clear()
+            self._doc_lens_array = np.array(self._doc_lens, dtype=np.float64)
+
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+            with open(self.file_path, "a", encoding="utf-8") as f:
+                if self._file_needs_newline:
+                    f.write("\n")
+                    self._file_needs_newline = False
+                f.write("\n".join(records) + "\n")
+            return len(records)
+
+    def sync_with_store(self, store) -> int:
+        """
+        将嵌入库中尚未建立索引的段落加入索引（首次启用或导入新段落后调用）
+        Args:
+            store: 段落EmbeddingStore
+        Returns:
+            新加入的段落数
+        """
+        with self._lock:
+            self._ensure_loaded()
+            missing = [item_hash for item_hash in store.store.ordered_hashes() if item_hash not in self._doc_index]
+        if not missing:
+            return 0
+        logger.info(f"正在为{len(missing)}个段落建立BM25索引")
+        return self.add_items({item_hash: store.store[item_hash].str for item_hash in missing})
+
+    def _term_arrays(self, term: str) -> Tuple[np.ndarray, np.ndarray] | None:
+        """取词的倒排表数组（调用方需持有锁）"""
+        if (cached := self._array_cache.get(term)) is not None:
+            return cached
+        posting = self._postings.get(term)
+        if posting is None:
+            return None
+        arrays = (np.array(posting[0], dtype=np.int64), np.array(posting[1], dtype=np.float64))
+        self._array_cache[term] = arrays
+        return arrays
+
+    def search(self, query: str, top_k: int) -> List[Tuple[str, float]]:
+        """
+        BM25检索
+        Args:
+            query: 查询文本
+            top_k: 返回的段落数
+        Returns:
+            按分数降序排列的(段落hash, BM25分数)列表
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            self._ensure_loaded()
+            num_docs = len(self._doc_hashes)
+            if not terms or num_docs == 0:
+                return []
+            avg_len = self._total_len / num_docs or 1.0
+            length_norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lens_array / avg_len)
+            scores = np.zeros(num_docs, dtype=np.float64)
+            for term in terms:
+                arrays = self._term_arrays(term)
+                if arrays is None:
+                    continue
+                doc_ids, freqs = arrays
+                idf = math.log(1 + (num_docs - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+                scores[doc_ids] += idf * freqs * (BM25_K1 + 1) / (freqs + length_norm[doc_ids])
+
+            matched = np.flatnonzero(scores)
+            if len(matched) > top_k:
+                matched = matched[np.argpartition(-scores[matched], top_k)[:top_k]]
+            matched = matched[np.argsort(-scores[matched], kind="stable")]
+            return [(self._doc_hashes[doc_id], float(scores[doc_id])) for doc_id in matched]
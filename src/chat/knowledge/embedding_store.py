@@ -3,8 +3,11 @@ import json
 import os
 import math
 import asyncio
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List, Tuple
+import bisect
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, Dict, Iterator, List, MutableMapping, Set, Tuple, TypeVar, Union
 
 import numpy as np
 import pandas as pd
@@ -13,6 +16,7 @@ import pandas as pd
 import faiss
 
 from .utils.hash import get_sha256
+from .bm25_index import BM25Index
 from .global_logger import logger
 from rich.traceback import install
 from rich.progress import (
@@ -25,18 +29,20 @@ from rich.progress import (
     SpinnerColumn,
     TextColumn,
 )
+from src.common.similarity import paired_cosine_similarity
 from src.config.config import global_config
 
 
 install(extra_lines=3)
 
-# 多线程embedding配置常量
-DEFAULT_MAX_WORKERS = 10  # 默认最大线程数
-DEFAULT_CHUNK_SIZE = 10  # 默认每个线程处理的数据块大小
-MIN_CHUNK_SIZE = 1  # 最小分块大小
-MAX_CHUNK_SIZE = 50  # 最大分块大小
-MIN_WORKERS = 1  # 最小线程数
-MAX_WORKERS = 20  # 最大线程数
+# 批量embedding配置常量
+DEFAULT_MAX_WORKERS = 10  # 默认最大并发请求数
+DEFAULT_CHUNK_SIZE = 10  # 默认每个请求的批大小
+MIN_CHUNK_SIZE = 1  # 最小批大小
+MAX_CHUNK_SIZE = 50  # 最大批大小
+MIN_WORKERS = 1  # 最小并发请求数
+MAX_WORKERS = 20  # 最大并发请求数
+CHECKPOINT_INTERVAL = 1000  # 导入时每获取这么多条嵌入落盘一次，中断后可从此处继续
 
 ROOT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
 EMBEDDING_DATA_DIR = os.path.join(ROOT_PATH, "data", "embedding")
@@ -61,24 +67,216 @@ EMBEDDING_TEST_STRINGS = [
     "test你妈喵",
 ]
 EMBEDDING_TEST_FILE = os.path.join(ROOT_PATH, "data", "embedding_model_test.json")
+EMBEDDING_CHECK_CACHE_FILE = os.path.join(ROOT_PATH, "data", "embedding_model_check.json")
+"""最近一次通过一致性校验时的模型配置，配置未变化时跳过校验"""
 EMBEDDING_SIM_THRESHOLD = 0.99
 
+# 近似索引配置常量
+ANN_MIN_VECTORS = 1000  # 向量数少于此值时近似索引没有意义，退回精确索引
+IVF_MIN_POINTS_PER_CENTROID = 39  # faiss建议每个聚类中心至少39个训练样本
+MAX_TRAIN_SAMPLES = 100000  # 训练近似索引使用的最大样本数
+COMPACT_SEGMENT_THRESHOLD = 8  # 追加段数量达到此值时触发后台压缩
 
-def cosine_similarity(a, b):
-    # 计算余弦相似度
-    dot = sum(x * y for x, y in zip(a, b, strict=False))
-    norm_a = math.sqrt(sum(x * x for x in a))
-    norm_b = math.sqrt(sum(x * x for x in b))
-    if norm_a == 0 or norm_b == 0:
-        return 0.0
-    return dot / (norm_a * norm_b)
+
+@dataclass
+class FaissIndexSpec:
+    """Faiss索引构建与检索参数"""
+
+    index_type: str = "flat"
+    """flat / ivf_flat / hnsw / ivf_pq"""
+    nlist: int = 0
+    """IVF聚类中心数，0为自动"""
+    nprobe: int = 16
+    """IVF检索时访问的聚类数"""
+    hnsw_m: int = 32
+    """HNSW邻居数"""
+    ef_search: int = 64
+    """HNSW检索候选队列长度"""
+    pq_m: int = 64
+    """PQ子量化器数量"""
+    pq_nbits: int = 8
+    """PQ编码位数"""
+    scalar_quantizer: str = "none"
+    """索引内向量的标量量化：none / fp16 / int8（ivf_pq本身已量化，不受此项影响）"""
+
+    @classmethod
+    def from_config(cls) -> "FaissIndexSpec":
+        """从lpmm_knowledge配置读取索引参数"""
+        lpmm_config = global_config.lpmm_knowledge
+        return cls(
+            index_type=lpmm_config.faiss_index_type,
+            nlist=lpmm_config.faiss_ivf_nlist,
+            nprobe=lpmm_config.faiss_ivf_nprobe,
+            hnsw_m=lpmm_config.faiss_hnsw_m,
+            ef_search=lpmm_config.faiss_hnsw_ef_search,
+            pq_m=lpmm_config.faiss_pq_m,
+            pq_nbits=lpmm_config.faiss_pq_nbits,
+            scalar_quantizer=lpmm_config.faiss_scalar_quantizer,
+        )
+
+    def resolve_index_type(self, dimension: int, num_vectors: int) -> str:
+        """根据数据规模确定实际使用的索引类型（数据过少或参数不合法时退回）"""
+        index_type = self.index_type
+        if index_type != "flat" and num_vectors < ANN_MIN_VECTORS:
+            return "flat"
+        if index_type == "ivf_pq" and (
+            dimension % self.pq_m != 0 or num_vectors < (1 << self.pq_nbits) * IVF_MIN_POINTS_PER_CENTROID
+        ):
+            logger.warning(f"IVF-PQ参数不适用(维度{dimension}, pq_m={self.pq_m}, 向量数{num_vectors})，改用ivf_flat")
+            return "ivf_flat"
+        return index_type
+
+    def resolve_nlist(self, num_vectors: int) -> int:
+        """确定IVF聚类中心数"""
+        nlist = self.nlist or int(4 * math.sqrt(num_vectors))
+        return max(1, min(nlist, num_vectors // IVF_MIN_POINTS_PER_CENTROID))
+
+    def resolve_scalar_quantizer(self, index_type: str) -> str:
+        """确定实际使用的标量量化方式"""
+        return "none" if index_type == "ivf_pq" else self.scalar_quantizer
+
+
+SCALAR_QUANTIZER_TYPES = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+"""标量量化方式 -> faiss量化类型"""
+
+
+def create_faiss_index(spec: FaissIndexSpec, dimension: int, num_vectors: int) -> faiss.Index:
+    """
+    创建（未训练的）Faiss索引，度量为内积（向量需L2归一化，即余弦相似度）
+    Args:
+        spec: 索引参数
+        dimension: 向量维度
+        num_vectors: 将加入索引的向量数（用于确定索引类型与聚类数）
+    Returns:
+        faiss.Index: 索引对象，IVF类索引需先train
+    """
+    index_type = spec.resolve_index_type(dimension, num_vectors)
+    qtype = SCALAR_QUANTIZER_TYPES.get(spec.resolve_scalar_quantizer(index_type))
+    metric = faiss.METRIC_INNER_PRODUCT
+    if index_type == "hnsw":
+        if qtype is None:
+            index = faiss.IndexHNSWFlat(dimension, spec.hnsw_m, metric)
+        else:
+            index = faiss.IndexHNSWSQ(dimension, qtype, spec.hnsw_m, metric)
+    elif index_type in ("ivf_flat", "ivf_pq"):
+        quantizer = faiss.IndexFlatIP(dimension)
+        nlist = spec.resolve_nlist(num_vectors)
+        if index_type == "ivf_pq":
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, spec.pq_m, spec.pq_nbits, metric)
+        elif qtype is None:
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, metric)
+        else:
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dimension, nlist, qtype, metric)
+    elif qtype is None:
+        index = faiss.IndexFlatIP(dimension)
+    else:
+        index = faiss.IndexScalarQuantizer(dimension, qtype, metric)
+    apply_faiss_search_params(index, spec)
+    return index
+
+
+def unwrap_faiss_index(index: faiss.Index) -> faiss.Index:
+    """取出IndexIDMap包装的实际索引"""
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def get_faiss_index_type(index: faiss.Index) -> str:
+    """获取索引对象对应的索引类型名"""
+    index = unwrap_faiss_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
+
+
+def get_faiss_scalar_quantizer(index: faiss.Index) -> str:
+    """获取索引使用的标量量化方式（none / fp16 / int8）"""
+    index = unwrap_faiss_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    if isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        for name, qtype in SCALAR_QUANTIZER_TYPES.items():
+            if index.sq.qtype == qtype:
+                return name
+    return "none"
+
+
+def get_embedding_storage_dtype() -> np.dtype:
+    """嵌入矩阵的存储精度（lpmm_knowledge.embedding_storage_dtype）"""
+    return np.dtype(global_config.lpmm_knowledge.embedding_storage_dtype)
+
+
+def apply_faiss_search_params(index: faiss.Index, spec: FaissIndexSpec) -> None:
+    """设置检索期参数（nprobe / efSearch），这些参数可随时调整而无需重建索引"""
+    index = unwrap_faiss_index(index)
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = max(1, min(spec.nprobe, index.nlist))
+    elif isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = spec.ef_search
+
+
+T = TypeVar("T")
+
+
+def run_coroutine_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """在同步代码中运行协程；当前线程已有运行中的事件循环时，改在独立线程的新事件循环中运行"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+def _embedding_model_check_key() -> Dict[str, Any]:
+    """
+    嵌入模型一致性校验的缓存键：提供商、模型标识符、向量维度，以及完整模型配置与测试文件的hash
+    任一项变化都需要重新校验
+    """
+    from src.config.config import model_config
+
+    models = []
+    for model_name in model_config.model_task_config.embedding.model_list:
+        model_info = model_config.get_model_info(model_name)
+        provider = model_config.get_provider(model_info.api_provider)
+        models.append(
+            {
+                "provider": provider.name,
+                "base_url": provider.base_url,
+                "client_type": provider.client_type,
+                "model_identifier": model_info.model_identifier,
+                "extra_params": model_info.extra_params,
+            }
+        )
+    test_file_mtime = os.stat(EMBEDDING_TEST_FILE).st_mtime_ns if os.path.exists(EMBEDDING_TEST_FILE) else 0
+    dimension = global_config.lpmm_knowledge.embedding_dimension
+    return {
+        "providers": [model["provider"] for model in models],
+        "model_identifiers": [model["model_identifier"] for model in models],
+        "dimension": dimension,
+        "config_hash": get_sha256(
+            json.dumps(
+                {"models": models, "dimension": dimension, "test_file_mtime": test_file_mtime},
+                sort_keys=True,
+                ensure_ascii=False,
+            )
+        ),
+    }
 
 
 @dataclass
 class EmbeddingStoreItem:
     """嵌入库中的项"""
 
-    def __init__(self, item_hash: str, embedding: List[float], content: str):
+    def __init__(self, item_hash: str, embedding: Union[List[float], np.ndarray], content: str):
         self.hash = item_hash
         self.embedding = embedding
         self.str = content
@@ -92,6 +290,221 @@ class EmbeddingStoreItem:
         }
 
 
+class EmbeddingItemMap(MutableMapping[str, EmbeddingStoreItem]):
+    """
+    列式存储的嵌入项映射（hash -> EmbeddingStoreItem）
+
+    已落盘的向量按追加顺序保存在若干连续的矩阵块中（基础文件与追加段，float32或float16，通常为np.load(mmap_mode="r")映射），
+    hash与原文保存在旁路表中；全局行号即Faiss索引中的稳定id。
+    EmbeddingStoreItem仅在访问时创建，其embedding为矩阵行的只读视图。
+    新写入的项先暂存在内存中，保存时作为新的追加段落盘。
+    """
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self._blocks: List[np.ndarray] = []
+        """已落盘向量矩阵块，按行号顺序排列"""
+        self._block_starts: List[int] = []
+        """各矩阵块的起始行号"""
+        self._hashes: List[str] = []
+        self._strs: List[str] = []
+        self._hash2row: Dict[str, int] = {}
+        self._pending: Dict[str, EmbeddingStoreItem] = {}
+        """尚未落盘的新项（按写入顺序）"""
+        self._persisted = False
+        """已落盘部分是否与磁盘文件一致（原地修改或删除后需要整体重写）"""
+
+    @property
+    def dirty(self) -> bool:
+        """是否存在未落盘的修改"""
+        return bool(self._pending) or not self._persisted
+
+    @property
+    def needs_full_rewrite(self) -> bool:
+        """已落盘部分是否被修改过，需要整体重写"""
+        return not self._persisted
+
+    @property
+    def persisted_count(self) -> int:
+        """已落盘（含追加段）的行数"""
+        return len(self._hashes)
+
+    @property
+    def pending_count(self) -> int:
+        """暂存的新项数"""
+        return len(self._pending)
+
+    def attach(self, matrix: np.ndarray, hashes: List[str], strs: List[str], persisted: bool = False) -> None:
+        """
+        以单个矩阵块挂载全部数据（会清空暂存的新项）
+        Args:
+            matrix: 向量矩阵（可为只读映射）
+            hashes: 与矩阵行对应的hash
+            strs: 与矩阵行对应的原文
+            persisted: 挂载的数据是否与磁盘文件一致
+        """
+        self._blocks = []
+        self._block_starts = []
+        self._hashes = []
+        self._strs = []
+        self._hash2row = {}
+        self._pending = {}
+        self.append_block(matrix, hashes, strs)
+        self._persisted = persisted
+
+    def append_block(self, matrix: np.ndarray, hashes: List[str], strs: List[str]) -> None:
+        """在末尾追加一个已落盘的矩阵块（追加段），新行号紧接现有行号"""
+        if len(matrix) != len(hashes) or len(hashes) != len(strs):
+            raise ValueError(f"嵌入矩阵行数({len(matrix)})与旁路表长度({len(hashes)}/{len(strs)})不一致")
+        start = len(self._hashes)
+        for offset, item_hash in enumerate(hashes):
+            self._hash2row[item_hash] = start + offset
+            self._pending.pop(item_hash, None)
+        self._blocks.append(matrix)
+        self._block_starts.append(start)
+        self._hashes.extend(hashes)
+        self._strs.extend(strs)
+
+    def replace_head(self, matrix: np.ndarray, num_rows: int) -> None:
+        """用一个新矩阵块（如压缩后的基础文件映射）替换前num_rows行所在的全部矩阵块"""
+        if num_rows != len(self._hashes) and num_rows not in self._block_starts:
+            raise ValueError(f"替换行数{num_rows}与矩阵块边界不一致")
+        keep = [idx for idx, start in enumerate(self._block_starts) if start >= num_rows]
+        self._blocks = [matrix] + [self._blocks[idx] for idx in keep]
+        self._block_starts = [0] + [self._block_starts[idx] for idx in keep]
+
+    def take_pending(self) -> Tuple[np.ndarray, List[str], List[str]]:
+        """取出暂存项的(矩阵, hash列表, 原文列表)，不清空暂存（由append_block在落盘后清除）"""
+        hashes = list(self._pending)
+        strs = [item.str for item in self._pending.values()]
+        matrix = np.asarray([item.embedding for item in self._pending.values()], dtype=np.float32).reshape(
+            -1, self.dimension
+        )
+        return matrix, hashes, strs
+
+    def _row_vector(self, row: int) -> np.ndarray:
+        block_idx = bisect.bisect_right(self._block_starts, row) - 1
+        return self._blocks[block_idx][row - self._block_starts[block_idx]]
+
+    def hash_at(self, row: int) -> str:
+        """按全局行号（即Faiss id）获取hash"""
+        if row < len(self._hashes):
+            return self._hashes[row]
+        return list(self._pending)[row - len(self._hashes)]
+
+    def __getitem__(self, item_hash: str) -> EmbeddingStoreItem:
+        if item_hash in self._pending:
+            return self._pending[item_hash]
+        row = self._hash2row[item_hash]
+        return EmbeddingStoreItem(item_hash, self._row_vector(row), self._strs[row])
+
+    def __setitem__(self, item_hash: str, item: EmbeddingStoreItem) -> None:
+        if item_hash in self._hash2row:
+            # 已落盘的项不可原地修改（矩阵可能为只读映射），合并为内存矩阵后再覆盖
+            self.materialize()
+            row = self._hash2row[item_hash]
+            self._blocks[0][row] = np.asarray(item.embedding, dtype=np.float32)
+            self._strs[row] = item.str
+            return
+        self._pending[item_hash] = item
+
+    def __delitem__(self, item_hash: str) -> None:
+        if item_hash in self._pending:
+            del self._pending[item_hash]
+            return
+        row = self._hash2row[item_hash]
+        keep = np.ones(len(self._hashes), dtype=bool)
+        keep[row] = False
+        pending = self._pending
+        self.attach(
+            np.ascontiguousarray(self.to_matrix(include_pending=False)[keep]),
+            [h for i, h in enumerate(self._hashes) if i != row],
+            [t for i, t in enumerate(self._strs) if i != row],
+        )
+        self._pending = pending
+
+    def __contains__(self, item_hash: object) -> bool:
+        return item_hash in self._hash2row or item_hash in self._pending
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._hashes
+        yield from list(self._pending)
+
+    def __len__(self) -> int:
+        return len(self._hashes) + len(self._pending)
+
+    def ordered_hashes(self) -> List[str]:
+        """按行号顺序（暂存项在后）返回所有hash"""
+        return self._hashes + list(self._pending)
+
+    def ordered_strs(self) -> List[str]:
+        """按行号顺序（暂存项在后）返回所有原文"""
+        return self._strs + [item.str for item in self._pending.values()]
+
+    def iter_embedding_blocks(
+        self, start_row: int = 0, block_size: int = 65536, include_pending: bool = True
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        按行号顺序分块产出(起始行号, 向量块)（保持存储精度），用于构建索引而不必整体复制矩阵
+        Args:
+            start_row: 从该行号开始
+            block_size: 每块最大行数
+            include_pending: 是否包含暂存项（位于已落盘行之后）
+        """
+        for block_start, block in zip(self._block_starts, self._blocks, strict=True):
+            block_end = block_start + len(block)
+            for start in range(max(start_row, block_start), block_end, block_size):
+                yield start, block[start - block_start : min(start + block_size, block_end) - block_start]
+        if include_pending and self._pending and start_row < len(self):
+            pending_matrix, _, _ = self.take_pending()
+            offset = max(0, start_row - len(self._hashes))
+            yield len(self._hashes) + offset, pending_matrix[offset:]
+
+    def gather_rows(self, rows: np.ndarray) -> np.ndarray:
+        """按（升序）行号取出向量，返回float32内存矩阵"""
+        parts = []
+        for block_start, block in self.iter_embedding_blocks():
+            block_rows = rows[(rows >= block_start) & (rows < block_start + len(block))]
+            if len(block_rows):
+                parts.append(np.asarray(block[block_rows - block_start], dtype=np.float32))
+        if not parts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return np.concatenate(parts, axis=0)
+
+    def get_vectors(self, item_hashes: List[str]) -> np.ndarray:
+        """按给定hash顺序取出向量（float32内存矩阵，hash需存在且不重复）"""
+        matrix = np.empty((len(item_hashes), self.dimension), dtype=np.float32)
+        rows = []
+        positions = []
+        for position, item_hash in enumerate(item_hashes):
+            row = self._hash2row.get(item_hash)
+            if row is None:
+                matrix[position] = self._pending[item_hash].embedding
+            else:
+                rows.append(row)
+                positions.append(position)
+        if rows:
+            # 按行号顺序读取映射文件
+            order = np.argsort(rows)
+            matrix[np.asarray(positions)[order]] = self.gather_rows(np.asarray(rows)[order])
+        return matrix
+
+    def to_matrix(self, include_pending: bool = True) -> np.ndarray:
+        """合并为完整的内存矩阵（float32，按行号顺序）"""
+        blocks = [block for _, block in self.iter_embedding_blocks(include_pending=include_pending)]
+        if not blocks:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return np.ascontiguousarray(np.concatenate(blocks, axis=0), dtype=np.float32)
+
+    def dtypes(self) -> Set[np.dtype]:
+        """已落盘矩阵块的数据类型集合"""
+        return {block.dtype for block in self._blocks if len(block)}
+
+    def materialize(self) -> None:
+        """将全部数据合并为单个内存矩阵块（脱离文件映射，之后需要整体重写）"""
+        self.attach(self.to_matrix(), self.ordered_hashes(), self.ordered_strs())
+
+
 class EmbeddingStore:
     def __init__(
         self,
@@ -103,10 +516,18 @@ class EmbeddingStore:
         self.namespace = namespace
         self.dir = dir_path
         self.embedding_file_path = f"{dir_path}/{namespace}.parquet"
+        """旧版存储（每行含embedding列表的parquet），仅用于迁移"""
+        self.embedding_matrix_path = f"{dir_path}/{namespace}_embedding.npy"
+        """未经压缩的初始基础向量矩阵（N×D，float32或float16）"""
+        self.embedding_meta_path = f"{dir_path}/{namespace}_meta.parquet"
+        """初始基础旁路表：与矩阵行一一对应的hash与原文"""
         self.index_file_path = f"{dir_path}/{namespace}.index"
         self.idx2hash_file_path = dir_path + "/" + namespace + "_i2h.json"
+        """旧版idx2hash映射（JSON），现由旁路表的行号顺序代替，压缩时删除"""
+        self.manifest_file_path = f"{dir_path}/{namespace}_manifest.json"
+        """追加段清单"""
 
-        # 多线程配置参数验证和设置
+        # 并发配置参数验证和设置
         self.max_workers = max(MIN_WORKERS, min(MAX_WORKERS, max_workers))
         self.chunk_size = max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, chunk_size))
 
@@ -120,164 +541,103 @@ class EmbeddingStore:
                 f"chunk_size 已从 {chunk_size} 调整为 {self.chunk_size} (范围: {MIN_CHUNK_SIZE}-{MAX_CHUNK_SIZE})"
             )
 
-        self.store = {}
+        self.store = EmbeddingItemMap(global_config.lpmm_knowledge.embedding_dimension)
 
         self.faiss_index = None
-        self.idx2hash = None
+        self._index_needs_save = False
+        """索引是否被重建过、需要写入文件（追加的向量不写索引文件，加载时从追加段补齐）"""
+        self._base = ""
+        """当前基础文件名称，空字符串表示初始基础文件（每次整体写入/压缩生成新名称，避免覆盖仍被映射的文件）"""
+        self._segments: List[str] = []
+        """已落盘的追加段名称（按顺序）"""
+        self._generation = 0
+        """整体写入次数，用于检测压缩期间是否发生了整体写入"""
+        self._lock = threading.RLock()
+        """保护落盘、索引更新与后台压缩"""
+        self._compaction_thread: threading.Thread | None = None
+        self.data_version = 0
+        """数据版本，库中内容变化时递增（用于使查询结果缓存失效）"""
 
     def _get_embedding(self, s: str) -> List[float]:
-        """获取字符串的嵌入向量，使用完全同步的方式避免事件循环问题"""
-        # 创建新的事件循环并在完成后立即关闭
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        try:
-            # 创建新的LLMRequest实例
-            from src.llm_models.utils_model import LLMRequest
-            from src.config.config import model_config
-
-            llm = LLMRequest(model_set=model_config.model_task_config.embedding, request_type="embedding")
-
-            # 使用新的事件循环运行异步方法
-            embedding, _ = loop.run_until_complete(llm.get_embedding(s))
-
-            if embedding and len(embedding) > 0:
-                return embedding
-            else:
-                logger.error(f"获取嵌入失败: {s}")
-                return []
+        """获取单个字符串的嵌入向量（失败时返回空列表）"""
+        return self._get_embeddings_batch([s])[0][1]
 
-        except Exception as e:
-            logger.error(f"获取嵌入时发生异常: {s}, 错误: {e}")
-            return []
-        finally:
-            # 确保事件循环被正确关闭
-            try:
-                loop.close()
-            except Exception:
-                pass
-
-    def _get_embeddings_batch_threaded(
-        self, strs: List[str], chunk_size: int = 10, max_workers: int = 10, progress_callback=None
+    def _get_embeddings_batch(
+        self,
+        strs: List[str],
+        progress_callback: Callable[[int], None] | None = None,
+        result_callback: Callable[[List[Tuple[str, List[float]]]], None] | None = None,
     ) -> List[Tuple[str, List[float]]]:
-        """使用多线程批量获取嵌入向量
+        """
+        批量获取嵌入向量（同步接口，在单个事件循环中运行异步流水线）
 
         Args:
             strs: 要获取嵌入的字符串列表
-            chunk_size: 每个线程处理的数据块大小
-            max_workers: 最大线程数
             progress_callback: 进度回调函数，接收一个参数表示完成的数量
+            result_callback: 每批完成后以该批的(字符串, 嵌入向量)列表调用，可用于边获取边入库
 
         Returns:
-            包含(原始字符串, 嵌入向量)的元组列表，保持与输入顺序一致
+            包含(原始字符串, 嵌入向量)的元组列表，保持与输入顺序一致，失败项的嵌入向量为空列表
         """
         if not strs:
             return []
+        return run_coroutine_sync(self._get_embeddings_async(strs, progress_callback, result_callback))
 
-        # 分块
-        chunks = []
-        for i in range(0, len(strs), chunk_size):
-            chunk = strs[i : i + chunk_size]
-            chunks.append((i, chunk))  # 保存起始索引以维持顺序
-
-        # 结果存储，使用字典按索引存储以保证顺序
-        results = {}
-
-        def process_chunk(chunk_data):
-            """处理单个数据块的函数"""
-            start_idx, chunk_strs = chunk_data
-            chunk_results = []
+    async def _get_embeddings_async(
+        self,
+        strs: List[str],
+        progress_callback: Callable[[int], None] | None = None,
+        result_callback: Callable[[List[Tuple[str, List[float]]]], None] | None = None,
+    ) -> List[Tuple[str, List[float]]]:
+        """
+        异步嵌入流水线：按chunk_size分批（每批一次请求），以max_workers限制并发请求数
+        批量请求失败时（如服务商不支持批量输入）退回逐条请求
+        """
+        from src.llm_models.utils_model import LLMRequest
+        from src.config.config import model_config
 
-            # 为每个线程创建独立的LLMRequest实例
-            from src.llm_models.utils_model import LLMRequest
-            from src.config.config import model_config
+        llm = LLMRequest(model_set=model_config.model_task_config.embedding, request_type="embedding")
+        semaphore = asyncio.Semaphore(self.max_workers)
+        results: List[List[float]] = [[] for _ in strs]
 
+        async def embed_one(s: str) -> List[float]:
             try:
-                # 创建线程专用的LLM实例
-                llm = LLMRequest(model_set=model_config.model_task_config.embedding, request_type="embedding")
-
-                for i, s in enumerate(chunk_strs):
-                    try:
-                        # 在线程中创建独立的事件循环
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        try:
-                            embedding = loop.run_until_complete(llm.get_embedding(s))
-                        finally:
-                            loop.close()
-
-                        if embedding and len(embedding) > 0:
-                            chunk_results.append((start_idx + i, s, embedding[0]))  # embedding[0] 是实际的向量
-                        else:
-                            logger.error(f"获取嵌入失败: {s}")
-                            chunk_results.append((start_idx + i, s, []))
-
-                        # 每完成一个嵌入立即更新进度
-                        if progress_callback:
-                            progress_callback(1)
-
-                    except Exception as e:
-                        logger.error(f"获取嵌入时发生异常: {s}, 错误: {e}")
-                        chunk_results.append((start_idx + i, s, []))
-
-                        # 即使失败也要更新进度
-                        if progress_callback:
-                            progress_callback(1)
-
+                embedding, _ = await llm.get_embedding(s)
+                return embedding
             except Exception as e:
-                logger.error(f"创建LLM实例失败: {e}")
-                # 如果创建LLM实例失败，返回空结果
-                for i, s in enumerate(chunk_strs):
-                    chunk_results.append((start_idx + i, s, []))
-                    # 即使失败也要更新进度
-                    if progress_callback:
-                        progress_callback(1)
-
-            return chunk_results
-
-        # 使用线程池处理
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交所有任务
-            future_to_chunk = {executor.submit(process_chunk, chunk): chunk for chunk in chunks}
-
-            # 收集结果（进度已在process_chunk中实时更新）
-            for future in as_completed(future_to_chunk):
+                logger.error(f"获取嵌入时发生异常: {s}, 错误: {e}")
+                return []
+
+        async def embed_batch(start: int, batch: List[str]) -> None:
+            async with semaphore:
                 try:
-                    chunk_results = future.result()
-                    for idx, s, embedding in chunk_results:
-                        results[idx] = (s, embedding)
+                    embeddings, _ = await llm.get_embeddings(batch)
                 except Exception as e:
-                    chunk = future_to_chunk[future]
-                    logger.error(f"处理数据块时发生异常: {chunk}, 错误: {e}")
-                    # 为失败的块添加空结果
-                    start_idx, chunk_strs = chunk
-                    for i, s in enumerate(chunk_strs):
-                        results[start_idx + i] = (s, [])
-
-        # 按原始顺序返回结果
-        ordered_results = []
-        for i in range(len(strs)):
-            if i in results:
-                ordered_results.append(results[i])
-            else:
-                # 防止遗漏
-                ordered_results.append((strs[i], []))
-
-        return ordered_results
+                    logger.warning(f"批量获取嵌入失败，改为逐条获取: {e}")
+                    embeddings = [await embed_one(s) for s in batch]
+            results[start : start + len(batch)] = embeddings
+            if result_callback:
+                result_callback(list(zip(batch, embeddings, strict=True)))
+            if progress_callback:
+                progress_callback(len(batch))
+
+        await asyncio.gather(
+            *(
+                embed_batch(start, strs[start : start + self.chunk_size])
+                for start in range(0, len(strs), self.chunk_size)
+            )
+        )
+        return list(zip(strs, results, strict=True))
 
     def get_test_file_path(self):
         return EMBEDDING_TEST_FILE
 
     def save_embedding_test_vectors(self):
-        """保存测试字符串的嵌入到本地（使用多线程优化）"""
+        """保存测试字符串的嵌入到本地"""
         logger.info("开始保存测试字符串的嵌入向量...")
 
-        # 使用多线程批量获取测试字符串的嵌入
-        embedding_results = self._get_embeddings_batch_threaded(
-            EMBEDDING_TEST_STRINGS,
-            chunk_size=min(self.chunk_size, len(EMBEDDING_TEST_STRINGS)),
-            max_workers=min(self.max_workers, len(EMBEDDING_TEST_STRINGS)),
-        )
+        # 批量获取测试字符串的嵌入
+        embedding_results = self._get_embeddings_batch(EMBEDDING_TEST_STRINGS)
 
         # 构建测试向量字典
         test_vectors = {}
@@ -286,7 +646,7 @@ class EmbeddingStore:
                 test_vectors[str(idx)] = embedding
             else:
                 logger.error(f"获取测试字符串嵌入失败: {s}")
-                # 使用原始单线程方法作为后备
+                # 单独重试一次作为后备
                 test_vectors[str(idx)] = self._get_embedding(s)
 
         with open(self.get_test_file_path(), "w", encoding="utf-8") as f:
@@ -303,7 +663,26 @@ class EmbeddingStore:
             return json.load(f)
 
     def check_embedding_model_consistency(self):
-        """校验当前模型与本地嵌入模型是否一致（使用多线程优化）"""
+        """校验当前模型与本地嵌入模型是否一致（模型配置与上次通过校验时相同则直接跳过）"""
+        check_key = _embedding_model_check_key()
+        if os.path.exists(EMBEDDING_CHECK_CACHE_FILE):
+            try:
+                with open(EMBEDDING_CHECK_CACHE_FILE, "r", encoding="utf-8") as f:
+                    if json.load(f) == check_key:
+                        logger.debug("嵌入模型配置未变化，跳过一致性校验")
+                        return True
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"读取嵌入模型校验缓存失败，将重新校验: {e}")
+
+        if self._check_embedding_model_consistency():
+            # 保存测试向量会更新测试文件，需重新计算缓存键
+            with open(EMBEDDING_CHECK_CACHE_FILE, "w", encoding="utf-8") as f:
+                json.dump(_embedding_model_check_key(), f, ensure_ascii=False, indent=2)
+            return True
+        return False
+
+    def _check_embedding_model_consistency(self) -> bool:
+        """重新获取测试字符串的嵌入，与本地保存的测试向量比对"""
         local_vectors = self.load_embedding_test_vectors()
         if local_vectors is None:
             logger.warning("未检测到本地嵌入模型测试文件，将保存当前模型的测试嵌入。")
@@ -319,41 +698,50 @@ class EmbeddingStore:
 
         logger.info("开始检验嵌入模型一致性...")
 
-        # 使用多线程批量获取当前模型的嵌入
-        embedding_results = self._get_embeddings_batch_threaded(
-            EMBEDDING_TEST_STRINGS,
-            chunk_size=min(self.chunk_size, len(EMBEDDING_TEST_STRINGS)),
-            max_workers=min(self.max_workers, len(EMBEDDING_TEST_STRINGS)),
-        )
-
-        # 检查一致性
-        for idx, (s, new_emb) in enumerate(embedding_results):
-            local_emb = local_vectors.get(str(idx))
+        # 批量获取当前模型的嵌入
+        embedding_results = self._get_embeddings_batch(EMBEDDING_TEST_STRINGS)
+        for s, new_emb in embedding_results:
             if not new_emb:
                 logger.error(f"获取测试字符串嵌入失败: {s}")
                 return False
 
-            sim = cosine_similarity(local_emb, new_emb)
-            if sim < EMBEDDING_SIM_THRESHOLD:
-                logger.error(f"嵌入模型一致性校验失败，字符串: {s}, 相似度: {sim:.4f}")
-                return False
+        local_matrix = np.array(
+            [local_vectors[str(idx)] for idx in range(len(EMBEDDING_TEST_STRINGS))], dtype=np.float64
+        )
+        new_matrix = np.array([emb for _, emb in embedding_results], dtype=np.float64)
+        if local_matrix.shape != new_matrix.shape:
+            logger.error(
+                f"嵌入模型一致性校验失败，向量维度不一致: 本地{local_matrix.shape[1]}, 当前{new_matrix.shape[1]}"
+            )
+            return False
+
+        sims = paired_cosine_similarity(local_matrix, new_matrix)
+        failed = np.flatnonzero(sims < EMBEDDING_SIM_THRESHOLD)
+        if len(failed):
+            idx = failed[0]
+            logger.error(f"嵌入模型一致性校验失败，字符串: {EMBEDDING_TEST_STRINGS[idx]}, 相似度: {sims[idx]:.4f}")
+            return False
 
         logger.info("嵌入模型一致性校验通过。")
         return True
 
     def batch_insert_strs(self, strs: List[str], times: int) -> None:
-        """向库中存入字符串（使用多线程优化）"""
+        """
+        向库中存入字符串
+        已存在的字符串直接跳过；新获取的嵌入每满CHECKPOINT_INTERVAL条即作为追加段落盘，
+        导入中断后重新执行时，已落盘的部分会被跳过
+        """
         if not strs:
             return
 
         total = len(strs)
 
-        # 过滤已存在的字符串
-        new_strs = []
-        for s in strs:
-            item_hash = self.namespace + "-" + get_sha256(s)
-            if item_hash not in self.store:
-                new_strs.append(s)
+        # 过滤已存在的字符串（同时去除输入中的重复项）
+        new_strs = list(
+            {
+                item_hash: s for s in strs if (item_hash := self.namespace + "-" + get_sha256(s)) not in self.store
+            }.values()
+        )
 
         if not new_strs:
             logger.info(f"所有字符串已存在于{self.namespace}嵌入库中，跳过处理")
@@ -368,103 +756,262 @@ class EmbeddingStore:
             TaskProgressColumn(),
             MofNCompleteColumn(),
             "•",
+            TextColumn("{task.fields[rate]}"),
+            "•",
             TimeElapsedColumn(),
             "<",
             TimeRemainingColumn(),
             transient=False,
         ) as progress:
-            task = progress.add_task(f"存入嵌入库：({times}/{TOTAL_EMBEDDING_TIMES})", total=total)
+            task = progress.add_task(f"存入嵌入库：({times}/{TOTAL_EMBEDDING_TIMES})", total=total, rate="")
 
             # 首先更新已存在项的进度
-            already_processed = total - len(new_strs)
-            if already_processed > 0:
-                progress.update(task, advance=already_processed)
-
-            if new_strs:
-                # 使用实例配置的参数，智能调整分块和线程数
-                optimal_chunk_size = max(
-                    MIN_CHUNK_SIZE,
-                    min(
-                        self.chunk_size, len(new_strs) // self.max_workers if self.max_workers > 0 else self.chunk_size
-                    ),
-                )
-                optimal_max_workers = min(
-                    self.max_workers,
-                    max(MIN_WORKERS, len(new_strs) // optimal_chunk_size if optimal_chunk_size > 0 else 1),
-                )
-
-                logger.debug(f"使用多线程处理: chunk_size={optimal_chunk_size}, max_workers={optimal_max_workers}")
-
-                # 定义进度更新回调函数
-                def update_progress(count):
-                    progress.update(task, advance=count)
+            progress.update(task, advance=total - len(new_strs))
+
+            start_time = time.perf_counter()
+            embedded_count = 0
+            failed_count = 0
+            unsaved_count = 0
+
+            def update_progress(count: int) -> None:
+                nonlocal embedded_count
+                embedded_count += count
+                rate = embedded_count / max(time.perf_counter() - start_time, 1e-6)
+                progress.update(task, advance=count, rate=f"{rate:.1f}条/秒")
+
+            def store_results(batch_results: List[Tuple[str, List[float]]]) -> None:
+                nonlocal failed_count, unsaved_count
+                for s, embedding in batch_results:
+                    if not embedding:  # 只有成功获取到嵌入才存入
+                        failed_count += 1
+                        logger.warning(f"跳过存储失败的嵌入: {s[:50]}...")
+                        continue
+                    item_hash = self.namespace + "-" + get_sha256(s)
+                    self.store[item_hash] = EmbeddingStoreItem(item_hash, embedding, s)
+                    unsaved_count += 1
+                self.data_version += 1
+                if unsaved_count >= CHECKPOINT_INTERVAL:
+                    # 检查点：将已获取的嵌入作为追加段落盘
+                    self.save_to_file()
+                    unsaved_count = 0
+
+            self._get_embeddings_batch(new_strs, progress_callback=update_progress, result_callback=store_results)
+
+        time_cost = time.perf_counter() - start_time
+        logger.info(
+            f"{self.namespace}嵌入库获取嵌入完成：成功{len(new_strs) - failed_count}条，失败{failed_count}条，"
+            f"耗时{time_cost:.1f}秒，吞吐{len(new_strs) / max(time_cost, 1e-6):.1f}条/秒"
+        )
 
-                # 批量获取嵌入，并实时更新进度
-                embedding_results = self._get_embeddings_batch_threaded(
-                    new_strs,
-                    chunk_size=optimal_chunk_size,
-                    max_workers=optimal_max_workers,
-                    progress_callback=update_progress,
-                )
+    def _segment_paths(self, segment: str) -> Tuple[str, str]:
+        """基础文件或追加段的(向量矩阵路径, 旁路表路径)"""
+        if not segment:
+            return self.embedding_matrix_path, self.embedding_meta_path
+        return (
+            f"{self.dir}/{self.namespace}_{segment}_embedding.npy",
+            f"{self.dir}/{self.namespace}_{segment}_meta.parquet",
+        )
 
-                # 存入结果（不再需要在这里更新进度，因为已经在回调中更新了）
-                for s, embedding in embedding_results:
-                    item_hash = self.namespace + "-" + get_sha256(s)
-                    if embedding:  # 只有成功获取到嵌入才存入
-                        self.store[item_hash] = EmbeddingStoreItem(item_hash, embedding, s)
-                    else:
-                        logger.warning(f"跳过存储失败的嵌入: {s[:50]}...")
+    def _write_manifest(self) -> None:
+        tmp_path = self.manifest_file_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"base": self._base, "segments": self._segments}, f)
+        os.replace(tmp_path, self.manifest_file_path)
+
+    def _has_base_files(self) -> bool:
+        return all(os.path.exists(path) for path in self._segment_paths(self._base))
+
+    @staticmethod
+    def _write_columns(matrix_path: str, meta_path: str, matrix: np.ndarray, hashes: List[str], strs: List[str]):
+        """写入向量矩阵与旁路表（先写临时文件再替换）"""
+        tmp_matrix_path = matrix_path + ".tmp.npy"
+        tmp_meta_path = meta_path + ".tmp"
+        np.save(tmp_matrix_path, matrix)
+        pd.DataFrame({"hash": hashes, "str": strs}).to_parquet(tmp_meta_path, engine="pyarrow", index=False)
+        os.replace(tmp_matrix_path, matrix_path)
+        os.replace(tmp_meta_path, meta_path)
 
     def save_to_file(self) -> None:
-        """保存到文件"""
-        data = []
-        logger.info(f"正在保存{self.namespace}嵌入库到文件{self.embedding_file_path}")
-        for item in self.store.values():
-            data.append(item.to_dict())
-        data_frame = pd.DataFrame(data)
-
+        """
+        保存到文件
+        - 首次保存或已落盘数据被修改：整体写入新的基础文件
+        - 仅有新增项：写入一个新的追加段，不重写已有文件；追加段过多时在后台压缩
+        索引文件仅在重建后写入，追加的向量在加载时从追加段补入索引
+        """
         if not os.path.exists(self.dir):
             os.makedirs(self.dir, exist_ok=True)
-        if not os.path.exists(self.embedding_file_path):
-            open(self.embedding_file_path, "w").close()
 
-        data_frame.to_parquet(self.embedding_file_path, engine="pyarrow", index=False)
+        with self._lock:
+            if self.store.needs_full_rewrite or not self._has_base_files():
+                self._write_full()
+            elif self.store.pending_count:
+                self._append_segment()
+
+            if self._index_needs_save and self.faiss_index is not None:
+                logger.info(f"正在保存{self.namespace}嵌入库的FaissIndex到文件{self.index_file_path}")
+                self._write_index()
+                logger.info(f"{self.namespace}嵌入库的FaissIndex保存成功")
+
+        if len(self._segments) >= COMPACT_SEGMENT_THRESHOLD:
+            self.compact_in_background()
+
+    def _write_index(self) -> None:
+        """写入索引文件（调用方需持有锁）"""
+        tmp_index_path = self.index_file_path + ".tmp"
+        faiss.write_index(self.faiss_index, tmp_index_path)
+        os.replace(tmp_index_path, self.index_file_path)
+        self._index_needs_save = False
+
+    def _write_full(self) -> None:
+        """整体写入新的基础文件（合并所有追加段与暂存项），调用方需持有锁"""
+        new_base = f"base{time.time_ns()}"
+        matrix_path, meta_path = self._segment_paths(new_base)
+        logger.info(f"正在保存{self.namespace}嵌入库到文件{matrix_path}")
+        hashes = self.store.ordered_hashes()
+        strs = self.store.ordered_strs()
+        matrix = self.store.to_matrix().astype(get_embedding_storage_dtype(), copy=False)
+        self._write_columns(matrix_path, meta_path, matrix, hashes, strs)
+        del matrix
+        self.store.attach(np.load(matrix_path, mmap_mode="r"), hashes, strs, persisted=True)
+        old_files = [self._base] + self._segments
+        self._base, self._segments = new_base, []
+        self._write_manifest()
+        self._remove_segment_files(old_files)
+        self._generation += 1
+        if os.path.exists(self.idx2hash_file_path):
+            os.remove(self.idx2hash_file_path)
+        if self.faiss_index is not None:
+            self._index_needs_save = True
         logger.info(f"{self.namespace}嵌入库保存成功")
 
-        if self.faiss_index is not None and self.idx2hash is not None:
-            logger.info(f"正在保存{self.namespace}嵌入库的FaissIndex到文件{self.index_file_path}")
-            faiss.write_index(self.faiss_index, self.index_file_path)
-            logger.info(f"{self.namespace}嵌入库的FaissIndex保存成功")
-            logger.info(f"正在保存{self.namespace}嵌入库的idx2hash映射到文件{self.idx2hash_file_path}")
-            with open(self.idx2hash_file_path, "w", encoding="utf-8") as f:
-                f.write(json.dumps(self.idx2hash, ensure_ascii=False, indent=4))
-            logger.info(f"{self.namespace}嵌入库的idx2hash映射保存成功")
+    def _append_segment(self) -> None:
+        """将暂存项写入新的追加段，调用方需持有锁"""
+        segment = f"seg{time.time_ns()}"
+        matrix_path, meta_path = self._segment_paths(segment)
+        matrix, hashes, strs = self.store.take_pending()
+        matrix = matrix.astype(get_embedding_storage_dtype(), copy=False)
+        logger.info(f"正在向{self.namespace}嵌入库追加{len(hashes)}项（{segment}）")
+        self._write_columns(matrix_path, meta_path, matrix, hashes, strs)
+        self._segments.append(segment)
+        self._write_manifest()
+        self.store.append_block(np.load(matrix_path, mmap_mode="r"), hashes, strs)
+        logger.info(f"{self.namespace}嵌入库追加保存成功")
+
+    def _remove_segment_files(self, segments: List[str]) -> None:
+        for segment in segments:
+            for path in self._segment_paths(segment):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    # Windows下仍被映射的文件无法删除，不影响使用
+                    logger.warning(f"删除旧嵌入库文件{path}失败: {e}")
+
+    def compact(self) -> None:
+        """
+        压缩：将基础文件与当前所有追加段合并为新的基础文件，并写入索引文件
+        合并期间仍可检索与追加，完成后在锁内切换
+        """
+        with self._lock:
+            if not self._segments:
+                return
+            generation = self._generation
+            num_rows = self.store.persisted_count
+            segments = list(self._segments)
+            hashes = self.store.ordered_hashes()[:num_rows]
+            strs = self.store.ordered_strs()[:num_rows]
+            blocks = [block for _, block in self.store.iter_embedding_blocks(include_pending=False)]
+            if self.faiss_index is not None:
+                # 索引中已包含追加段的向量，写入后下次加载无需再补
+                self._write_index()
+
+        new_base = f"base{time.time_ns()}"
+        matrix_path, meta_path = self._segment_paths(new_base)
+        logger.info(f"正在后台压缩{self.namespace}嵌入库（{len(segments)}个追加段，共{num_rows}项）")
+        matrix = np.concatenate(blocks, axis=0).astype(get_embedding_storage_dtype(), copy=False)
+        del blocks
+        self._write_columns(matrix_path, meta_path, matrix, hashes, strs)
+        del matrix
+
+        with self._lock:
+            if generation != self._generation:
+                # 压缩期间发生了整体写入，本次压缩结果作废
+                self._remove_segment_files([new_base])
+                return
+            self.store.replace_head(np.load(matrix_path, mmap_mode="r"), num_rows)
+            old_files = [self._base] + segments
+            self._base = new_base
+            self._segments = [segment for segment in self._segments if segment not in segments]
+            self._write_manifest()
+        self._remove_segment_files(old_files)
+        if os.path.exists(self.idx2hash_file_path):
+            os.remove(self.idx2hash_file_path)
+        logger.info(f"{self.namespace}嵌入库压缩完成")
+
+    def compact_in_background(self) -> None:
+        """在后台线程中压缩（非守护线程，进程退出前会等待压缩完成）"""
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+
+        def run_compaction():
+            try:
+                self.compact()
+            except Exception as e:
+                logger.error(f"压缩{self.namespace}嵌入库失败: {e}")
+
+        self._compaction_thread = threading.Thread(target=run_compaction, name=f"compact-{self.namespace}")
+        self._compaction_thread.start()
+
+    def _load_legacy_parquet(self) -> None:
+        """从旧版parquet（每行含embedding列表）加载，并转换为列式存储"""
+        logger.info(f"检测到旧版{self.namespace}嵌入库文件，正在转换为列式存储...")
+        data_frame = pd.read_parquet(self.embedding_file_path, engine="pyarrow")
+        if len(data_frame):
+            matrix = np.vstack(data_frame["embedding"].to_numpy()).astype(np.float32, copy=False)
+        else:
+            matrix = np.empty((0, self.store.dimension), dtype=np.float32)
+        self.store.attach(matrix, data_frame["hash"].tolist(), data_frame["str"].tolist())
+        self.save_to_file()
+        logger.info(f"{self.namespace}嵌入库已转换为列式存储，旧文件{self.embedding_file_path}可手动删除")
 
     def load_from_file(self) -> None:
         """从文件中加载"""
-        if not os.path.exists(self.embedding_file_path):
-            raise Exception(f"文件{self.embedding_file_path}不存在")
-        logger.info("正在加载嵌入库...")
-        logger.debug(f"正在从文件{self.embedding_file_path}中加载{self.namespace}嵌入库")
-        data_frame = pd.read_parquet(self.embedding_file_path, engine="pyarrow")
-        total = len(data_frame)
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TaskProgressColumn(),
-            MofNCompleteColumn(),
-            "•",
-            TimeElapsedColumn(),
-            "<",
-            TimeRemainingColumn(),
-            transient=False,
-        ) as progress:
-            task = progress.add_task("加载嵌入库", total=total)
-            for _, row in data_frame.iterrows():
-                self.store[row["hash"]] = EmbeddingStoreItem(row["hash"], row["embedding"], row["str"])
-                progress.update(task, advance=1)
-        logger.info(f"{self.namespace}嵌入库加载成功")
+        self.data_version += 1
+        self._base, self._segments = "", []
+        if os.path.exists(self.manifest_file_path):
+            with open(self.manifest_file_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            self._base = manifest.get("base", "")
+            self._segments = manifest.get("segments", [])
+
+        if not self._has_base_files():
+            if not os.path.exists(self.embedding_file_path):
+                raise Exception(f"文件{self._segment_paths(self._base)[0]}不存在")
+            self._load_legacy_parquet()
+        else:
+            logger.info("正在加载嵌入库...")
+            matrix_path, meta_path = self._segment_paths(self._base)
+            logger.debug(f"正在从文件{matrix_path}中加载{self.namespace}嵌入库")
+            # 向量矩阵以只读方式映射，按需由操作系统换页，不整体读入内存
+            meta = pd.read_parquet(meta_path, engine="pyarrow")
+            self.store.attach(
+                np.load(matrix_path, mmap_mode="r"), meta["hash"].tolist(), meta["str"].tolist(), persisted=True
+            )
+            for segment in self._segments:
+                matrix_path, meta_path = self._segment_paths(segment)
+                segment_meta = pd.read_parquet(meta_path, engine="pyarrow")
+                self.store.append_block(
+                    np.load(matrix_path, mmap_mode="r"), segment_meta["hash"].tolist(), segment_meta["str"].tolist()
+                )
+        logger.info(f"{self.namespace}嵌入库加载成功，共{len(self.store)}项（{len(self._segments)}个追加段）")
+
+        storage_dtype = get_embedding_storage_dtype()
+        if self.store.dtypes() - {storage_dtype}:
+            # 存储精度与配置不一致（如切换为float16），整体重写一次完成转换
+            logger.info(f"正在将{self.namespace}嵌入库的存储精度转换为{storage_dtype}...")
+            with self._lock:
+                self._write_full()
 
         try:
             if os.path.exists(self.index_file_path):
@@ -474,14 +1021,10 @@ class EmbeddingStore:
                 logger.info(f"{self.namespace}嵌入库的FaissIndex加载成功")
             else:
                 raise Exception(f"文件{self.index_file_path}不存在")
-            if os.path.exists(self.idx2hash_file_path):
-                logger.info(f"正在加载{self.namespace}嵌入库的idx2hash映射...")
-                logger.debug(f"正在从文件{self.idx2hash_file_path}中加载{self.namespace}嵌入库的idx2hash映射")
-                with open(self.idx2hash_file_path, "r") as f:
-                    self.idx2hash = json.load(f)
-                logger.info(f"{self.namespace}嵌入库的idx2hash映射加载成功")
-            else:
-                raise Exception(f"文件{self.idx2hash_file_path}不存在")
+            if self._is_faiss_index_outdated():
+                raise Exception("Faiss索引需要重建")
+            # 索引文件只覆盖到最近一次整体写入/压缩为止，其后追加段中的向量在此补入
+            self.update_faiss_index()
         except Exception as e:
             logger.error(f"加载{self.namespace}嵌入库的FaissIndex时发生错误：{e}")
             logger.warning("正在重建Faiss索引")
@@ -490,19 +1033,72 @@ class EmbeddingStore:
             self.save_to_file()
 
     def build_faiss_index(self) -> None:
-        """重新构建Faiss索引，以余弦相似度为度量"""
-        # 获取所有的embedding
-        array = []
-        self.idx2hash = dict()
-        for key in self.store:
-            array.append(self.store[key].embedding)
-            self.idx2hash[str(len(array) - 1)] = key
-        embeddings = np.array(array, dtype=np.float32)
-        # L2归一化
-        faiss.normalize_L2(embeddings)
-        # 构建索引
-        self.faiss_index = faiss.IndexFlatIP(global_config.lpmm_knowledge.embedding_dimension)
-        self.faiss_index.add(embeddings)
+        """重新构建Faiss索引，以余弦相似度为度量，索引类型由lpmm_knowledge.faiss_index_type决定，id为行号"""
+        with self._lock:
+            spec = FaissIndexSpec.from_config()
+            dimension = global_config.lpmm_knowledge.embedding_dimension
+            index = create_faiss_index(spec, dimension, len(self.store))
+            if not index.is_trained:
+                self._train_faiss_index(index)
+            self.faiss_index = faiss.IndexIDMap(index)
+            self._add_rows_to_index(0)
+            self._index_needs_save = True
+        logger.info(f"{self.namespace}嵌入库的Faiss索引构建完成，类型: {get_faiss_index_type(self.faiss_index)}")
+
+    def update_faiss_index(self) -> None:
+        """将尚未加入索引的新向量增量加入索引（索引不存在或与配置不一致时整体重建）"""
+        if self.faiss_index is None or self._is_faiss_index_outdated():
+            self.build_faiss_index()
+            return
+        with self._lock:
+            added = self._add_rows_to_index(self.faiss_index.ntotal)
+        if added:
+            logger.info(f"已向{self.namespace}嵌入库的Faiss索引增量加入{added}项")
+
+    def _add_rows_to_index(self, start_row: int) -> int:
+        """将start_row及之后的行（含暂存项）归一化后加入索引，返回加入的数量"""
+        added = 0
+        # 分块从（映射的）矩阵中复制、归一化后加入索引，避免整体复制
+        for block_start, block in self.store.iter_embedding_blocks(start_row=start_row):
+            embeddings = np.array(block, dtype=np.float32)
+            # L2归一化
+            faiss.normalize_L2(embeddings)
+            ids = np.arange(block_start, block_start + len(embeddings), dtype=np.int64)
+            if isinstance(self.faiss_index, faiss.IndexIDMap):
+                self.faiss_index.add_with_ids(embeddings, ids)
+            else:
+                # 旧版无id映射的索引，顺序加入时隐式id即为行号
+                self.faiss_index.add(embeddings)
+            added += len(embeddings)
+        return added
+
+    def _train_faiss_index(self, index: faiss.Index) -> None:
+        """使用库中已有向量的随机样本训练近似索引"""
+        num_samples = min(len(self.store), MAX_TRAIN_SAMPLES)
+        # 排序后的随机行号，对映射文件按顺序读取
+        rows = np.sort(np.random.default_rng(0).choice(len(self.store), size=num_samples, replace=False))
+        samples = self.store.gather_rows(rows)
+        faiss.normalize_L2(samples)
+        logger.info(f"正在使用{num_samples}条向量训练{self.namespace}嵌入库的近似索引...")
+        index.train(samples)
+
+    def _is_faiss_index_outdated(self) -> bool:
+        """已加载的索引是否与当前数据或索引配置不一致"""
+        spec = FaissIndexSpec.from_config()
+        dimension = global_config.lpmm_knowledge.embedding_dimension
+        expected_type = spec.resolve_index_type(dimension, len(self.store))
+        if self.faiss_index.ntotal > len(self.store):
+            logger.warning(f"{self.namespace}嵌入库的Faiss索引条目数多于嵌入库")
+            return True
+        if get_faiss_index_type(self.faiss_index) != expected_type:
+            logger.info(f"{self.namespace}嵌入库的Faiss索引类型与配置({expected_type})不一致")
+            return True
+        expected_quantizer = spec.resolve_scalar_quantizer(expected_type)
+        if get_faiss_scalar_quantizer(self.faiss_index) != expected_quantizer:
+            logger.info(f"{self.namespace}嵌入库的Faiss索引量化方式与配置({expected_quantizer})不一致")
+            return True
+        apply_faiss_search_params(self.faiss_index, spec)
+        return False
 
     def search_top_k(self, query: List[float], k: int) -> List[Tuple[str, float]]:
         """搜索最相似的k个项，以余弦相似度为度量
@@ -515,25 +1111,36 @@ class EmbeddingStore:
         if self.faiss_index is None:
             logger.debug("FaissIndex尚未构建,返回None")
             return []
-        if self.idx2hash is None:
-            logger.warning("idx2hash尚未构建,返回None")
-            return []
+        return self.search_top_k_batch(np.array([query], dtype=np.float32), k)[0]
+
+    def search_top_k_batch(self, queries: np.ndarray, k: int) -> List[List[Tuple[str, float]]]:
+        """批量搜索最相似的k个项（单次Faiss检索），以余弦相似度为度量
+        Args:
+            queries: 查询向量矩阵（N×D）
+            k: 每个查询返回的最相似的k个项
+        Returns:
+            result: 与查询顺序一致的(hash, 余弦相似度)列表
+        """
+        if self.faiss_index is None:
+            logger.debug("FaissIndex尚未构建,返回空结果")
+            return [[] for _ in range(len(queries))]
 
         # L2归一化
-        faiss.normalize_L2(np.array([query], dtype=np.float32))
+        query_vectors = np.array(queries, dtype=np.float32)
+        faiss.normalize_L2(query_vectors)
         # 搜索
-        distances, indices = self.faiss_index.search(np.array([query]), k)
-        # 整理结果
-        indices = list(indices.flatten())
-        distances = list(distances.flatten())
-        result = [
-            (self.idx2hash[str(int(idx))], float(sim))
-            for (idx, sim) in zip(indices, distances, strict=False)
-            if idx in range(len(self.idx2hash))
+        distances, indices = self.faiss_index.search(query_vectors, k)
+        # 整理结果（近似索引在候选不足时会返回-1），索引id即嵌入库行号
+        num_items = len(self.store)
+        return [
+            [
+                (self.store.hash_at(int(idx)), float(sim))
+                for idx, sim in zip(row_indices, row_distances, strict=True)
+                if 0 <= idx < num_items
+            ]
+            for row_indices, row_distances in zip(indices, distances, strict=True)
         ]
 
-        return result
-
 
 class EmbeddingManager:
     def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, chunk_size: int = DEFAULT_CHUNK_SIZE):
@@ -541,8 +1148,8 @@ class EmbeddingManager:
         初始化EmbeddingManager
 
         Args:
-            max_workers: 最大线程数
-            chunk_size: 每个线程处理的数据块大小
+            max_workers: 最大并发请求数
+            chunk_size: 每个请求的批大小
         """
         self.paragraphs_embedding_store = EmbeddingStore(
             "paragraph",  # type: ignore
@@ -562,10 +1169,47 @@ class EmbeddingManager:
             max_workers=max_workers,
             chunk_size=chunk_size,
         )
+        self.paragraph_bm25_index = BM25Index(f"{EMBEDDING_DATA_DIR_STR}/paragraph_bm25.jsonl")
+        """段落BM25索引（启用qa_bm25_enable时随段落嵌入库增量构建）"""
         self.stored_pg_hashes = set()
+        self._consistency_check: Future | None = None
+        """后台进行中（或已完成）的嵌入模型一致性校验"""
+
+    def start_embedding_model_consistency_check(self) -> None:
+        """在后台线程中进行嵌入模型一致性校验（配置未变化时几乎立即完成），结果由check_all_embedding_model_consistency取用"""
+        if self._consistency_check is not None:
+            return
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-consistency")
+        self._consistency_check = executor.submit(self.paragraphs_embedding_store.check_embedding_model_consistency)
+        self._consistency_check.add_done_callback(self._log_consistency_check_result)
+        executor.shutdown(wait=False)
+
+    @staticmethod
+    def _log_consistency_check_result(future: Future) -> None:
+        if (exc := future.exception()) is not None:
+            logger.error(f"嵌入模型一致性校验出错: {exc}")
+        elif not future.result():
+            logger.error("嵌入模型与本地存储不一致，知识库检索结果可能不准确，请检查模型设置或清空嵌入库后重新导入")
+
+    @property
+    def data_version(self) -> Tuple[int, int, int]:
+        """各嵌入库的数据版本，任一库内容变化时改变"""
+        return (
+            self.paragraphs_embedding_store.data_version,
+            self.entities_embedding_store.data_version,
+            self.relation_embedding_store.data_version,
+        )
 
     def check_all_embedding_model_consistency(self):
-        """对所有嵌入库做模型一致性校验"""
+        """对所有嵌入库做模型一致性校验（若已在后台启动校验则等待其结果）"""
+        if self._consistency_check is not None:
+            try:
+                if self._consistency_check.result():
+                    return True
+            except Exception:
+                pass
+            # 校验失败或出错时允许重新校验（如用户修正模型配置后再次导入）
+            self._consistency_check = None
         return self.paragraphs_embedding_store.check_embedding_model_consistency()
 
     def _store_pg_into_embedding(self, raw_paragraphs: Dict[str, str]):
@@ -596,6 +1240,9 @@ class EmbeddingManager:
         self.relation_embedding_store.load_from_file()
         # 从段落库中获取已存储的hash
         self.stored_pg_hashes = set(self.paragraphs_embedding_store.store.keys())
+        if global_config.lpmm_knowledge.qa_bm25_enable:
+            # 补齐尚未建立BM25索引的段落（首次启用时为全部段落）
+            self.paragraph_bm25_index.sync_with_store(self.paragraphs_embedding_store)
 
     def store_new_data_set(
         self,
@@ -606,9 +1253,14 @@ class EmbeddingManager:
             raise Exception("嵌入模型与本地存储不一致，请检查模型设置或清空嵌入库后重试。")
         """存储新的数据集"""
         self._store_pg_into_embedding(raw_paragraphs)
+        if global_config.lpmm_knowledge.qa_bm25_enable:
+            self.paragraph_bm25_index.sync_with_store(self.paragraphs_embedding_store)
         self._store_ent_into_embedding(triple_list_data)
         self._store_rel_into_embedding(triple_list_data)
-        self.stored_pg_hashes.update(raw_paragraphs.keys())
+        # 与load_from_file一致，记录带命名空间的段落hash（namespace-hash）
+        self.stored_pg_hashes.update(
+            f"{self.paragraphs_embedding_store.namespace}-{pg_hash}" for pg_hash in raw_paragraphs
+        )
 
     def save_to_file(self):
         """保存到文件"""
@@ -616,8 +1268,14 @@ class EmbeddingManager:
         self.entities_embedding_store.save_to_file()
         self.relation_embedding_store.save_to_file()
 
+    def update_faiss_index(self):
+        """将新数据增量加入Faiss索引（请在添加新数据后调用）"""
+        self.paragraphs_embedding_store.update_faiss_index()
+        self.entities_embedding_store.update_faiss_index()
+        self.relation_embedding_store.update_faiss_index()
+
     def rebuild_faiss_index(self):
-        """重建Faiss索引（请在添加新数据后调用）"""
+        """整体重建Faiss索引"""
         self.paragraphs_embedding_store.build_faiss_index()
         self.entities_embedding_store.build_faiss_index()
         self.relation_embedding_store.build_faiss_index()
@@ -0,0 +1,323 @@
+"""
+异步OpenIE信息提取流水线
+
+- 实体提取与RDF三元组提取两个阶段以队列衔接：段落完成实体提取后立即进入RDF阶段，两阶段同时进行
+- 使用相同API提供商的请求共享一个信号量，限制对每个提供商的并发请求数
+- 每个段落的状态与中间结果记录在SQLite检查点中，中断后重新执行时跳过已完成的段落，
+  已完成实体提取的段落直接从RDF阶段继续
+- 提取完成的段落逐行追加写入JSONL输出文件，不在内存中汇总
+"""
+
+import asyncio
+import functools
+import json
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from rich.progress import (
+    BarColumn,
+    MofNCompleteColumn,
+    Progress,
+    SpinnerColumn,
+    TaskProgressColumn,
+    TextColumn,
+    TimeElapsedColumn,
+    TimeRemainingColumn,
+)
+
+from src.config.api_ada_configs import TaskConfig
+from src.config.config import model_config
+from src.llm_models.utils_model import LLMRequest
+
+from .global_logger import logger
+from .ie_process import entity_extract_async, rdf_triple_extract_async
+
+MAX_ATTEMPTS = 3  # 每个阶段的最大尝试次数
+RETRY_INTERVAL = 5  # 重试间隔（秒）
+
+STATUS_PENDING = "pending"
+STATUS_ENTITY_DONE = "entity_done"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+T = TypeVar("T")
+
+
+class ExtractionCheckpoint:
+    """基于SQLite的提取检查点：记录每个段落的状态与提取结果"""
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS paragraphs (
+                hash TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                entities TEXT,
+                triples TEXT,
+                error TEXT,
+                exported INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def load_states(self) -> Dict[str, Tuple[str, Optional[List[str]]]]:
+        """返回 hash -> (状态, 已提取的实体)"""
+        return {
+            row[0]: (row[1], json.loads(row[2]) if row[2] else None)
+            for row in self._conn.execute("SELECT hash, status, entities FROM paragraphs")
+        }
+
+    def _upsert(self, pg_hash: str, **fields: Any) -> None:
+        fields["updated_at"] = time.time()
+        columns = ", ".join(fields)
+        placeholders = ", ".join("?" for _ in fields)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in fields)
+        self._conn.execute(
+            f"INSERT INTO paragraphs (hash, {columns}) VALUES (?, {placeholders}) "
+            f"ON CONFLICT(hash) DO UPDATE SET {updates}",
+            (pg_hash, *fields.values()),
+        )
+        self._conn.commit()
+
+    def save_entities(self, pg_hash: str, entities: List[str]) -> None:
+        self._upsert(pg_hash, status=STATUS_ENTITY_DONE, entities=json.dumps(entities, ensure_ascii=False), error=None)
+
+    def save_result(self, pg_hash: str, entities: List[str], triples: List[List[str]]) -> None:
+        self._upsert(
+            pg_hash,
+            status=STATUS_DONE,
+            entities=json.dumps(entities, ensure_ascii=False),
+            triples=json.dumps(triples, ensure_ascii=False),
+            error=None,
+            exported=0,
+        )
+
+    def mark_failed(self, pg_hash: str, error: str) -> None:
+        self._upsert(pg_hash, status=STATUS_FAILED, error=error)
+
+    def mark_exported(self, pg_hash: str) -> None:
+        self._conn.execute("UPDATE paragraphs SET exported = 1 WHERE hash = ?", (pg_hash,))
+        self._conn.commit()
+
+    def iter_unexported(self) -> Iterator[Tuple[str, List[str], List[List[str]]]]:
+        """已完成但尚未写入输出文件的段落（上次运行在写出前中断）"""
+        rows = self._conn.execute(
+            "SELECT hash, entities, triples FROM paragraphs WHERE status = ? AND exported = 0", (STATUS_DONE,)
+        ).fetchall()
+        for pg_hash, entities, triples in rows:
+            yield pg_hash, json.loads(entities), json.loads(triples)
+
+
+@dataclass
+class ExtractionStats:
+    total: int = 0
+    skipped: int = 0
+    """此前已完成、本次跳过的段落数"""
+    succeeded: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+
+def _provider_key(task_config: TaskConfig) -> Tuple[str, ...]:
+    """任务模型列表所使用的API提供商（作为并发限制的分组键）"""
+    return tuple(sorted({model_config.get_model_info(model).api_provider for model in task_config.model_list}))
+
+
+class OpenIEExtractionPipeline:
+    def __init__(
+        self,
+        checkpoint: ExtractionCheckpoint,
+        output_path: str,
+        workers_per_provider: int,
+    ):
+        """
+        Args:
+            checkpoint: 提取检查点
+            output_path: JSONL输出文件路径（每行一个段落的提取结果）
+            workers_per_provider: 每个API提供商的最大并发请求数
+        """
+        self.checkpoint = checkpoint
+        self.output_path = output_path
+        self.workers = max(1, workers_per_provider)
+
+        ner_task = model_config.model_task_config.lpmm_entity_extract
+        rdf_task = model_config.model_task_config.lpmm_rdf_build
+        self.ner_llm = LLMRequest(model_set=ner_task, request_type="lpmm.entity_extract")
+        self.rdf_llm = LLMRequest(model_set=rdf_task, request_type="lpmm.rdf_build")
+        # 两个阶段使用相同的提供商时共享同一个信号量
+        semaphores: Dict[Tuple[str, ...], asyncio.Semaphore] = {}
+        self.ner_semaphore = semaphores.setdefault(_provider_key(ner_task), asyncio.Semaphore(self.workers))
+        self.rdf_semaphore = semaphores.setdefault(_provider_key(rdf_task), asyncio.Semaphore(self.workers))
+
+        self._output_file = None
+
+    def _write_doc(self, pg_hash: str, passage: str, entities: List[str], triples: List[List[str]]) -> None:
+        """追加写入一行提取结果，写入后标记为已导出"""
+        if self._output_file is None:
+            os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
+            self._output_file = open(self.output_path, "a", encoding="utf-8")
+        doc_item = {
+            "idx": pg_hash,
+            "passage": passage,
+            "extracted_entities": entities,
+            "extracted_triples": triples,
+        }
+        self._output_file.write(json.dumps(doc_item, ensure_ascii=False) + "\n")
+        self._output_file.flush()
+        self.checkpoint.mark_exported(pg_hash)
+
+    @staticmethod
+    async def _with_retry(
+        semaphore: asyncio.Semaphore, stage: str, request: Callable[[], Awaitable[T]]
+    ) -> Tuple[Optional[T], str]:
+        """在信号量内发送请求，失败时在信号量外等待后重试，返回(结果, 最后一次错误)"""
+        error = ""
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                async with semaphore:
+                    return await request(), ""
+            except Exception as e:
+                error = str(e)
+                logger.warning(f"{stage}失败（第{attempt}/{MAX_ATTEMPTS}次），错误信息：{e}")
+                if attempt < MAX_ATTEMPTS:
+                    await asyncio.sleep(RETRY_INTERVAL)
+        return None, error
+
+    async def run(self, paragraphs: Dict[str, str]) -> ExtractionStats:
+        """
+        对段落执行信息提取
+        Args:
+            paragraphs: 段落hash -> 段落原文
+        Returns:
+            提取统计
+        """
+        stats = ExtractionStats(total=len(paragraphs))
+        start_time = time.perf_counter()
+
+        # 补写上次运行已完成但未写出的结果
+        for pg_hash, entities, triples in self.checkpoint.iter_unexported():
+            if pg_hash in paragraphs:
+                self._write_doc(pg_hash, paragraphs[pg_hash], entities, triples)
+
+        states = self.checkpoint.load_states()
+        ner_todo: List[str] = []
+        rdf_todo: List[Tuple[str, List[str]]] = []
+        for pg_hash in paragraphs:
+            status, entities = states.get(pg_hash, (STATUS_PENDING, None))
+            if status == STATUS_DONE:
+                stats.skipped += 1
+            elif status == STATUS_ENTITY_DONE and entities:
+                rdf_todo.append((pg_hash, entities))
+            else:
+                # 未处理或上次失败的段落重新提取
+                ner_todo.append(pg_hash)
+        logger.info(
+            f"共{stats.total}个段落：已完成{stats.skipped}个，待实体提取{len(ner_todo)}个，"
+            f"待RDF提取（已有实体）{len(rdf_todo)}个"
+        )
+
+        ner_queue: asyncio.Queue[str] = asyncio.Queue()
+        rdf_queue: asyncio.Queue[Tuple[str, List[str]]] = asyncio.Queue()
+        for pg_hash in ner_todo:
+            ner_queue.put_nowait(pg_hash)
+        for item in rdf_todo:
+            rdf_queue.put_nowait(item)
+
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TaskProgressColumn(),
+            MofNCompleteColumn(),
+            "•",
+            TextColumn("{task.fields[rate]}"),
+            "•",
+            TimeElapsedColumn(),
+            "<",
+            TimeRemainingColumn(),
+            transient=False,
+        ) as progress:
+            task = progress.add_task("正在进行提取：", total=stats.total, completed=stats.skipped, rate="")
+
+            def advance() -> None:
+                processed = stats.succeeded + stats.failed
+                rate = processed / max(time.perf_counter() - start_time, 1e-6) * 60
+                progress.update(task, advance=1, rate=f"{rate:.1f}段/分钟")
+
+            async def ner_worker() -> None:
+                while True:
+                    pg_hash = await ner_queue.get()
+                    try:
+                        passage = paragraphs[pg_hash]
+                        entities, error = await self._with_retry(
+                            self.ner_semaphore,
+                            "实体提取",
+                            functools.partial(entity_extract_async, self.ner_llm, passage),
+                        )
+                        if entities is None:
+                            self.checkpoint.mark_failed(pg_hash, f"实体提取失败：{error}")
+                            stats.failed += 1
+                            advance()
+                            logger.error(f"提取失败：{pg_hash}")
+                        else:
+                            self.checkpoint.save_entities(pg_hash, entities)
+                            rdf_queue.put_nowait((pg_hash, entities))
+                    finally:
+                        ner_queue.task_done()
+
+            async def rdf_worker() -> None:
+                while True:
+                    pg_hash, entities = await rdf_queue.get()
+                    try:
+                        passage = paragraphs[pg_hash]
+                        triples, error = await self._with_retry(
+                            self.rdf_semaphore,
+                            "RDF三元组提取",
+                            functools.partial(rdf_triple_extract_async, self.rdf_llm, passage, entities),
+                        )
+                        if triples is None:
+                            self.checkpoint.mark_failed(pg_hash, f"RDF三元组提取失败：{error}")
+                            stats.failed += 1
+                            logger.error(f"提取失败：{pg_hash}")
+                        else:
+                            self.checkpoint.save_result(pg_hash, entities, triples)
+                            self._write_doc(pg_hash, passage, entities, triples)
+                            stats.succeeded += 1
+                        advance()
+                    finally:
+                        rdf_queue.task_done()
+
+            workers = [asyncio.create_task(ner_worker()) for _ in range(self.workers)]
+            workers += [asyncio.create_task(rdf_worker()) for _ in range(self.workers)]
+            try:
+                # 实体提取全部完成后，RDF队列不会再有新段落加入
+                await ner_queue.join()
+                await rdf_queue.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                if self._output_file is not None:
+                    self._output_file.close()
+                    self._output_file = None
+
+        stats.elapsed = time.perf_counter() - start_time
+        processed = stats.succeeded + stats.failed
+        logger.info(
+            f"信息提取完成：成功{stats.succeeded}个，失败{stats.failed}个，跳过{stats.skipped}个，"
+            f"耗时{stats.elapsed:.1f}秒，吞吐{processed / max(stats.elapsed, 1e-6) * 60:.1f}段/分钟"
+        )
+        return stats
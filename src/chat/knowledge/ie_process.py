@@ -46,21 +46,8 @@ def _extract_json_from_text(text: str):
         return []
 
 
-def _entity_extract(llm_req: LLMRequest, paragraph: str) -> List[str]:
-    # sourcery skip: reintroduce-else, swap-if-else-branches, use-named-expression
-    """对段落进行实体提取，返回提取出的实体列表（JSON格式）"""
-    entity_extract_context = prompt_template.build_entity_extract_context(paragraph)
-
-    # 使用 asyncio.run 来运行异步方法
-    try:
-        # 如果当前已有事件循环在运行，使用它
-        loop = asyncio.get_running_loop()
-        future = asyncio.run_coroutine_threadsafe(llm_req.generate_response_async(entity_extract_context), loop)
-        response, _ = future.result()
-    except RuntimeError:
-        # 如果没有运行中的事件循环，直接使用 asyncio.run
-        response, _ = asyncio.run(llm_req.generate_response_async(entity_extract_context))
-
+def _parse_entity_extract_result(response: str) -> List[str]:
+    """解析实体提取的LLM响应，返回过滤后的实体列表（格式错误或为空时抛出ValueError）"""
     # 添加调试日志
     logger.debug(f"LLM返回的原始响应: {response}")
 
@@ -92,22 +79,32 @@ def _entity_extract(llm_req: LLMRequest, paragraph: str) -> List[str]:
     return entity_extract_result
 
 
-def _rdf_triple_extract(llm_req: LLMRequest, paragraph: str, entities: list) -> List[List[str]]:
+def _entity_extract(llm_req: LLMRequest, paragraph: str) -> List[str]:
+    # sourcery skip: reintroduce-else, swap-if-else-branches, use-named-expression
     """对段落进行实体提取，返回提取出的实体列表（JSON格式）"""
-    rdf_extract_context = prompt_template.build_rdf_triple_extract_context(
-        paragraph, entities=json.dumps(entities, ensure_ascii=False)
-    )
+    entity_extract_context = prompt_template.build_entity_extract_context(paragraph)
 
     # 使用 asyncio.run 来运行异步方法
     try:
         # 如果当前已有事件循环在运行，使用它
         loop = asyncio.get_running_loop()
-        future = asyncio.run_coroutine_threadsafe(llm_req.generate_response_async(rdf_extract_context), loop)
+        future = asyncio.run_coroutine_threadsafe(llm_req.generate_response_async(entity_extract_context), loop)
         response, _ = future.result()
     except RuntimeError:
         # 如果没有运行中的事件循环，直接使用 asyncio.run
-        response, _ = asyncio.run(llm_req.generate_response_async(rdf_extract_context))
+        response, _ = asyncio.run(llm_req.generate_response_async(entity_extract_context))
+
+    return _parse_entity_extract_result(response)
 
+
+async def entity_extract_async(llm_req: LLMRequest, paragraph: str) -> List[str]:
+    """异步实体提取（单次请求，失败时抛出异常，由调用方决定是否重试）"""
+    response, _ = await llm_req.generate_response_async(prompt_template.build_entity_extract_context(paragraph))
+    return _parse_entity_extract_result(response)
+
+
+def _parse_rdf_triple_extract_result(response: str) -> List[List[str]]:
+    """解析RDF三元组提取的LLM响应（格式错误时抛出ValueError）"""
     # 添加调试日志
     logger.debug(f"RDF LLM返回的原始响应: {response}")
 
@@ -139,6 +136,34 @@ def _rdf_triple_extract(llm_req: LLMRequest, paragraph: str, entities: list) ->
     return rdf_triple_result
 
 
+def _rdf_triple_extract(llm_req: LLMRequest, paragraph: str, entities: list) -> List[List[str]]:
+    """对段落进行实体提取，返回提取出的实体列表（JSON格式）"""
+    rdf_extract_context = prompt_template.build_rdf_triple_extract_context(
+        paragraph, entities=json.dumps(entities, ensure_ascii=False)
+    )
+
+    # 使用 asyncio.run 来运行异步方法
+    try:
+        # 如果当前已有事件循环在运行，使用它
+        loop = asyncio.get_running_loop()
+        future = asyncio.run_coroutine_threadsafe(llm_req.generate_response_async(rdf_extract_context), loop)
+        response, _ = future.result()
+    except RuntimeError:
+        # 如果没有运行中的事件循环，直接使用 asyncio.run
+        response, _ = asyncio.run(llm_req.generate_response_async(rdf_extract_context))
+
+    return _parse_rdf_triple_extract_result(response)
+
+
+async def rdf_triple_extract_async(llm_req: LLMRequest, paragraph: str, entities: list) -> List[List[str]]:
+    """异步RDF三元组提取（单次请求，失败时抛出异常，由调用方决定是否重试）"""
+    rdf_extract_context = prompt_template.build_rdf_triple_extract_context(
+        paragraph, entities=json.dumps(entities, ensure_ascii=False)
+    )
+    response, _ = await llm_req.generate_response_async(rdf_extract_context)
+    return _parse_rdf_triple_extract_result(response)
+
+
 def info_extract_from_str(
     llm_client_for_ner: LLMRequest, llm_client_for_rdf: LLMRequest, paragraph: str
 ) -> Union[tuple[None, None], tuple[list[str], list[list[str]]]]:
@@ -1,25 +1,17 @@
 import json
 import os
 import time
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
-from rich.progress import (
-    Progress,
-    BarColumn,
-    TimeElapsedColumn,
-    TimeRemainingColumn,
-    TaskProgressColumn,
-    MofNCompleteColumn,
-    SpinnerColumn,
-    TextColumn,
-)
-from quick_algo import di_graph, pagerank
+from quick_algo import di_graph
 
 
 from .utils.hash import get_sha256
 from .embedding_store import EmbeddingManager, EmbeddingStoreItem
+from .kg_snapshot import KGSnapshot, load_snapshot, write_snapshot
+from .ppr import PPREngine
 from src.config.config import global_config
 
 from .global_logger import logger
@@ -47,37 +39,116 @@ class KGManager:
         # 会被保存的字段
         # 存储段落的hash值，用于去重
         self.stored_paragraph_hashes = set()
-        # 实体出现次数
-        self.ent_appear_cnt = {}
-        # KG
-        self.graph = di_graph.DiGraph()
+        # 实体出现次数（从快照加载时按需构造）
+        self._ent_appear_cnt: Optional[Dict[str, float]] = {}
+        # KG（从快照加载时按需构造）
+        self._graph: Optional[di_graph.DiGraph] = di_graph.DiGraph()
+        # 已映射的KG快照（检索时直接读取，无需构造图对象）
+        self._snapshot: Optional[KGSnapshot] = None
+        # PPR计算引擎（缓存转移矩阵与检索结果，图变化后需invalidate）
+        self.ppr_engine = PPREngine()
+        # 数据版本，图变化时递增（用于使查询结果缓存失效）
+        self.data_version = 0
 
         # 持久化相关 - 使用延迟初始化的路径
         self.dir_path = get_kg_dir_str()
+        self.snapshot_pointer_path = self.dir_path + "/" + "rag-kg-snapshot" + ".json"
+        # 旧版存储格式（仅用于迁移）
         self.graph_data_path = self.dir_path + "/" + "rag-graph" + ".graphml"
         self.ent_cnt_data_path = self.dir_path + "/" + "rag-ent-cnt" + ".parquet"
         self.pg_hash_file_path = self.dir_path + "/" + "rag-pg-hash" + ".json"
 
+    @property
+    def graph(self) -> di_graph.DiGraph:
+        """KG图对象，从快照加载时首次访问才构造"""
+        if self._graph is None:
+            assert self._snapshot is not None
+            start = time.perf_counter()
+            self._graph = self._snapshot.to_graph()
+            logger.debug(f"已从KG快照构造图对象，耗时{time.perf_counter() - start:.2f}s")
+        return self._graph
+
+    @graph.setter
+    def graph(self, graph: di_graph.DiGraph):
+        self._graph = graph
+        self.ppr_engine.invalidate()
+        self.data_version += 1
+
+    @property
+    def ent_appear_cnt(self) -> Dict[str, float]:
+        """实体出现次数，从快照加载时首次访问才构造"""
+        if self._ent_appear_cnt is None:
+            assert self._snapshot is not None
+            self._ent_appear_cnt = self._snapshot.ent_appear_cnt()
+        return self._ent_appear_cnt
+
+    @ent_appear_cnt.setter
+    def ent_appear_cnt(self, ent_appear_cnt: Dict[str, float]):
+        self._ent_appear_cnt = ent_appear_cnt
+
+    def has_node(self, node_hash: str) -> bool:
+        """节点是否存在（未构造图对象时在快照中二分查找）"""
+        if self._graph is None:
+            return node_hash in self._snapshot
+        return node_hash in self._graph
+
+    def _get_ent_appear_cnt(self, ent_hash: str) -> float:
+        if self._ent_appear_cnt is None:
+            cnt = self._snapshot.ent_appear_cnt_of(ent_hash)
+            if cnt is None:
+                raise KeyError(ent_hash)
+            return cnt
+        return self._ent_appear_cnt[ent_hash]
+
+    @property
+    def node_count(self) -> int:
+        if self._graph is None:
+            return self._snapshot.node_count
+        return len(self._graph.get_node_list())
+
+    @property
+    def edge_count(self) -> int:
+        if self._graph is None:
+            return self._snapshot.edge_count
+        return len(self._graph.get_edge_list())
+
     def save_to_file(self):
-        """将KG数据保存到文件"""
+        """将KG数据保存为快照（写入新快照目录后原子切换）"""
         # 确保目录存在
         if not os.path.exists(self.dir_path):
             os.makedirs(self.dir_path, exist_ok=True)
 
-        # 保存KG
-        di_graph.save_to_file(self.graph, self.graph_data_path)
-
-        # 保存实体计数到文件
-        ent_cnt_df = pd.DataFrame([{"hash_key": k, "appear_cnt": v} for k, v in self.ent_appear_cnt.items()])
-        ent_cnt_df.to_parquet(self.ent_cnt_data_path, engine="pyarrow", index=False)
-
-        # 保存段落hash到文件
-        with open(self.pg_hash_file_path, "w", encoding="utf-8") as f:
-            data = {"stored_paragraph_hashes": list(self.stored_paragraph_hashes)}
-            f.write(json.dumps(data, ensure_ascii=False, indent=4))
+        start = time.perf_counter()
+        write_snapshot(
+            self.dir_path,
+            self.snapshot_pointer_path,
+            self.graph,
+            self.ent_appear_cnt,
+            self.stored_paragraph_hashes,
+        )
+        logger.info(f"KG快照已保存，耗时{time.perf_counter() - start:.2f}s")
 
     def load_from_file(self):
-        """从文件加载KG数据"""
+        """从文件加载KG数据（优先映射快照，否则从旧版文件加载并转换为快照）"""
+        start = time.perf_counter()
+        snapshot = load_snapshot(self.dir_path, self.snapshot_pointer_path)
+        if snapshot is not None:
+            self._snapshot = snapshot
+            self._graph = None
+            self._ent_appear_cnt = None
+            self.stored_paragraph_hashes = snapshot.paragraph_hashes()
+            # PPR直接使用快照中的CSR邻接表
+            self.ppr_engine.attach(snapshot.csr)
+            self.data_version += 1
+            logger.info(f"已映射KG快照，耗时{time.perf_counter() - start:.2f}s")
+            return
+
+        self._load_legacy_files()
+        logger.info(f"已从旧版文件加载KG，耗时{time.perf_counter() - start:.2f}s，正在转换为快照")
+        self.save_to_file()
+
+    def _load_legacy_files(self):
+        """从旧版文件（graphml + parquet + json）加载KG数据"""
         # 确保文件存在
         if not os.path.exists(self.pg_hash_file_path):
             raise FileNotFoundError(f"KG段落hash文件{self.pg_hash_file_path}不存在")
@@ -93,9 +164,10 @@ class KGManager:
 
         # 加载实体计数
         ent_cnt_df = pd.read_parquet(self.ent_cnt_data_path, engine="pyarrow")
-        self.ent_appear_cnt = dict({row["hash_key"]: row["appear_cnt"] for _, row in ent_cnt_df.iterrows()})
+        self.ent_appear_cnt = dict(zip(ent_cnt_df["hash_key"], ent_cnt_df["appear_cnt"], strict=True))
 
         # 加载KG
+        self._snapshot = None
         self.graph = di_graph.load_from_file(self.graph_data_path)
 
     def _build_edges_between_ent(
@@ -140,70 +212,52 @@ class KGManager:
         triple_list_data: Dict[str, List[List[str]]],
         embedding_manager: EmbeddingManager,
     ) -> int:
-        """同义词连接"""
+        """同义词连接（对所有新实体一次性批量检索）"""
         new_edge_cnt = 0
-        # 获取所有实体节点的hash值
-        ent_hash_list = set()
-        for triple_list in triple_list_data.values():
-            for triple in triple_list:
-                ent_hash_list.add("entity" + "-" + get_sha256(triple[0]))
-                ent_hash_list.add("entity" + "-" + get_sha256(triple[2]))
-        ent_hash_list = list(ent_hash_list)
+        entity_store = embedding_manager.entities_embedding_store
+        # 获取所有实体节点的hash值（保持首次出现顺序，仅保留嵌入库中存在的实体）
+        ent_hash_list = list(
+            dict.fromkeys(
+                "entity" + "-" + get_sha256(ent)
+                for triple_list in triple_list_data.values()
+                for triple in triple_list
+                for ent in (triple[0], triple[2])
+            )
+        )
+        ent_hash_list = [ent_hash for ent_hash in ent_hash_list if ent_hash in entity_store.store]
+        if not ent_hash_list:
+            return 0
+
+        # 查询相似实体：以新实体向量矩阵做单次Faiss检索
+        logger.info(f"正在为{len(ent_hash_list)}个实体批量检索相似实体")
+        all_similar_ents = entity_store.search_top_k_batch(
+            entity_store.store.get_vectors(ent_hash_list), global_config.lpmm_knowledge.rag_synonym_search_top_k
+        )
 
+        synonym_threshold = global_config.lpmm_knowledge.rag_synonym_threshold
         synonym_hash_set = set()
         synonym_result = {}
-
-        # rich 进度条
-        total = len(ent_hash_list)
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TaskProgressColumn(),
-            MofNCompleteColumn(),
-            "•",
-            TimeElapsedColumn(),
-            "<",
-            TimeRemainingColumn(),
-            transient=False,
-        ) as progress:
-            task = progress.add_task("同义词连接", total=total)
-            for ent_hash in ent_hash_list:
-                if ent_hash in synonym_hash_set:
-                    progress.update(task, advance=1)
+        for ent_hash, similar_ents in zip(ent_hash_list, all_similar_ents, strict=True):
+            if ent_hash in synonym_hash_set:
+                continue
+            res_ent = []  # Debug
+            for res_ent_hash, similarity in similar_ents:
+                if res_ent_hash == ent_hash:
+                    # 避免自连接
                     continue
-                ent = embedding_manager.entities_embedding_store.store.get(ent_hash)
-                if ent is None:
-                    progress.update(task, advance=1)
+                if similarity < synonym_threshold:
+                    # 相似度阈值
                     continue
-                assert isinstance(ent, EmbeddingStoreItem)
-                # 查询相似实体
-                similar_ents = embedding_manager.entities_embedding_store.search_top_k(
-                    ent.embedding, global_config.lpmm_knowledge.rag_synonym_search_top_k
-                )
-                res_ent = []  # Debug
-                for res_ent_hash, similarity in similar_ents:
-                    if res_ent_hash == ent_hash:
-                        # 避免自连接
-                        continue
-                    if similarity < global_config.lpmm_knowledge.rag_synonym_threshold:
-                        # 相似度阈值
-                        continue
-                    node_to_node[(res_ent_hash, ent_hash)] = similarity
-                    node_to_node[(ent_hash, res_ent_hash)] = similarity
-                    synonym_hash_set.add(res_ent_hash)
-                    new_edge_cnt += 1
-                    res_ent.append(
-                        (
-                            embedding_manager.entities_embedding_store.store[res_ent_hash].str,
-                            similarity,
-                        )
-                    )  # Debug
-                    synonym_result[ent.str] = res_ent
-                progress.update(task, advance=1)
+                node_to_node[(res_ent_hash, ent_hash)] = similarity
+                node_to_node[(ent_hash, res_ent_hash)] = similarity
+                synonym_hash_set.add(res_ent_hash)
+                new_edge_cnt += 1
+                res_ent.append((entity_store.store[res_ent_hash].str, similarity))  # Debug
+            if res_ent:
+                synonym_result[entity_store.store[ent_hash].str] = res_ent
 
         for k, v in synonym_result.items():
-            print(f'"{k}"的相似实体为：{v}')
+            logger.debug(f'"{k}"的相似实体为：{v}')
         return new_edge_cnt
 
     def _update_graph(
@@ -215,22 +269,22 @@ class KGManager:
 
         流程：
         1. 更新图结构：遍历所有待添加的新边
-            - 若是新边，则添加到图中
+            - 若是新边，则收集后批量添加到图中
             - 若是已存在的边，则更新边的权重
         2. 更新新节点的属性
         """
-        existed_nodes = self.graph.get_node_list()
-        existed_edges = [str((edge[0], edge[1])) for edge in self.graph.get_edge_list()]
+        # 加边之前先确定新节点（图自身以哈希表索引节点与边，成员判断为O(1)）
+        new_nodes = {node_hash for src_tgt in node_to_node for node_hash in src_tgt if node_hash not in self.graph}
 
         now_time = time.time()
 
         # 更新图结构
+        new_edges = []
         for src_tgt, weight in node_to_node.items():
-            key = str(src_tgt)
             # 检查边是否已存在
-            if key not in existed_edges:
+            if src_tgt not in self.graph:
                 # 新边
-                self.graph.add_edge(
+                new_edges.append(
                     di_graph.DiEdge(
                         src_tgt[0],
                         src_tgt[1],
@@ -247,36 +301,40 @@ class KGManager:
                 edge_item["weight"] += weight
                 edge_item["update_time"] = now_time
                 self.graph.update_edge(edge_item)
+        self.graph.add_edges_from(new_edges)
+        self.ppr_engine.invalidate()
+        self.data_version += 1
+        logger.info(
+            f"KG新增{len(new_edges)}条边，更新{len(node_to_node) - len(new_edges)}条边，新增{len(new_nodes)}个节点"
+        )
 
         # 更新新节点属性
-        for src_tgt in node_to_node.keys():
-            for node_hash in src_tgt:
-                if node_hash not in existed_nodes:
-                    if node_hash.startswith("entity"):
-                        # 新增实体节点
-                        node = embedding_manager.entities_embedding_store.store.get(node_hash)
-                        if node is None:
-                            logger.warning(f"实体节点 {node_hash} 在嵌入库中不存在，跳过")
-                            continue
-                        assert isinstance(node, EmbeddingStoreItem)
-                        node_item = self.graph[node_hash]
-                        node_item["content"] = node.str
-                        node_item["type"] = "ent"
-                        node_item["create_time"] = now_time
-                        self.graph.update_node(node_item)
-                    elif node_hash.startswith("paragraph"):
-                        # 新增文段节点
-                        node = embedding_manager.paragraphs_embedding_store.store.get(node_hash)
-                        if node is None:
-                            logger.warning(f"段落节点 {node_hash} 在嵌入库中不存在，跳过")
-                            continue
-                        assert isinstance(node, EmbeddingStoreItem)
-                        content = node.str.replace("\n", " ")
-                        node_item = self.graph[node_hash]
-                        node_item["content"] = content if len(content) < 8 else content[:8] + "..."
-                        node_item["type"] = "pg"
-                        node_item["create_time"] = now_time
-                        self.graph.update_node(node_item)
+        for node_hash in new_nodes:
+            if node_hash.startswith("entity"):
+                # 新增实体节点
+                node = embedding_manager.entities_embedding_store.store.get(node_hash)
+                if node is None:
+                    logger.warning(f"实体节点 {node_hash} 在嵌入库中不存在，跳过")
+                    continue
+                assert isinstance(node, EmbeddingStoreItem)
+                node_item = self.graph[node_hash]
+                node_item["content"] = node.str
+                node_item["type"] = "ent"
+                node_item["create_time"] = now_time
+                self.graph.update_node(node_item)
+            elif node_hash.startswith("paragraph"):
+                # 新增文段节点
+                node = embedding_manager.paragraphs_embedding_store.store.get(node_hash)
+                if node is None:
+                    logger.warning(f"段落节点 {node_hash} 在嵌入库中不存在，跳过")
+                    continue
+                assert isinstance(node, EmbeddingStoreItem)
+                content = node.str.replace("\n", " ")
+                node_item = self.graph[node_hash]
+                node_item["content"] = content if len(content) < 8 else content[:8] + "..."
+                node_item["type"] = "pg"
+                node_item["create_time"] = now_time
+                self.graph.update_node(node_item)
 
     def build_kg(
         self,
@@ -328,9 +386,6 @@ class KGManager:
             paragraph_search_result: ParagraphEmbedding的搜索结果（paragraph_hash, similarity）
             embed_manager: EmbeddingManager对象
         """
-        # 图中存在的节点总集
-        existed_nodes = self.graph.get_node_list()
-
         # 准备PPR使用的数据
         # 节点权重：实体
         ent_weights = {}
@@ -349,7 +404,7 @@ class KGManager:
             triple = relation[2:-2].split("', '")
             for ent in [(triple[0]), (triple[2])]:
                 ent_hash = "entity" + "-" + get_sha256(ent)
-                if ent_hash in existed_nodes:  # 该实体需在KG中存在
+                if self.has_node(ent_hash):  # 该实体需在KG中存在
                     if ent_hash not in ent_sim_scores:  # 尚未记录的实体
                         ent_sim_scores[ent_hash] = []
                     ent_sim_scores[ent_hash].append(similarity)
@@ -357,7 +412,7 @@ class KGManager:
         ent_mean_scores = {}  # 记录实体的平均相似度
         for ent_hash, scores in ent_sim_scores.items():
             # 先对相似度进行累加，然后与实体计数相除获取最终权重
-            ent_weights[ent_hash] = float(np.sum(scores)) / self.ent_appear_cnt[ent_hash]
+            ent_weights[ent_hash] = float(np.sum(scores)) / self._get_ent_appear_cnt(ent_hash)
             # 记录实体的平均相似度，用于后续的top_k筛选
             ent_mean_scores[ent_hash] = float(np.mean(scores))
         del ent_sim_scores
@@ -415,22 +470,13 @@ class KGManager:
         ppr_node_weights = {k: v for d in [ent_weights, pg_weights] for k, v in d.items()}
         del ent_weights, pg_weights
 
-        # PersonalizedPageRank
-        ppr_res = pagerank.run_pagerank(
-            self.graph,
-            personalization=ppr_node_weights,
-            max_iter=100,
+        # PersonalizedPageRank，返回全部文段节点（按分数从大到小）
+        # 不在此截断：后续dyn_select_top_k按全体分数的最小值、均值与方差计算阈值，截断会改变过滤结果
+        passage_node_res = self.ppr_engine.top_paragraphs(
+            self._graph,
+            ppr_node_weights,
             alpha=global_config.lpmm_knowledge.qa_ppr_damping,
+            max_iter=100,
         )
 
-        # 获取最终结果
-        # 从搜索结果中提取文段节点的结果
-        passage_node_res = [
-            (node_key, score) for node_key, score in ppr_res.items() if node_key.startswith("paragraph")
-        ]
-        del ppr_res
-
-        # 排序：按照分数从大到小
-        passage_node_res = sorted(passage_node_res, key=lambda item: item[1], reverse=True)
-
         return passage_node_res, ppr_node_weights
@@ -0,0 +1,260 @@
+"""
+知识图谱的紧凑二进制快照
+
+快照目录中的每个数组都是独立的.npy文件，加载时以只读方式映射，按需由操作系统换页：
+- 节点表：按名称排序的节点名（定长字节串，二分查找）、类型、创建时间、内容（UTF-8拼接+偏移）、实体出现次数
+- 邻接表：按源节点组织的CSR（indptr/indices）及边的权重、创建时间、更新时间
+- 已存储的段落hash
+快照目录按生成时间命名，写完后再原子替换指针文件，旧目录随后删除。
+"""
+
+import json
+import os
+import shutil
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from quick_algo import di_graph
+
+from .global_logger import logger
+
+SNAPSHOT_VERSION = 1
+
+NODE_TYPE_CODES = {"ent": 1, "pg": 2}
+"""节点类型 -> 编码（0表示无类型属性）"""
+NODE_TYPE_NAMES = {code: name for name, code in NODE_TYPE_CODES.items()}
+
+_ARRAY_NAMES = [
+    "node_names",
+    "node_type",
+    "node_create_time",
+    "node_content_offsets",
+    "node_content",
+    "ent_appear_cnt",
+    "indptr",
+    "indices",
+    "edge_weight",
+    "edge_create_time",
+    "edge_update_time",
+    "paragraph_hashes",
+]
+
+
+def _encode_strings(strings: Iterable[str]) -> np.ndarray:
+    """编码为定长字节串数组（至少1字节宽，避免空数组的dtype为S0）"""
+    encoded = [s.encode("utf-8") for s in strings]
+    width = max((len(s) for s in encoded), default=1) or 1
+    return np.array(encoded, dtype=f"S{width}")
+
+
+class KGSnapshot:
+    """已映射的知识图谱快照（只读）"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self._arrays = arrays
+        self.node_names: np.ndarray = arrays["node_names"]
+        self.indptr: np.ndarray = arrays["indptr"]
+        self.indices: np.ndarray = arrays["indices"]
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices)
+
+    def find(self, node_name: str) -> int:
+        """二分查找节点编号，不存在时返回-1"""
+        key = node_name.encode("utf-8")
+        if len(key) > self.node_names.dtype.itemsize:
+            return -1
+        idx = int(np.searchsorted(self.node_names, key))
+        if idx < len(self.node_names) and self.node_names[idx] == key:
+            return idx
+        return -1
+
+    def __contains__(self, node_name: str) -> bool:
+        return self.find(node_name) >= 0
+
+    def decoded_node_names(self) -> List[str]:
+        return [name.decode("utf-8") for name in self.node_names]
+
+    def ent_appear_cnt_of(self, node_name: str) -> Optional[float]:
+        """实体出现次数，未记录时返回None"""
+        idx = self.find(node_name)
+        if idx < 0:
+            return None
+        cnt = float(self._arrays["ent_appear_cnt"][idx])
+        return None if np.isnan(cnt) else cnt
+
+    def ent_appear_cnt(self) -> Dict[str, float]:
+        counts = np.asarray(self._arrays["ent_appear_cnt"])
+        rows = np.flatnonzero(~np.isnan(counts))
+        return {self.node_names[idx].decode("utf-8"): float(counts[idx]) for idx in rows}
+
+    def paragraph_hashes(self) -> Set[str]:
+        return {pg_hash.decode("utf-8") for pg_hash in self._arrays["paragraph_hashes"]}
+
+    def csr(self) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """PPR使用的(节点名, indptr, indices, 边权重)"""
+        return self.decoded_node_names(), self.indptr, self.indices, self._arrays["edge_weight"]
+
+    def _node_content(self, idx: int) -> str:
+        offsets = self._arrays["node_content_offsets"]
+        return bytes(self._arrays["node_content"][offsets[idx] : offsets[idx + 1]]).decode("utf-8")
+
+    def to_graph(self) -> di_graph.DiGraph:
+        """还原为可修改的DiGraph（用于增量构建与可视化）"""
+        node_names = self.decoded_node_names()
+        node_type = self._arrays["node_type"]
+        node_create_time = self._arrays["node_create_time"]
+        nodes = []
+        for idx, name in enumerate(node_names):
+            attr = {}
+            if node_type[idx]:
+                attr["type"] = NODE_TYPE_NAMES[int(node_type[idx])]
+                attr["content"] = self._node_content(idx)
+            if not np.isnan(node_create_time[idx]):
+                attr["create_time"] = float(node_create_time[idx])
+            nodes.append(di_graph.DiNode(name, attr))
+
+        src = np.repeat(np.arange(self.node_count), np.diff(self.indptr))
+        weight = self._arrays["edge_weight"]
+        create_time = self._arrays["edge_create_time"]
+        update_time = self._arrays["edge_update_time"]
+        edges = []
+        for edge_idx, (src_idx, dst_idx) in enumerate(zip(src.tolist(), self.indices.tolist(), strict=True)):
+            attr = {"weight": float(weight[edge_idx])}
+            if not np.isnan(create_time[edge_idx]):
+                attr["create_time"] = float(create_time[edge_idx])
+            if not np.isnan(update_time[edge_idx]):
+                attr["update_time"] = float(update_time[edge_idx])
+            edges.append(di_graph.DiEdge(node_names[src_idx], node_names[dst_idx], attr))
+
+        graph = di_graph.DiGraph()
+        graph.add_nodes_from(nodes)
+        graph.add_edges_from(edges)
+        return graph
+
+
+def _build_arrays(
+    graph: di_graph.DiGraph, ent_appear_cnt: Dict[str, float], paragraph_hashes: Iterable[str]
+) -> Dict[str, np.ndarray]:
+    node_names = sorted(graph.get_node_list())
+    node_index = {name: idx for idx, name in enumerate(node_names)}
+    num_nodes = len(node_names)
+
+    node_type = np.zeros(num_nodes, dtype=np.int8)
+    node_create_time = np.full(num_nodes, np.nan)
+    contents = []
+    for idx, name in enumerate(node_names):
+        attr = graph[name].attr
+        node_type[idx] = NODE_TYPE_CODES.get(attr.get("type"), 0)
+        if "create_time" in attr:
+            node_create_time[idx] = attr["create_time"]
+        contents.append(str(attr.get("content", "")).encode("utf-8"))
+    content_offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum([len(content) for content in contents], out=content_offsets[1:])
+
+    counts = np.full(num_nodes, np.nan)
+    for name, cnt in ent_appear_cnt.items():
+        if (idx := node_index.get(name)) is not None:
+            counts[idx] = cnt
+        else:
+            logger.warning(f"实体计数中的 {name} 不在KG中，快照中将忽略")
+
+    edges = graph.get_edge_list()
+    src = np.fromiter((node_index[edge[0]] for edge in edges), dtype=np.int64, count=len(edges))
+    dst = np.fromiter((node_index[edge[1]] for edge in edges), dtype=np.int64, count=len(edges))
+    edge_attrs = [graph[edge].attr for edge in edges]
+    weight = np.fromiter((attr.get("weight", 1.0) for attr in edge_attrs), dtype=np.float64, count=len(edges))
+    create_time = np.fromiter(
+        (attr.get("create_time", np.nan) for attr in edge_attrs), dtype=np.float64, count=len(edges)
+    )
+    update_time = np.fromiter(
+        (attr.get("update_time", np.nan) for attr in edge_attrs), dtype=np.float64, count=len(edges)
+    )
+    order = np.lexsort((dst, src))
+
+    return {
+        "node_names": _encode_strings(node_names),
+        "node_type": node_type,
+        "node_create_time": node_create_time,
+        "node_content_offsets": content_offsets,
+        "node_content": np.frombuffer(b"".join(contents), dtype=np.uint8),
+        "ent_appear_cnt": counts,
+        "indptr": np.concatenate(([0], np.cumsum(np.bincount(src, minlength=num_nodes)))).astype(np.int64),
+        "indices": dst[order],
+        "edge_weight": weight[order],
+        "edge_create_time": create_time[order],
+        "edge_update_time": update_time[order],
+        "paragraph_hashes": _encode_strings(sorted(paragraph_hashes)),
+    }
+
+
+def write_snapshot(
+    dir_path: str,
+    pointer_path: str,
+    graph: di_graph.DiGraph,
+    ent_appear_cnt: Dict[str, float],
+    paragraph_hashes: Iterable[str],
+) -> None:
+    """
+    写入快照：先写入新目录，再原子替换指针文件，最后删除旧目录
+    Args:
+        dir_path: KG数据目录
+        pointer_path: 指针文件路径（记录当前快照目录）
+        graph: 知识图谱
+        ent_appear_cnt: 实体出现次数
+        paragraph_hashes: 已存储的段落hash
+    """
+    arrays = _build_arrays(graph, ent_appear_cnt, paragraph_hashes)
+    snapshot_name = f"kg-snapshot-{time.time_ns()}"
+    snapshot_dir = os.path.join(dir_path, snapshot_name)
+    os.makedirs(snapshot_dir)
+    for name in _ARRAY_NAMES:
+        np.save(os.path.join(snapshot_dir, f"{name}.npy"), arrays[name])
+
+    old_name = _read_pointer(pointer_path)
+    tmp_pointer_path = pointer_path + ".tmp"
+    with open(tmp_pointer_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": SNAPSHOT_VERSION,
+                "snapshot": snapshot_name,
+                "nodes": len(arrays["node_names"]),
+                "edges": len(arrays["indices"]),
+            },
+            f,
+        )
+    os.replace(tmp_pointer_path, pointer_path)
+
+    if old_name and old_name != snapshot_name:
+        # Windows下仍被映射的旧快照无法删除，留待下次写入时清理
+        shutil.rmtree(os.path.join(dir_path, old_name), ignore_errors=True)
+    for stale_name in os.listdir(dir_path):
+        if stale_name.startswith("kg-snapshot-") and stale_name != snapshot_name:
+            shutil.rmtree(os.path.join(dir_path, stale_name), ignore_errors=True)
+
+
+def _read_pointer(pointer_path: str) -> Optional[str]:
+    if not os.path.exists(pointer_path):
+        return None
+    with open(pointer_path, "r", encoding="utf-8") as f:
+        pointer = json.load(f)
+    if pointer.get("version") != SNAPSHOT_VERSION:
+        logger.warning(f"KG快照版本{pointer.get('version')}不受支持，忽略快照")
+        return None
+    return pointer["snapshot"]
+
+
+def load_snapshot(dir_path: str, pointer_path: str) -> Optional[KGSnapshot]:
+    """映射当前快照，不存在时返回None"""
+    snapshot_name = _read_pointer(pointer_path)
+    if snapshot_name is None:
+        return None
+    snapshot_dir = os.path.join(dir_path, snapshot_name)
+    arrays = {name: np.load(os.path.join(snapshot_dir, f"{name}.npy"), mmap_mode="r") for name in _ARRAY_NAMES}
+    return KGSnapshot(arrays)
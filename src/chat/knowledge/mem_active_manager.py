@@ -2,7 +2,7 @@ raise DeprecationWarning("MemoryActiveManager is not used yet, please do not imp
 from .lpmmconfig import global_config  # noqa
 from .embedding_store import EmbeddingManager  # noqa
 from .llm_client import LLMClient  # noqa
-from .utils.dyn_topk import dyn_select_top_k  # noqa
+from src.common.similarity import dyn_select_top_k  # noqa
 
 
 class MemoryActiveManager:
@@ -1,10 +1,11 @@
 import json
 import os
 import glob
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Tuple
 
 
 from . import INVALID_ENTITY, ROOT_PATH, DATA_PATH
+from .global_logger import logger
 # from src.manager.local_store_manager import local_storage
 
 
@@ -42,6 +43,89 @@ def _filter_invalid_triples(triples: List[List[str]]) -> List[List[str]]:
     return valid_triples
 
 
+_JSON_READ_CHUNK_SIZE = 1 << 20  # 流式解析json文件时每次读取的字符数
+_JSON_WHITESPACE = " \t\r\n"
+
+
+def _normalize_doc(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """过滤文档中的无效实体与无效三元组（缺失的字段保持缺失，交由调用方校验）"""
+    if isinstance(doc.get("extracted_entities"), list):
+        doc["extracted_entities"] = _filter_invalid_entities(doc["extracted_entities"])
+    if isinstance(doc.get("extracted_triples"), list):
+        doc["extracted_triples"] = _filter_invalid_triples(doc["extracted_triples"])
+    return doc
+
+
+def _iter_jsonl_docs(file_path: str) -> Iterator[Dict[str, Any]]:
+    """逐行读取jsonl文件中的文档（提取中断导致的不完整末行会被跳过）"""
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                if line.endswith("\n"):
+                    raise
+                logger.warning(f"OpenIE文件{file_path}第{line_no}行不完整，已跳过")
+
+
+def _iter_json_docs(file_path: str) -> Iterator[Dict[str, Any]]:
+    """增量解析json文件中"docs"数组的元素，内存占用与单个文档大小相当而非整个文件"""
+    decoder = json.JSONDecoder()
+    with open(file_path, "r", encoding="utf-8") as f:
+        buffer = ""
+        pos = 0
+        eof = False
+
+        def read_more() -> bool:
+            """读入下一块内容，同时丢弃缓冲区中已解析的部分"""
+            nonlocal buffer, pos, eof
+            if eof:
+                return False
+            chunk = f.read(_JSON_READ_CHUNK_SIZE)
+            if not chunk:
+                eof = True
+                return False
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return True
+
+        # 定位 "docs" 数组的起始位置（OpenIE输出中docs为首个键）
+        while True:
+            key_pos = buffer.find('"docs"')
+            if key_pos != -1:
+                array_pos = buffer.find("[", key_pos)
+                if array_pos != -1:
+                    pos = array_pos + 1
+                    break
+            # 尚未定位到数组时保留全部已读内容
+            pos = 0
+            if not read_more():
+                raise ValueError(f"OpenIE文件{file_path}中不存在docs数组")
+
+        while True:
+            # 跳过空白与分隔符
+            while True:
+                while pos < len(buffer) and (buffer[pos] in _JSON_WHITESPACE or buffer[pos] == ","):
+                    pos += 1
+                if pos < len(buffer) or not read_more():
+                    break
+            if pos >= len(buffer):
+                raise ValueError(f"OpenIE文件{file_path}的docs数组不完整")
+            if buffer[pos] == "]":
+                return
+            try:
+                doc, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # 当前文档尚未完整读入缓冲区
+                if not read_more():
+                    raise
+                continue
+            pos = end
+            yield doc
+
+
 class OpenIE:
     """
     OpenIE规约的数据格式为如下
@@ -104,20 +188,43 @@ class OpenIE:
         }
 
     @staticmethod
-    def load() -> "OpenIE":
-        """从OPENIE_DIR下所有json文件合并加载OpenIE数据"""
+    def list_files() -> List[str]:
+        """列出OPENIE_DIR下所有json/jsonl文件"""
         openie_dir = os.path.join(DATA_PATH, "openie")
         if not os.path.exists(openie_dir):
             raise Exception(f"OpenIE数据目录不存在: {openie_dir}")
-        json_files = sorted(glob.glob(os.path.join(openie_dir, "*.json")))
+        json_files = sorted(
+            glob.glob(os.path.join(openie_dir, "*.json")) + glob.glob(os.path.join(openie_dir, "*.jsonl"))
+        )
+        if not json_files:
+            raise Exception(f"未在 {openie_dir} 找到任何OpenIE json/jsonl文件")
+        return json_files
+
+    @staticmethod
+    def iter_docs(json_files: List[str] | None = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        逐个读取OpenIE文档（已过滤无效实体与三元组），不将整个文件载入内存
+        Args:
+            json_files: 要读取的文件列表，默认为OPENIE_DIR下所有json/jsonl文件
+        Returns:
+            (所在文件路径, 文档)的迭代器
+        """
+        for file in json_files if json_files is not None else OpenIE.list_files():
+            docs = _iter_jsonl_docs(file) if file.endswith(".jsonl") else _iter_json_docs(file)
+            for doc in docs:
+                yield file, _normalize_doc(doc)
+
+    @staticmethod
+    def load() -> "OpenIE":
+        """从OPENIE_DIR下所有json/jsonl文件合并加载OpenIE数据（jsonl每行为一个文档）"""
+        json_files = OpenIE.list_files()
         data_list = []
         for file in json_files:
             with open(file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                data_list.append(data)
-        if not data_list:
-            # print(f"111111111111111111111Root Path : \n{ROOT_PATH}")
-            raise Exception(f"未在 {openie_dir} 找到任何OpenIE json文件")
+                if file.endswith(".jsonl"):
+                    data_list.append({"docs": [json.loads(line) for line in f if line.strip()]})
+                else:
+                    data_list.append(json.load(f))
         openie_data = OpenIE._from_dict(data_list)
         return openie_data
 
@@ -0,0 +1,231 @@
+"""
+基于CSR稀疏矩阵的个性化PageRank（PPR）
+
+与quick_algo.pagerank.run_pagerank的定义一致：按边权重分配转移概率，
+悬挂节点（无出边）的分数按个性化向量重新分配，个性化向量归一化后作为重启分布。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from quick_algo import di_graph
+
+from .global_logger import logger
+
+PPR_CACHE_SIZE = 256  # PPR结果缓存条数
+PPR_WEIGHT_DECIMALS = 4  # 个性化向量量化到的小数位数（缓存键）
+PUSH_MAX_SEEDS = 64  # 个性化节点数不超过此值时使用推送法
+PUSH_EPSILON = 1e-7  # 推送法的残差阈值（相对于节点出度）
+PUSH_MAX_EDGE_VISITS_FACTOR = 4  # 推送法访问的边数超过 该倍数×总边数 时退回幂迭代
+
+
+class PPREngine:
+    """
+    个性化PageRank计算引擎
+
+    图更新后调用invalidate()，下次计算前按需重建转移矩阵；
+    相同（量化后）个性化向量的结果在图未变化时直接从缓存返回。
+    """
+
+    def __init__(self, cache_size: int = PPR_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._stale = True
+        self._version = 0
+        """转移矩阵版本号，重建后递增，作为缓存键的一部分"""
+        self._cache: OrderedDict[tuple, List[Tuple[str, float]]] = OrderedDict()
+        self._cache_size = cache_size
+        self._csr_loader: Optional[Callable[[], Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]]] = None
+        """返回(节点名, indptr, indices, 边权重)的CSR邻接表来源（如KG快照），为None时从图对象构建"""
+
+        self._node_names: List[str] = []
+        self._node_index: Dict[str, int] = {}
+        self._indptr = np.zeros(1, dtype=np.int64)
+        """CSR行指针（按源节点）"""
+        self._indices = np.zeros(0, dtype=np.int64)
+        """CSR列索引（目标节点）"""
+        self._data = np.zeros(0, dtype=np.float64)
+        """转移概率（边权重/源节点出边权重和）"""
+        self._edge_src = np.zeros(0, dtype=np.int64)
+        """每条边的源节点（幂迭代时按边取源节点分数）"""
+        self._dangling = np.zeros(0, dtype=bool)
+        self._paragraph_idx = np.zeros(0, dtype=np.int64)
+
+    def invalidate(self) -> None:
+        """标记图已变化，下次计算前从图对象重建转移矩阵并清空缓存"""
+        with self._lock:
+            self._csr_loader = None
+            self._stale = True
+            self._cache.clear()
+
+    def attach(self, csr_loader: Callable[[], Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]]) -> None:
+        """指定CSR邻接表来源（按源节点排列），下次计算前由其重建转移矩阵"""
+        with self._lock:
+            self._csr_loader = csr_loader
+            self._stale = True
+            self._cache.clear()
+
+    def _ensure_matrix(self, graph: Optional[di_graph.DiGraph]) -> None:
+        """按需构建转移矩阵（调用方需持有锁）"""
+        if not self._stale:
+            return
+        if self._csr_loader is not None:
+            node_names, indptr, indices, weight = self._csr_loader()
+            node_index = {name: idx for idx, name in enumerate(node_names)}
+            num_nodes = len(node_names)
+            indptr = np.asarray(indptr, dtype=np.int64)
+            dst = np.asarray(indices, dtype=np.int64)
+            weight = np.asarray(weight, dtype=np.float64)
+            src = np.repeat(np.arange(num_nodes, dtype=np.int64), np.diff(indptr))
+        else:
+            assert graph is not None
+            node_names = graph.get_node_list()
+            node_index = {name: idx for idx, name in enumerate(node_names)}
+            edges = graph.get_edge_list()
+            num_nodes = len(node_names)
+
+            src = np.fromiter((node_index[edge[0]] for edge in edges), dtype=np.int64, count=len(edges))
+            dst = np.fromiter((node_index[edge[1]] for edge in edges), dtype=np.int64, count=len(edges))
+            weight = np.fromiter((graph[edge]["weight"] for edge in edges), dtype=np.float64, count=len(edges))
+
+            order = np.argsort(src, kind="stable")
+            src, dst, weight = src[order], dst[order], weight[order]
+            indptr = np.concatenate(([0], np.cumsum(np.bincount(src, minlength=num_nodes))))
+        out_weight = np.bincount(src, weights=weight, minlength=num_nodes)
+
+        self._node_names = node_names
+        self._node_index = node_index
+        self._indptr = indptr
+        self._indices = dst
+        self._data = weight / out_weight[src] if len(src) else weight
+        self._edge_src = src
+        self._dangling = out_weight == 0
+        self._paragraph_idx = np.array(
+            [idx for idx, name in enumerate(node_names) if name.startswith("paragraph")], dtype=np.int64
+        )
+        self._version += 1
+        self._stale = False
+        logger.debug(f"PPR转移矩阵已重建：{num_nodes}个节点，{len(dst)}条边")
+
+    def _personalization_vector(self, personalization: Dict[str, float]) -> Optional[Tuple[tuple, np.ndarray]]:
+        """归一化并量化个性化向量，返回(缓存键, 稠密向量)；无有效节点时返回None"""
+        weights = {
+            self._node_index[name]: weight
+            for name, weight in personalization.items()
+            if name in self._node_index and weight > 0
+        }
+        total = sum(weights.values())
+        if total <= 0:
+            return None
+        key = tuple(sorted((idx, round(weight / total, PPR_WEIGHT_DECIMALS)) for idx, weight in weights.items()))
+        vector = np.zeros(len(self._node_names), dtype=np.float64)
+        for idx, weight in key:
+            vector[idx] = weight
+        vector_sum = vector.sum()
+        if vector_sum <= 0:
+            return None
+        return key, vector / vector_sum
+
+    def _power_iteration(self, seeds: np.ndarray, alpha: float, max_iter: int, tol: float) -> np.ndarray:
+        """幂迭代，残差（L1）小于N*tol时提前停止"""
+        num_nodes = len(self._node_names)
+        scores = np.full(num_nodes, 1.0 / num_nodes)
+        for _ in range(max_iter):
+            dangling_sum = scores[self._dangling].sum()
+            new_scores = alpha * np.bincount(
+                self._indices, weights=scores[self._edge_src] * self._data, minlength=num_nodes
+            )
+            new_scores += (alpha * dangling_sum + (1 - alpha)) * seeds
+            residual = np.abs(new_scores - scores).sum()
+            scores = new_scores
+            if residual < num_nodes * tol:
+                break
+        return scores
+
+    def _push(self, seeds: np.ndarray, alpha: float) -> Optional[np.ndarray]:
+        """
+        前向推送法近似PPR（每轮同时推送所有残差超过阈值的节点）
+        只访问种子附近的边，种子较少时比幂迭代快；访问边数超出预算时返回None
+        """
+        scores = np.zeros_like(seeds)
+        residual = seeds.copy()
+        threshold = PUSH_EPSILON * np.maximum(np.diff(self._indptr), 1)
+        edge_budget = PUSH_MAX_EDGE_VISITS_FACTOR * max(len(self._indices), 1)
+        edge_visits = 0
+        while True:
+            active = np.flatnonzero(residual > threshold)
+            if not active.size:
+                return scores
+            mass = residual[active]
+            residual[active] = 0.0
+            scores[active] += (1 - alpha) * mass
+
+            dangling = self._dangling[active]
+            if dangling.any():
+                residual += alpha * mass[dangling].sum() * seeds
+            active, mass = active[~dangling], mass[~dangling]
+
+            starts = self._indptr[active]
+            counts = self._indptr[active + 1] - starts
+            num_edges = int(counts.sum())
+            edge_visits += num_edges
+            if edge_visits > edge_budget:
+                return None
+            # 展开这些节点的出边在CSR中的位置
+            edge_ids = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(num_edges)
+            np.add.at(residual, self._indices[edge_ids], alpha * np.repeat(mass, counts) * self._data[edge_ids])
+
+    def top_paragraphs(
+        self,
+        graph: Optional[di_graph.DiGraph],
+        personalization: Dict[str, float],
+        alpha: float,
+        top_k: Optional[int] = None,
+        max_iter: int = 100,
+        tol: float = 1e-6,
+    ) -> List[Tuple[str, float]]:
+        """
+        计算个性化PageRank，返回分数最高的top_k个文段节点（top_k为None时返回全部文段节点）
+        Args:
+            graph: 知识图谱（已通过attach指定CSR来源时可为None）
+            personalization: 个性化节点权重
+            alpha: 阻尼系数
+            top_k: 返回的文段数，None表示全部
+            max_iter: 幂迭代最大轮数
+            tol: 收敛阈值
+        Returns:
+            按分数降序排列的(文段节点名, 分数)列表
+        """
+        with self._lock:
+            self._ensure_matrix(graph)
+            if not self._node_names:
+                return []
+            personalized = self._personalization_vector(personalization)
+            if personalized is None:
+                return []
+            key, seeds = personalized
+            cache_key = (self._version, alpha, top_k, key)
+            if (cached := self._cache.get(cache_key)) is not None:
+                self._cache.move_to_end(cache_key)
+                return list(cached)
+
+            scores = None
+            if len(key) <= PUSH_MAX_SEEDS:
+                scores = self._push(seeds, alpha)
+            if scores is None:
+                scores = self._power_iteration(seeds, alpha, max_iter, tol)
+
+            # 只在文段节点上排序，需要top_k时先用argpartition截取
+            paragraph_scores = scores[self._paragraph_idx]
+            if top_k is not None and top_k < len(paragraph_scores):
+                top = np.argpartition(-paragraph_scores, top_k)[:top_k]
+            else:
+                top = np.arange(len(paragraph_scores))
+            top = top[np.argsort(-paragraph_scores[top], kind="stable")]
+            result = [(self._node_names[self._paragraph_idx[idx]], float(paragraph_scores[idx])) for idx in top]
+
+            self._cache[cache_key] = result
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+            return list(result)
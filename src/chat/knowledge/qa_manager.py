@@ -6,9 +6,11 @@ from .embedding_store import EmbeddingManager
 from .kg_manager import KGManager
 
 # from .lpmmconfig import global_config
-from .utils.dyn_topk import dyn_select_top_k
+from .query_cache import QueryResultCache
+from .utils.rank_fusion import reciprocal_rank_fusion
 from src.llm_models.utils_model import LLMRequest
 from src.chat.utils.utils import get_embedding
+from src.common.similarity import dyn_select_top_k
 from src.config.config import global_config, model_config
 
 MAX_KNOWLEDGE_LENGTH = 10000  # 最大知识长度
@@ -23,11 +25,25 @@ class QAManager:
         self.embed_manager = embed_manager
         self.kg_manager = kg_manager
         self.qa_model = LLMRequest(model_set=model_config.model_task_config.lpmm_qa, request_type="lpmm.qa")
+        self.query_cache = QueryResultCache(
+            ttl=global_config.lpmm_knowledge.qa_cache_ttl,
+            max_size=global_config.lpmm_knowledge.qa_cache_max_size,
+            similarity_threshold=global_config.lpmm_knowledge.qa_cache_similarity_threshold,
+        )
+
+    @property
+    def data_version(self) -> Tuple:
+        """知识库数据版本，嵌入库或KG变化时改变"""
+        return self.embed_manager.data_version, self.kg_manager.data_version
 
     async def process_query(
         self, question: str
     ) -> Optional[Tuple[List[Tuple[str, float, float]], Optional[Dict[str, float]]]]:
-        """处理查询"""
+        """处理查询（相同或相近的问题优先复用缓存结果）"""
+        data_version = self.data_version
+        if (cached := self.query_cache.get(question, data_version)) is not None:
+            logger.debug("知识查询命中缓存")
+            return cached
 
         # 生成问题的Embedding
         part_start_time = time.perf_counter()
@@ -38,6 +54,19 @@ class QAManager:
         part_end_time = time.perf_counter()
         logger.debug(f"Embedding用时：{part_end_time - part_start_time:.5f}s")
 
+        if (cached := self.query_cache.get_similar(question_embedding, data_version)) is not None:
+            logger.debug("知识查询命中相近问题的缓存")
+            return cached
+
+        result = self._search(question, question_embedding)
+        if result is not None:
+            self.query_cache.put(question, question_embedding, result, data_version)
+        return result
+
+    def _search(
+        self, question: str, question_embedding: List[float]
+    ) -> Optional[Tuple[List[Tuple[str, float, float]], Optional[Dict[str, float]]]]:
+        """向量检索、BM25融合与KG检索"""
         # 根据问题Embedding查询Relation Embedding库
         part_start_time = time.perf_counter()
         relation_search_res = self.embed_manager.relation_embedding_store.search_top_k(
@@ -75,6 +104,25 @@ class QAManager:
         part_end_time = time.perf_counter()
         logger.debug(f"文段检索用时：{part_end_time - part_start_time:.5f}s")
 
+        if global_config.lpmm_knowledge.qa_bm25_enable:
+            # BM25关键词检索，与向量检索结果按排名融合
+            part_start_time = time.perf_counter()
+            paragraph_store = self.embed_manager.paragraphs_embedding_store.store
+            bm25_search_res = [
+                res
+                for res in self.embed_manager.paragraph_bm25_index.search(
+                    question, global_config.lpmm_knowledge.qa_bm25_search_top_k
+                )
+                if res[0] in paragraph_store
+            ]
+            paragraph_search_res = reciprocal_rank_fusion(
+                [paragraph_search_res, bm25_search_res], k=global_config.lpmm_knowledge.qa_rrf_k
+            )
+            part_end_time = time.perf_counter()
+            logger.debug(
+                f"BM25检索与融合用时：{part_end_time - part_start_time:.5f}s，BM25命中{len(bm25_search_res)}条"
+            )
+
         if len(relation_search_res) != 0:
             logger.info("找到相关关系，将使用RAG进行检索")
             # 使用KG检索
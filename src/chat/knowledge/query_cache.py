@@ -0,0 +1,141 @@
+"""
+知识库查询结果缓存
+
+短时间内重复或近似的提问（多人问同一话题、记忆检索反复追问）直接复用此前的检索结果，
+省去问题嵌入、向量检索与PageRank。
+- 精确命中：以规范化后的问题文本为键，无需请求嵌入
+- 语义命中：问题嵌入与已缓存问题嵌入的余弦相似度达到阈值
+缓存项超过有效期即淘汰；嵌入库或KG发生变化（数据版本改变）时清空全部缓存。
+"""
+
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, List, Optional
+
+import numpy as np
+
+from src.common.similarity import cosine_similarity_matrix
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = "?？!！。.,，~～…"
+
+
+def normalize_question(question: str) -> str:
+    """规范化问题文本：全半角统一、英文小写、合并空白、去除首尾空白与句末标点"""
+    question = unicodedata.normalize("NFKC", question).lower()
+    question = _WHITESPACE_PATTERN.sub(" ", question).strip()
+    return question.rstrip(_TRAILING_PUNCTUATION).strip()
+
+
+@dataclass
+class _CacheEntry:
+    result: Any
+    embedding: np.ndarray
+    expire_at: float
+
+
+class QueryResultCache:
+    def __init__(self, ttl: float, max_size: int, similarity_threshold: float):
+        """
+        Args:
+            ttl: 缓存有效期（秒），不大于0时不缓存
+            max_size: 最大缓存条数，超出时淘汰最早写入的缓存
+            similarity_threshold: 语义命中所需的问题嵌入余弦相似度
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.similarity_threshold = similarity_threshold
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._data_version: Hashable = None
+        self._matrix: Optional[np.ndarray] = None
+        """已缓存问题嵌入组成的矩阵（按_entries顺序），缓存变化后置空、使用时重建"""
+        self._matrix_keys: List[str] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_size > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._matrix = None
+        self._matrix_keys = []
+
+    def _prepare(self, data_version: Hashable) -> None:
+        """数据版本变化时清空缓存，并淘汰过期项"""
+        if data_version != self._data_version:
+            self.clear()
+            self._data_version = data_version
+            return
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if entry.expire_at <= now]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def get(self, question: str, data_version: Hashable) -> Any:
+        """
+        精确查找（按规范化的问题文本）
+        Args:
+            question: 问题
+            data_version: 当前知识库数据版本
+        Returns:
+            缓存的检索结果，未命中时返回None
+        """
+        if not self.enabled:
+            return None
+        self._prepare(data_version)
+        entry = self._entries.get(normalize_question(question))
+        return entry.result if entry is not None else None
+
+    def get_similar(self, embedding: List[float], data_version: Hashable) -> Any:
+        """
+        语义查找：返回与问题嵌入最相似且相似度达到阈值的缓存结果
+        Args:
+            embedding: 问题嵌入
+            data_version: 当前知识库数据版本
+        Returns:
+            缓存的检索结果，未命中时返回None
+        """
+        if not self.enabled:
+            return None
+        self._prepare(data_version)
+        if not self._entries:
+            return None
+        if self._matrix is None:
+            self._matrix_keys = list(self._entries.keys())
+            self._matrix = np.stack([self._entries[key].embedding for key in self._matrix_keys])
+        sims = cosine_similarity_matrix(np.asarray(embedding, dtype=np.float32), self._matrix)
+        best = int(np.argmax(sims))
+        if sims[best] < self.similarity_threshold:
+            return None
+        return self._entries[self._matrix_keys[best]].result
+
+    def put(self, question: str, embedding: List[float], result: Any, data_version: Hashable) -> None:
+        """
+        写入缓存
+        Args:
+            question: 问题
+            embedding: 问题嵌入
+            result: 检索结果
+            data_version: 检索时的知识库数据版本
+        """
+        if not self.enabled:
+            return
+        self._prepare(data_version)
+        key = normalize_question(question)
+        self._entries.pop(key, None)
+        self._entries[key] = _CacheEntry(
+            result=result,
+            embedding=np.asarray(embedding, dtype=np.float32),
+            expire_at=time.monotonic() + self.ttl,
+        )
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        self._matrix = None
@@ -0,0 +1,21 @@
+from typing import Any, Dict, List, Tuple
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Tuple[Any, float]]], k: int = 60) -> List[Tuple[Any, float]]:
+    """倒数排名融合（RRF）
+
+    每个结果的分数为其在各列表中排名的 1/(k+rank) 之和，
+    再除以理论最大值（在所有列表中均排第一），使分数落在(0, 1]区间。
+
+    Args:
+        result_lists: 多路检索结果，每路按相关性降序排列的(key, score)列表
+        k: 平滑常数，越大则排名靠后的结果权重衰减越慢
+    Returns:
+        按融合分数降序排列的(key, score)列表
+    """
+    fused: Dict[Any, float] = {}
+    for results in result_lists:
+        for rank, (key, _) in enumerate(results, start=1):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+    max_score = len(result_lists) / (k + 1)
+    return sorted(((key, score / max_score) for key, score in fused.items()), key=lambda x: x[1], reverse=True)
@@ -1,7 +1,7 @@
 import re
 import json
 import traceback
-from typing import Union
+from typing import Dict, Union
 
 from src.common.database.database_model import Messages, Images
 from src.common.logger import get_logger
@@ -182,14 +182,24 @@ class MessageStorage:
             logger.debug("文本中没有图片标记，直接返回原文本")
             return text
 
+        # 以描述哈希（有索引）一次性查出所有描述对应的图片，同一描述取最新的一张
+        descriptions = {description.strip() for description in matches}
+        image_ids: Dict[str, str] = {}
+        try:
+            hashes = [Images.hash_description(description) for description in descriptions if description]
+            query = (
+                Images.select(Images.image_id, Images.description)
+                .where(Images.description_hash.in_(hashes))
+                .order_by(Images.timestamp.desc())
+            )
+            for image_record in query:
+                if image_record.description in descriptions:
+                    image_ids.setdefault(image_record.description, image_record.image_id)
+        except Exception as e:
+            logger.debug(f"批量查询图片描述失败: {e}")
+
         def replace_match(match):
-            description = match.group(1).strip()
-            try:
-                image_record = (
-                    Images.select().where(Images.description == description).order_by(Images.timestamp.desc()).first()
-                )
-                return f"[picid:{image_record.image_id}]" if image_record else match.group(0)
-            except Exception:
-                return match.group(0)
-
-        return re.sub(r"\[图片：([^\]]+)\]", replace_match, text)
+            image_id = image_ids.get(match.group(1).strip())
+            return f"[picid:{image_id}]" if image_id else match.group(0)
+
+        return re.sub(pattern, replace_match, text)
@@ -4,7 +4,7 @@ import asyncio
 import random
 import re
 
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, Callable, Awaitable
 from datetime import datetime
 from src.common.logger import get_logger
 from src.common.data_models.database_data_model import DatabaseMessages
@@ -75,6 +75,8 @@ class PrivateReplyer:
         stream_id: Optional[str] = None,
         reply_message: Optional[DatabaseMessages] = None,
         reply_time_point: Optional[float] = time.time(),
+        content_delta_callback: Optional[Callable[[str], Awaitable[None]]] = None,
+        selected_expressions_callback: Optional[Callable[[Optional[List[int]]], None]] = None,
     ) -> Tuple[bool, LLMGenerationDataModel]:
         # sourcery skip: merge-nested-ifs
         """
@@ -88,6 +90,8 @@ class PrivateReplyer:
             chosen_actions: 已选动作
             enable_tool: 是否启用工具调用
             from_plugin: 是否来自插件
+            content_delta_callback: 回复内容增量回调，提供时使用流式请求边生成边输出
+            selected_expressions_callback: 表达方式选定后的回调，在开始生成前调用，供流式输出的内容记录所用表达方式
 
         Returns:
             Tuple[bool, Optional[Dict[str, Any]], Optional[str]]: (是否成功, 生成的回复, 使用的prompt)
@@ -111,6 +115,8 @@ class PrivateReplyer:
                 )
             llm_response.prompt = prompt
             llm_response.selected_expressions = selected_expressions
+            if selected_expressions_callback:
+                selected_expressions_callback(selected_expressions)
 
             if not prompt:
                 logger.warning("构建prompt失败，跳过回复生成")
@@ -133,7 +139,9 @@ class PrivateReplyer:
             model_name = "unknown_model"
 
             try:
-                content, reasoning_content, model_name, tool_call = await self.llm_generate_content(prompt)
+                content, reasoning_content, model_name, tool_call = await self.llm_generate_content(
+                    prompt, content_delta_callback=content_delta_callback
+                )
                 logger.debug(f"replyer生成内容: {content}")
                 llm_response.content = content
                 llm_response.reasoning = reasoning_content
@@ -149,6 +157,8 @@ class PrivateReplyer:
                         logger.warning("警告：插件在内容生成后才修改了prompt，此修改不会生效")
                         llm_response.prompt = modified_message.llm_prompt  # 虽然我不知道为什么在这里需要改prompt
                     if modified_message._modify_flags.modify_llm_response_content:
+                        if content_delta_callback:
+                            logger.warning("警告：流式输出时插件才修改回复内容，已输出的部分不受影响")
                         llm_response.content = modified_message.llm_response_content
                     if modified_message._modify_flags.modify_llm_response_reasoning:
                         llm_response.reasoning = modified_message.llm_response_reasoning
@@ -1011,7 +1021,9 @@ class PrivateReplyer:
             display_message=display_message,
         )
 
-    async def llm_generate_content(self, prompt: str):
+    async def llm_generate_content(
+        self, prompt: str, content_delta_callback: Optional[Callable[[str], Awaitable[None]]] = None
+    ):
         with Timer("LLM生成", {}):  # 内部计时器，可选保留
             # 直接使用已初始化的模型实例
             logger.info(f"\n{prompt}\n")
@@ -1022,7 +1034,7 @@ class PrivateReplyer:
                 logger.debug(f"\n{prompt}\n")
 
             content, (reasoning_content, model_name, tool_calls) = await self.express_model.generate_response_async(
-                prompt
+                prompt, content_delta_callback=content_delta_callback
             )
 
             content = content.strip()
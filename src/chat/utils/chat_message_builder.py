@@ -1,7 +1,9 @@
 import time
 import random
 import re
+import threading
 
+from collections import OrderedDict
 from typing import List, Dict, Any, Tuple, Optional, Callable
 from rich.traceback import install
 
@@ -11,13 +13,56 @@ from src.common.message_repository import find_messages, count_messages
 from src.common.data_models.database_data_model import DatabaseMessages, DatabaseActionRecords
 from src.common.data_models.message_data_model import MessageAndActionModel
 from src.common.database.database_model import ActionRecords
-from src.common.database.database_model import Images
-from src.person_info.person_info import Person, get_person_id
+from src.person_info.person_info import Person, get_person_id, get_person_names_version, resolve_persons
 from src.chat.utils.utils import translate_timestamp_to_human_readable, assign_message_ids
+from src.chat.utils.utils_image import get_image_manager
 
 install(extra_lines=3)
 logger = get_logger("chat_message_builder")
 
+PIC_ID_PATTERN = re.compile(r"\[picid:([^\]]+)\]")
+PIC_LOADING_DESCRIPTION = "内容正在阅读，请稍等"  # 图片不存在或尚未生成描述时显示的内容
+RENDERED_CONTENT_CACHE_SIZE = 4096  # 缓存的消息内容渲染结果数量上限（LRU淘汰）
+
+
+class _RenderedContentCache:
+    """消息内容渲染结果的LRU缓存
+
+    滑动窗口中的大部分消息在相邻两次构建之间不变，缓存其与时间无关的渲染结果（用户引用替换、命令标记），
+    每次构建只需渲染新到达的消息。用户引用会被解析为用户名称，因此用户名称版本变化时清空缓存。
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[Tuple[str, str, bool, bool], str] = OrderedDict()
+        self._names_version = -1
+        self._lock = threading.Lock()
+
+    def render(self, content: str, platform: str, replace_bot_name: bool, is_command: bool) -> str:
+        key = (content, platform, replace_bot_name, is_command)
+        names_version = get_person_names_version()
+        with self._lock:
+            if names_version != self._names_version:
+                self._entries.clear()
+                self._names_version = names_version
+            elif key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        # 使用独立函数处理用户引用格式
+        if rendered := replace_user_references(content, platform, replace_bot_name=replace_bot_name):
+            if is_command:
+                rendered = f"[is_command=True] {rendered}"
+
+        with self._lock:
+            self._entries[key] = rendered
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return rendered
+
+
+_rendered_content_cache = _RenderedContentCache(RENDERED_CONTENT_CACHE_SIZE)
+
 
 def replace_user_references(
     content: Optional[str],
@@ -394,6 +439,18 @@ def _build_readable_messages_internal(
         pic_id_mapping = {}
     current_pic_counter = pic_counter
     pic_description_cache: Dict[str, str] = {}
+    if pic_single:
+        # 预先扫描窗口内所有消息，一次性批量加载全部图片描述
+        pic_ids = [
+            pic_id
+            for message in messages
+            if message.is_action_record or show_pic
+            for pic_id in PIC_ID_PATTERN.findall(
+                message.display_message or ("" if message.is_action_record else message.processed_plain_text) or ""
+            )
+        ]
+        if pic_ids:
+            pic_description_cache = get_image_manager().get_image_descriptions(pic_ids)
 
     # 创建时间戳到消息ID的映射，用于在消息前添加[id]标识符
     timestamp_to_id_mapping: Dict[float, str] = {}
@@ -409,33 +466,28 @@ def _build_readable_messages_internal(
             logger.warning("Content is None when processing pic IDs.")
             raise ValueError("Content is None")
 
-        # 匹配 [picid:xxxxx] 格式
-        pic_pattern = r"\[picid:([^\]]+)\]"
-
         def replace_pic_id(match: re.Match) -> str:
             nonlocal current_pic_counter
             nonlocal pic_counter
             pic_id = match.group(1)
             if pic_single:
-                if pic_id not in pic_description_cache:
-                    description = "内容正在阅读，请稍等"
-                    try:
-                        image = Images.get_or_none(Images.image_id == pic_id)
-                        if image and image.description:
-                            description = image.description
-                    except Exception:
-                        pass
-                    pic_description_cache[pic_id] = description
-                return f"[图片：{pic_description_cache[pic_id]}]"
+                return f"[图片：{pic_description_cache.get(pic_id, PIC_LOADING_DESCRIPTION)}]"
             if pic_id not in pic_id_mapping:
                 pic_id_mapping[pic_id] = f"图片{current_pic_counter}"
                 current_pic_counter += 1
 
             return f"[{pic_id_mapping[pic_id]}]"
 
-        return re.sub(pic_pattern, replace_pic_id, content)
+        # 匹配 [picid:xxxxx] 格式
+        return PIC_ID_PATTERN.sub(replace_pic_id, content)
 
     # 1: 获取发送者信息并提取消息组件
+    # 一次性批量加载窗口内所有发送者的用户信息
+    persons = resolve_persons(
+        (message.user_platform, message.user_id)
+        for message in messages
+        if not message.is_action_record and message.user_platform and message.user_id
+    )
     for message in messages:
         if message.is_action_record:
             # 对于动作记录，也处理图片ID
@@ -459,7 +511,7 @@ def _build_readable_messages_internal(
         if not all([platform, user_id, timestamp is not None]):
             continue
 
-        person = Person(platform=platform, user_id=user_id)
+        person = persons[(platform, user_id)]
         # 根据 replace_bot_name 参数决定是否替换机器人名称
         person_name = (
             person.person_name or f"{user_nickname}" or (f"昵称：{user_cardname}" if user_cardname else "某人")
@@ -470,10 +522,10 @@ def _build_readable_messages_internal(
         ):
             person_name = f"{global_config.bot.nickname}(你)"
 
-        # 使用独立函数处理用户引用格式
-        if content := replace_user_references(content, platform, replace_bot_name=replace_bot_name):
-            if getattr(message, "is_command", False):
-                content = f"[is_command=True] {content}"
+        # 处理用户引用格式（同一内容的渲染结果会被缓存）
+        if content := _rendered_content_cache.render(
+            content, platform, replace_bot_name, bool(getattr(message, "is_command", False))
+        ):
             detailed_messages_raw.append((timestamp, person_name, content, False))
 
     if not detailed_messages_raw:
@@ -519,9 +571,10 @@ def _build_readable_messages_internal(
 
     # 3: 格式化为字符串
     output_lines: List[str] = []
+    now = time.time()
 
     for timestamp, name, content, is_action in detailed_message:
-        readable_time = translate_timestamp_to_human_readable(timestamp, mode=timestamp_mode)
+        readable_time = translate_timestamp_to_human_readable(timestamp, mode=timestamp_mode, now=now)
 
         # 查找消息id（如果有）并构建id_prefix
         message_id = timestamp_to_id_mapping.get(timestamp, "")
@@ -564,17 +617,11 @@ def build_pic_mapping_info(pic_id_mapping: Dict[str, str]) -> str:
     # 按图片编号排序
     sorted_items = sorted(pic_id_mapping.items(), key=lambda x: int(x[1].replace("图片", "")))
 
-    for pic_id, display_name in sorted_items:
-        # 从数据库中获取图片描述
-        description = "内容正在阅读，请稍等"
-        try:
-            image = Images.get_or_none(Images.image_id == pic_id)
-            if image and image.description:
-                description = image.description
-        except Exception:
-            # 如果查询失败，保持默认描述
-            pass
+    # 一次性批量获取所有图片描述
+    descriptions = get_image_manager().get_image_descriptions(pic_id_mapping.keys())
 
+    for pic_id, display_name in sorted_items:
+        description = descriptions.get(pic_id, PIC_LOADING_DESCRIPTION)
         mapping_lines.append(f"[{display_name}] 的内容：{description}")
 
     return "\n".join(mapping_lines)
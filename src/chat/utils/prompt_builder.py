@@ -4,7 +4,9 @@ import contextvars
 
 from rich.traceback import install
 from contextlib import asynccontextmanager
-from typing import Dict, Any, Optional, List, Union
+from functools import lru_cache
+from string import Formatter
+from typing import Dict, Any, Optional, List, Mapping, Tuple, Union
 
 from src.common.logger import get_logger
 
@@ -12,6 +14,10 @@ install(extra_lines=3)
 
 logger = get_logger("prompt_build")
 
+PLACEHOLDER_PATTERN = re.compile(r"\{(.*?)}")
+COMPILED_TEMPLATE_CACHE_SIZE = 512  # 缓存的已编译模板数量上限
+_CONVERTERS = {"r": repr, "s": str, "a": ascii}
+
 
 class PromptContext:
     def __init__(self):
@@ -73,18 +79,17 @@ class PromptContext:
                     except Exception:
                         pass  # 静默忽略恢复失败
 
+    def get_prompt(self, name: str) -> Optional["Prompt"]:
+        """获取当前作用域中的提示模板（只读查找，不复制、不加锁）"""
+        current_context = self._current_context
+        if not current_context:
+            return None
+        scope = self._context_prompts.get(current_context)
+        return scope.get(name) if scope else None
+
     async def get_prompt_async(self, name: str) -> Optional["Prompt"]:
         """异步获取当前作用域中的提示模板"""
-        async with self._context_lock:
-            current_context = self._current_context
-            logger.debug(f"获取提示词: {name} 当前上下文: {current_context}")
-            if (
-                current_context
-                and current_context in self._context_prompts
-                and name in self._context_prompts[current_context]
-            ):
-                return self._context_prompts[current_context][name]
-            return None
+        return self.get_prompt(name)
 
     async def register_async(self, prompt: "Prompt", context_id: Optional[str] = None) -> None:
         """异步注册提示模板到指定作用域"""
@@ -98,7 +103,6 @@ class PromptManager:
         self._prompts = {}
         self._counter = 0
         self._context = PromptContext()
-        self._lock = asyncio.Lock()
 
     @asynccontextmanager
     async def async_message_scope(self, message_id: Optional[str] = None):
@@ -106,18 +110,20 @@ class PromptManager:
         async with self._context.async_scope(message_id):
             yield self
 
-    async def get_prompt_async(self, name: str) -> "Prompt":
+    def get_prompt(self, name: str) -> "Prompt":
+        """获取提示模板：当前上下文中注册的同名模板优先，否则使用全局模板"""
         # 首先尝试从当前上下文获取
-        context_prompt = await self._context.get_prompt_async(name)
+        context_prompt = self._context.get_prompt(name)
         if context_prompt is not None:
-            logger.debug(f"从上下文中获取提示词: {name} {context_prompt}")
             return context_prompt
         # 如果上下文中不存在，则使用全局提示模板
-        async with self._lock:
-            # logger.debug(f"从全局获取提示词: {name}")
-            if name not in self._prompts:
-                raise KeyError(f"Prompt '{name}' not found")
-            return self._prompts[name]
+        prompt = self._prompts.get(name)
+        if prompt is None:
+            raise KeyError(f"Prompt '{name}' not found")
+        return prompt
+
+    async def get_prompt_async(self, name: str) -> "Prompt":
+        return self.get_prompt(name)
 
     def generate_name(self, template: str) -> str:
         """为未命名的prompt生成名称"""
@@ -136,14 +142,67 @@ class PromptManager:
         return prompt
 
     async def format_prompt(self, name: str, **kwargs) -> str:
-        prompt = await self.get_prompt_async(name)
-        return prompt.format(**kwargs)
+        return self.get_prompt(name).format(**kwargs)
 
 
 # 全局单例
 global_prompt_manager = PromptManager()
 
 
+class CompiledTemplate:
+    """预编译的提示词模板
+
+    创建Prompt时解析一次：占位符列表（用于对应位置参数）与按str.format规则切分的
+    (字面文本, 字段名, 格式说明, 转换)片段列表，格式化时只需按片段拼接。
+    含属性/下标访问、自动编号或嵌套格式说明的字段时退回str.format。
+    """
+
+    __slots__ = ("processed", "args", "segments")
+
+    def __init__(self, processed: str):
+        """
+        Args:
+            processed: 已将转义花括号替换为临时标记的模板
+        """
+        self.processed = processed
+        # 位置参数按占位符首次出现的顺序对应
+        self.args: List[str] = list(dict.fromkeys(expr for expr in PLACEHOLDER_PATTERN.findall(processed) if expr))
+        self.segments: Optional[List[Tuple[str, Optional[str], str, Optional[str]]]] = None
+        try:
+            parsed = list(Formatter().parse(processed))
+        except ValueError:
+            # 模板本身不合法，格式化时由str.format报错
+            return
+        if all(
+            field_name is None or (field_name.isidentifier() and "{" not in format_spec)
+            for _, field_name, format_spec, _ in parsed
+        ):
+            self.segments = [
+                (Prompt._restore_escaped_braces(literal), field_name, format_spec, conversion)
+                for literal, field_name, format_spec, conversion in parsed
+            ]
+
+    def render(self, values: Mapping[str, Any]) -> str:
+        """以关键字参数填充模板（等价于str.format后还原转义花括号）"""
+        if self.segments is None:
+            return Prompt._restore_escaped_braces(self.processed.format(**values))
+        parts = []
+        for literal, field_name, format_spec, conversion in self.segments:
+            parts.append(literal)
+            if field_name is not None:
+                value = values[field_name]
+                if conversion:
+                    value = _CONVERTERS[conversion](value)
+                parts.append(format(value, format_spec))
+        return "".join(parts)
+
+
+@lru_cache(maxsize=COMPILED_TEMPLATE_CACHE_SIZE)
+def compile_template(processed: str) -> CompiledTemplate:
+    """编译模板（相同模板只编译一次）"""
+    return CompiledTemplate(processed)
+
+
 class Prompt(str):
     # 临时标记，作为类常量
     _TEMP_LEFT_BRACE = "__ESCAPED_LEFT_BRACE__"
@@ -171,26 +230,20 @@ class Prompt(str):
             args = list(args)
         should_register = kwargs.pop("_should_register", True)
 
-        # 预处理模板中的转义花括号
-        processed_fstr = cls._process_escaped_braces(fstr)
-
-        # 解析模板
-        template_args = []
-        result = re.findall(r"\{(.*?)}", processed_fstr)
-        for expr in result:
-            if expr and expr not in template_args:
-                template_args.append(expr)
+        # 预处理模板中的转义花括号并编译模板
+        compiled = compile_template(cls._process_escaped_braces(fstr))
 
         # 如果提供了初始参数，立即格式化
         if kwargs or args:
-            formatted = cls._format_template(fstr, args=args, kwargs=kwargs)
+            formatted = cls._format_compiled(compiled, fstr, args=args, kwargs=kwargs)
             obj = super().__new__(cls, formatted)
         else:
             obj = super().__new__(cls, "")
 
         obj.template = fstr
         obj.name = name
-        obj.args = template_args
+        obj._compiled = compiled
+        obj.args = compiled.args
         obj._args = args or []
         obj._kwargs = kwargs
 
@@ -211,16 +264,15 @@ class Prompt(str):
 
     @classmethod
     def _format_template(cls, template, args: List[Any] = None, kwargs: Dict[str, Any] = None) -> str:
-        # 预处理模板中的转义花括号
-        processed_template = cls._process_escaped_braces(template)
-
-        template_args = []
-        result = re.findall(r"\{(.*?)}", processed_template)
-        for expr in result:
-            if expr and expr not in template_args:
-                template_args.append(expr)
+        return cls._format_compiled(compile_template(cls._process_escaped_braces(template)), template, args, kwargs)
+
+    @staticmethod
+    def _format_compiled(
+        compiled: CompiledTemplate, template, args: List[Any] = None, kwargs: Dict[str, Any] = None
+    ) -> str:
+        template_args = compiled.args
         formatted_args = {}
-        formatted_kwargs = {}
+        formatted_kwargs = kwargs or {}
 
         # 处理位置参数
         if args:
@@ -238,8 +290,9 @@ class Prompt(str):
                     )
                     raise ValueError("格式化模板失败")
 
-        # 处理关键字参数
-        if kwargs:
+        # 处理关键字参数（只有存在嵌套Prompt时才复制参数字典）
+        if kwargs and any(isinstance(value, Prompt) for value in kwargs.values()):
+            formatted_kwargs = {}
             for key, value in kwargs.items():
                 if isinstance(value, Prompt):
                     remaining_kwargs = {k: v for k, v in kwargs.items() if k != key}
@@ -248,16 +301,13 @@ class Prompt(str):
                     formatted_kwargs[key] = value
 
         try:
-            # 先用位置参数格式化
-            if args:
-                processed_template = processed_template.format(**formatted_args)
-            # 再用关键字参数格式化
-            if kwargs:
+            if args and kwargs:
+                # 先用位置参数格式化，再用关键字参数格式化
+                processed_template = compiled.processed.format(**formatted_args)
                 processed_template = processed_template.format(**formatted_kwargs)
-
-            # 将临时标记还原为实际的花括号
-            result = cls._restore_escaped_braces(processed_template)
-            return result
+                # 将临时标记还原为实际的花括号
+                return Prompt._restore_escaped_braces(processed_template)
+            return compiled.render(formatted_args if args else formatted_kwargs)
         except (IndexError, KeyError) as e:
             raise ValueError(
                 f"格式化模板失败: {template}, args={formatted_args}, kwargs={formatted_kwargs} {str(e)}"
@@ -265,15 +315,11 @@ class Prompt(str):
 
     def format(self, *args, **kwargs) -> "str":
         """支持位置参数和关键字参数的格式化，使用"""
-        ret = type(self)(
-            self.template,
-            self.name,
-            args=list(args) if args else self._args,
-            _should_register=False,
-            **kwargs or self._kwargs,
-        )
-        # print(f"prompt build result: {ret} name: {ret.name} ")
-        return str(ret)
+        args = list(args) if args else self._args
+        kwargs = kwargs or self._kwargs
+        if not args and not kwargs:
+            return self.template
+        return self._format_compiled(self._compiled, self.template, args=args, kwargs=kwargs)
 
     def __str__(self) -> str:
         return super().__str__() if self._kwargs or self._args else self.template
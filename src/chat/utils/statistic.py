@@ -9,6 +9,7 @@ from typing import Any, Dict, Tuple, List
 from src.common.logger import get_logger
 from src.common.database.database import db
 from src.common.database.database_model import OnlineTime, LLMUsage, Messages
+from src.llm_models.utils import llm_usage_recorder
 from src.manager.async_task_manager import AsyncTask
 from src.manager.local_store_manager import local_storage
 from src.config.config import global_config
@@ -570,6 +571,9 @@ class StatisticOutputTask(AsyncTask):
         :param now: 基准当前时间
         """
 
+        # LLM使用记录由后台线程批量写入，统计前先写入队列中剩余的记录
+        llm_usage_recorder.flush()
+
         last_all_time_stat = None
 
         try:
@@ -347,18 +347,7 @@ def process_llm_response(text: str, enable_splitter: bool = True, enable_chinese
     if not global_config.response_post_process.enable_response_post_process:
         return [text]
 
-    # 先保护颜文字
-    if global_config.response_splitter.enable_kaomoji_protection:
-        protected_text, kaomoji_mapping = protect_kaomoji(text)
-        logger.debug(f"保护颜文字后的文本: {protected_text}")
-    else:
-        protected_text = text
-        kaomoji_mapping = {}
-    # 提取被 () 或 [] 或 （）包裹且包含中文的内容
-    pattern = re.compile(r"[(\[（](?=.*[一-鿿]).*?[)\]）]")
-    _extracted_contents = pattern.findall(protected_text)  # 在保护后的文本上查找
-    # 去除 () 和 [] 及其包裹的内容
-    cleaned_text = pattern.sub("", protected_text)
+    cleaned_text, kaomoji_mapping = _clean_llm_response(text)
 
     if cleaned_text == "":
         return ["呃呃"]
@@ -373,6 +362,45 @@ def process_llm_response(text: str, enable_splitter: bool = True, enable_chinese
         logger.warning(f"回复过长 ({len(cleaned_text)} 字符)，返回默认回复")
         return [_get_random_default_reply()]
 
+    sentences = _split_and_typo_sentences(cleaned_text, enable_splitter, enable_chinese_typo)
+
+    if len(sentences) > max_sentence_num:
+        if global_config.response_splitter.enable_overflow_return_all:
+            logger.warning(f"分割后消息数量过多 ({len(sentences)} 条)，直接返回原文")
+            sentences = [cleaned_text]
+        else:
+            logger.warning(f"分割后消息数量过多 ({len(sentences)} 条)，返回默认回复")
+            return [_get_random_default_reply()]
+
+    # if extracted_contents:
+    #     for content in extracted_contents:
+    #         sentences.append(content)
+
+    # 在所有句子处理完毕后，对包含占位符的列表进行恢复
+    if global_config.response_splitter.enable_kaomoji_protection:
+        sentences = recover_kaomoji(sentences, kaomoji_mapping)
+
+    return sentences
+
+
+def _clean_llm_response(text: str) -> Tuple[str, dict]:
+    """保护颜文字并去除括号内容，返回 (清理后的文本, 颜文字占位符映射)"""
+    # 先保护颜文字
+    if global_config.response_splitter.enable_kaomoji_protection:
+        protected_text, kaomoji_mapping = protect_kaomoji(text)
+        logger.debug(f"保护颜文字后的文本: {protected_text}")
+    else:
+        protected_text = text
+        kaomoji_mapping = {}
+    # 提取被 () 或 [] 或 （）包裹且包含中文的内容
+    pattern = re.compile(r"[(\[（](?=.*[一-鿿]).*?[)\]）]")
+    _extracted_contents = pattern.findall(protected_text)  # 在保护后的文本上查找
+    # 去除 () 和 [] 及其包裹的内容
+    return pattern.sub("", protected_text), kaomoji_mapping
+
+
+def _split_and_typo_sentences(cleaned_text: str, enable_splitter: bool, enable_chinese_typo: bool) -> List[str]:
+    """对清理后的文本进行分句与错别字处理"""
     typo_generator = ChineseTypoGenerator(
         error_rate=global_config.chinese_typo.error_rate,
         min_freq=global_config.chinese_typo.min_freq,
@@ -401,24 +429,151 @@ def process_llm_response(text: str, enable_splitter: bool = True, enable_chinese
                 sentences.append(typoed_text)
         else:
             sentences.append(sentence)
+    return sentences
 
-    if len(sentences) > max_sentence_num:
-        if global_config.response_splitter.enable_overflow_return_all:
-            logger.warning(f"分割后消息数量过多 ({len(sentences)} 条)，直接返回原文")
-            sentences = [cleaned_text]
-        else:
-            logger.warning(f"分割后消息数量过多 ({len(sentences)} 条)，返回默认回复")
-            return [_get_random_default_reply()]
 
-    # if extracted_contents:
-    #     for content in extracted_contents:
-    #         sentences.append(content)
+class StreamingResponseSplitter:
+    """
+    流式回复分句器，process_llm_response 的增量版本
 
-    # 在所有句子处理完毕后，对包含占位符的列表进行恢复
-    if global_config.response_splitter.enable_kaomoji_protection:
-        sentences = recover_kaomoji(sentences, kaomoji_mapping)
+    LLM 流式输出的增量文本通过 feed 送入，只在“安全”的分隔符处切分
+    （不在括号/颜文字内部、不在 <think> 推理块内），切出的片段按 process_llm_response
+    同样的规则进行颜文字保护、去括号、分句与错别字处理；生成结束后调用 finish 取出剩余句子。
 
-    return sentences
+    与一次性处理的差异：
+    - 句子数量将超过 max_sentence_num 时，剩余内容会在 finish 时合并为最后一条消息发出
+    - 回复超长时无法撤回已发送的句子，只会停止继续输出
+    """
+
+    SEPARATORS = {"，", ",", "。", ";", "\n"}
+    OPEN_BRACKETS = {"(", "[", "（", "【"}
+    CLOSE_BRACKETS = {")", "]", "）", "】"}
+    KAOMOJI_CHARS = set("▼▽・ᴥω･﹏^><≧≦￣｀´∀ヮДд︿﹀へ｡ﾟ╥╯╰︶︹•⁄")
+
+    def __init__(self, enable_splitter: bool = True, enable_chinese_typo: bool = True, min_chunk_length: int = 6):
+        self.enable_splitter = enable_splitter
+        self.enable_chinese_typo = enable_chinese_typo
+        self.min_chunk_length = min_chunk_length
+        self._buffer = ""
+        self._raw_text = ""
+        self._cleaned_length = 0
+        self._sentence_count = 0
+        self._held_texts: List[str] = []
+        self._stopped = False
+
+    @property
+    def raw_text(self) -> str:
+        """目前为止收到的完整原始文本"""
+        return self._raw_text
+
+    def feed(self, delta: str) -> List[str]:
+        """
+        送入增量文本
+        Args:
+            delta: LLM 输出的增量文本
+        Returns:
+            List[str]: 可以立即发送的句子
+        """
+        self._raw_text += delta
+        self._buffer += delta
+        if not global_config.response_post_process.enable_response_post_process:
+            # 不进行后处理时，整段回复在生成结束后一次性输出
+            return []
+        if not self._strip_reasoning():
+            return []
+        cut = self._find_safe_cut(self._buffer)
+        if cut <= 0:
+            return []
+        chunk, self._buffer = self._buffer[:cut], self._buffer[cut:]
+        return self._process_chunk(chunk, is_last=False)
+
+    def finish(self) -> List[str]:
+        """生成结束，取出剩余的句子"""
+        if not global_config.response_post_process.enable_response_post_process:
+            return [self._raw_text] if self._raw_text else []
+        self._strip_reasoning(finished=True)
+        chunk, self._buffer = self._buffer, ""
+        sentences = self._process_chunk(chunk, is_last=True)
+        if self._held_texts and not self._stopped:
+            # 最后的片段为空时，被暂存的内容同样需要输出
+            sentences.append("".join(self._held_texts).strip())
+            self._held_texts = []
+            self._sentence_count += 1
+        if not sentences and self._sentence_count == 0:
+            # 整段回复都被清理掉时，与 process_llm_response 保持一致
+            return ["呃呃"]
+        return sentences
+
+    def _strip_reasoning(self, finished: bool = False) -> bool:
+        """去除以 <think> 开头的推理块，返回缓冲区是否可以继续处理"""
+        stripped = self._buffer.lstrip()
+        if not stripped.startswith("<think>") and not (not finished and "<think>".startswith(stripped)):
+            return True
+        if "</think>" in stripped:
+            self._buffer = stripped.split("</think>", 1)[1].lstrip()
+            return True
+        if finished:
+            self._buffer = ""
+        return False
+
+    def _find_safe_cut(self, text: str) -> int:
+        """查找最后一个可以安全切分的位置（分隔符之后），找不到返回0"""
+        depth = 0
+        last_cut = 0
+        # 最后一个字符之后可能还会有颜文字/括号内容，因此不考虑以它为界
+        for i, char in enumerate(text[:-1]):
+            if char in self.OPEN_BRACKETS:
+                depth += 1
+            elif char in self.CLOSE_BRACKETS:
+                depth = max(0, depth - 1)
+            elif (
+                char in self.SEPARATORS
+                and depth == 0
+                and i + 1 >= self.min_chunk_length
+                and text[i + 1] not in self.KAOMOJI_CHARS
+                and (i == 0 or text[i - 1] not in self.KAOMOJI_CHARS)
+            ):
+                last_cut = i + 1
+        return last_cut
+
+    @staticmethod
+    def _recover(text: str, kaomoji_mapping: dict) -> str:
+        return recover_kaomoji([text], kaomoji_mapping)[0] if kaomoji_mapping else text
+
+    def _process_chunk(self, chunk: str, is_last: bool) -> List[str]:
+        """按照 process_llm_response 的规则处理一个安全片段"""
+        if self._stopped or not chunk.strip():
+            return []
+        cleaned_text, kaomoji_mapping = _clean_llm_response(chunk)
+        if not cleaned_text.strip():
+            return []
+
+        self._cleaned_length += len(cleaned_text)
+        max_length = global_config.response_splitter.max_length * 2
+        if get_western_ratio(cleaned_text) < 0.1 and self._cleaned_length > max_length:
+            logger.warning(f"流式回复过长 ({self._cleaned_length} 字符)，停止输出后续内容")
+            self._stopped = True
+            return []
+
+        max_sentence_num = global_config.response_splitter.max_sentence_num
+        # 始终为最后一条消息保留一个名额，用于合并无法再拆分的剩余内容
+        remaining = max_sentence_num - self._sentence_count - (0 if is_last else 1)
+        sentences: List[str] = []
+        if not self._held_texts:
+            sentences = _split_and_typo_sentences(cleaned_text, self.enable_splitter, self.enable_chinese_typo)
+        if self._held_texts or len(sentences) > remaining:
+            if not is_last:
+                self._held_texts.append(self._recover(cleaned_text, kaomoji_mapping))
+                return []
+            # 句子数量超出上限：剩余内容合并为一条发出
+            held_text, self._held_texts = "".join(self._held_texts), []
+            self._sentence_count += 1
+            return [(held_text + self._recover(cleaned_text, kaomoji_mapping)).strip()]
+
+        self._sentence_count += len(sentences)
+        if global_config.response_splitter.enable_kaomoji_protection:
+            sentences = recover_kaomoji(sentences, kaomoji_mapping)
+        return sentences
 
 
 def calculate_typing_time(
@@ -543,13 +698,14 @@ def get_western_ratio(paragraph):
     return western_count / len(alnum_chars)
 
 
-def translate_timestamp_to_human_readable(timestamp: float, mode: str = "normal") -> str:
+def translate_timestamp_to_human_readable(timestamp: float, mode: str = "normal", now: Optional[float] = None) -> str:
     # sourcery skip: merge-comparisons, merge-duplicate-blocks, switch
     """将时间戳转换为人类可读的时间格式
 
     Args:
         timestamp: 时间戳
         mode: 转换模式，"normal"为标准格式，"relative"为相对时间格式
+        now: 相对时间格式的参照时间，默认为当前时间（批量转换时传入同一值，避免逐条获取）
 
     Returns:
         str: 格式化后的时间字符串
@@ -559,7 +715,8 @@ def translate_timestamp_to_human_readable(timestamp: float, mode: str = "normal"
     elif mode == "normal_no_YMD":
         return time.strftime("%H:%M:%S", time.localtime(timestamp))
     elif mode == "relative":
-        now = time.time()
+        if now is None:
+            now = time.time()
         diff = now - timestamp
 
         if diff < 20:
@@ -4,9 +4,11 @@ import time
 import hashlib
 import uuid
 import io
+import threading
 import numpy as np
 
-from typing import Optional, Tuple
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
 from PIL import Image
 from rich.traceback import install
 
@@ -20,6 +22,9 @@ install(extra_lines=3)
 
 logger = get_logger("chat_image")
 
+IMAGE_DESCRIPTION_CACHE_SIZE = 4096  # 进程内缓存的picid -> 图片描述数量上限（LRU淘汰）
+IMAGE_QUERY_BATCH_SIZE = 500  # 批量查询时每条IN语句包含的picid数量上限（避免超出SQLite变量数限制）
+
 
 class ImageManager:
     _instance = None
@@ -37,6 +42,9 @@ class ImageManager:
 
             self._initialized = True
             self.vlm = LLMRequest(model_set=model_config.model_task_config.vlm, request_type="image")
+            # picid -> 图片描述的LRU缓存，只缓存已有描述的图片（描述生成后不再变化）
+            self._description_cache: OrderedDict[str, str] = OrderedDict()
+            self._description_cache_lock = threading.Lock()
 
             try:
                 db.connect(reuse_if_open=True)
@@ -56,6 +64,60 @@ class ImageManager:
 
             self._initialized = True
 
+    def _cache_image_description(self, image_id: str, description: str) -> None:
+        if not image_id or not description:
+            return
+        with self._description_cache_lock:
+            self._description_cache[image_id] = description
+            self._description_cache.move_to_end(image_id)
+            while len(self._description_cache) > IMAGE_DESCRIPTION_CACHE_SIZE:
+                self._description_cache.popitem(last=False)
+
+    def get_image_descriptions(self, image_ids: Iterable[str]) -> Dict[str, str]:
+        """批量获取picid对应的图片描述：优先读取缓存，其余以IN查询一次性加载
+
+        Args:
+            image_ids: 图片ID（picid）列表，可包含重复项
+
+        Returns:
+            Dict[str, str]: picid -> 描述，不存在或尚无描述的图片不在结果中
+        """
+        descriptions: Dict[str, str] = {}
+        missing = []
+        with self._description_cache_lock:
+            for image_id in dict.fromkeys(image_ids):
+                if image_id in self._description_cache:
+                    self._description_cache.move_to_end(image_id)
+                    descriptions[image_id] = self._description_cache[image_id]
+                else:
+                    missing.append(image_id)
+
+        for start in range(0, len(missing), IMAGE_QUERY_BATCH_SIZE):
+            batch = missing[start : start + IMAGE_QUERY_BATCH_SIZE]
+            try:
+                query = (
+                    Images.select(Images.image_id, Images.description)
+                    .where(Images.image_id.in_(batch))
+                    .order_by(Images.id)
+                )
+                found = set()
+                for image in query:
+                    # 与get_or_none一致，同一picid只取第一条记录
+                    if image.image_id in found:
+                        continue
+                    found.add(image.image_id)
+                    if image.description:
+                        descriptions[image.image_id] = image.description
+                        self._cache_image_description(image.image_id, image.description)
+            except Exception as e:
+                logger.error(f"批量查询图片描述失败: {e}")
+                break
+        return descriptions
+
+    def get_image_description_by_id(self, image_id: str) -> Optional[str]:
+        """获取picid对应的图片描述，不存在或尚无描述时返回None"""
+        return self.get_image_descriptions([image_id]).get(image_id)
+
     def _ensure_image_dir(self):
         """确保图像存储目录存在"""
         os.makedirs(self.IMAGE_DIR, exist_ok=True)
@@ -656,6 +718,7 @@ class ImageManager:
                 image.description = existing_with_description.description
                 image.vlm_processed = True
                 image.save()
+                self._cache_image_description(image_id, image.description)
                 # 同时保存到ImageDescriptions表作为备用缓存
                 self._save_description_to_db(image_hash, existing_with_description.description, "image")
                 return
@@ -666,6 +729,7 @@ class ImageManager:
                 image.description = cached_description
                 image.vlm_processed = True
                 image.save()
+                self._cache_image_description(image_id, cached_description)
                 return
 
             # 获取图片格式
@@ -691,6 +755,7 @@ class ImageManager:
             image.description = description
             image.vlm_processed = True
             image.save()
+            self._cache_image_description(image_id, description)
 
             # 保存描述到ImageDescriptions表作为备用缓存
             self._save_description_to_db(image_hash, description, "image")
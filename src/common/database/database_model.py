@@ -1,6 +1,8 @@
 from peewee import Model, DoubleField, IntegerField, BooleanField, TextField, FloatField, DateTimeField
 from .database import db
 import datetime
+import hashlib
+from typing import Optional
 from src.common.logger import get_logger
 
 logger = get_logger("database_model")
@@ -211,9 +213,10 @@ class Images(BaseModel):
     用于存储图像信息的模型。
     """
 
-    image_id = TextField(default="")  # 图片唯一ID
+    image_id = TextField(default="", index=True)  # 图片唯一ID
     emoji_hash = TextField(index=True)  # 图像的哈希值
     description = TextField(null=True)  # 图像的描述
+    description_hash = TextField(null=True, index=True)  # 描述的哈希值（按描述查找图片时使用，保存时自动计算）
     path = TextField(unique=True)  # 图像文件的路径
     # base64 = TextField()  # 图片的base64编码
     count = IntegerField(default=1)  # 图片被引用的次数
@@ -224,6 +227,15 @@ class Images(BaseModel):
     class Meta:
         table_name = "images"
 
+    @staticmethod
+    def hash_description(description: Optional[str]) -> Optional[str]:
+        """计算图片描述的哈希值，空描述返回None"""
+        return hashlib.md5(description.encode("utf-8")).hexdigest() if description else None
+
+    def save(self, *args, **kwargs):
+        self.description_hash = self.hash_description(self.description)
+        return super().save(*args, **kwargs)
+
 
 class ImageDescriptions(BaseModel):
     """
@@ -496,6 +508,12 @@ def initialize_database(sync_constraints=False):
                     except Exception as e:
                         logger.error(f"删除字段 '{field_name}' 失败: {e}")
 
+                # 补建模型中新增的索引（已存在的索引会被跳过）
+                try:
+                    model._schema.create_indexes(safe=True)
+                except Exception as e:
+                    logger.error(f"为表 '{table_name}' 创建索引失败: {e}")
+
         # 如果启用了约束同步，执行约束检查和修复
         if sync_constraints:
             logger.debug("开始同步数据库字段约束...")
@@ -757,6 +775,29 @@ def fix_image_id():
         logger.exception(f"修复 image_id 时出错: {e}")
 
 
+def fix_image_description_hash():
+    """
+    为旧的图片记录补全 description_hash 字段
+    """
+    try:
+        with db:
+            images = list(
+                Images.select(Images.id, Images.description).where(
+                    Images.description_hash.is_null(True)
+                    & Images.description.is_null(False)
+                    & (Images.description != "")
+                )
+            )
+            for img in images:
+                img.description_hash = Images.hash_description(img.description)
+            if images:
+                Images.bulk_update(images, fields=[Images.description_hash], batch_size=500)
+                logger.info(f"已为 {len(images)} 条图片记录补全 description_hash")
+    except Exception as e:
+        logger.exception(f"补全图片 description_hash 时出错: {e}")
+
+
 # 模块加载时调用初始化函数
 initialize_database(sync_constraints=True)
 fix_image_id()
+fix_image_description_hash()
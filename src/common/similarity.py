@@ -0,0 +1,320 @@
+"""
+相似度工具函数
+
+集中提供各模块共用的相似度计算：
+- 向量：numpy批量余弦相似度与TopK
+- 字符串：位并行（Myers/Hyyrö）编辑距离，支持一个查询对多个候选
+- 动态TopK选择（LPMM检索结果过滤）
+"""
+
+import difflib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# ---------------------------------------------------------------------------
+# 向量相似度
+# ---------------------------------------------------------------------------
+
+
+def cosine_similarity(a: Sequence[float] | np.ndarray, b: Sequence[float] | np.ndarray) -> float:
+    """计算两个向量的余弦相似度（任一为零向量时返回0）"""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    norm = np.linalg.norm(a) * np.linalg.norm(b)
+    if norm == 0:
+        return 0.0
+    return float(np.dot(a, b) / norm)
+
+
+def paired_cosine_similarity(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    逐行计算两个矩阵对应行的余弦相似度
+
+    Args:
+        a: N×D矩阵
+        b: N×D矩阵
+
+    Returns:
+        长度为N的相似度数组（零向量所在行为0）
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    dots = np.einsum("ij,ij->i", a, b)
+    return np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+
+
+def cosine_similarity_matrix(queries: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    """
+    计算每个查询向量与每个候选向量的余弦相似度
+
+    Args:
+        queries: Q×D矩阵（或长度为D的单个向量）
+        candidates: N×D矩阵
+
+    Returns:
+        Q×N相似度矩阵（单个查询向量时为长度N的数组）
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    candidates = np.asarray(candidates, dtype=np.float32)
+    single = queries.ndim == 1
+    queries = np.atleast_2d(queries)
+    query_norms = np.linalg.norm(queries, axis=1, keepdims=True)
+    candidate_norms = np.linalg.norm(candidates, axis=1)
+    norms = query_norms * candidate_norms[np.newaxis, :]
+    dots = queries @ candidates.T
+    sims = np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+    return sims[0] if single else sims
+
+
+def top_k_cosine(query: np.ndarray, candidates: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """
+    检索与查询向量最相似的k个候选向量
+
+    Args:
+        query: 长度为D的查询向量
+        candidates: N×D候选矩阵
+        k: 返回数量
+
+    Returns:
+        按相似度降序排列的(候选行号, 相似度)列表
+    """
+    if k <= 0 or len(candidates) == 0:
+        return []
+    sims = cosine_similarity_matrix(query, candidates)
+    if k < len(sims):
+        top_idx = np.argpartition(-sims, k)[:k]
+    else:
+        top_idx = np.arange(len(sims))
+    top_idx = top_idx[np.argsort(-sims[top_idx], kind="stable")]
+    return [(int(idx), float(sims[idx])) for idx in top_idx]
+
+
+# ---------------------------------------------------------------------------
+# 字符串相似度
+# ---------------------------------------------------------------------------
+
+
+def _pattern_bitmasks(pattern: str) -> Dict[str, int]:
+    """为模式串的每个字符生成出现位置的位掩码（第i位为1表示pattern[i]为该字符）"""
+    peq: Dict[str, int] = {}
+    for i, char in enumerate(pattern):
+        peq[char] = peq.get(char, 0) | (1 << i)
+    return peq
+
+
+def _bit_parallel_distance(peq: Dict[str, int], pattern_len: int, text: str) -> int:
+    """Myers/Hyyrö位并行编辑距离：以Python大整数作为位向量，逐字符扫描text，复杂度O(len(text)·⌈m/64⌉)"""
+    full = (1 << pattern_len) - 1
+    last_bit = 1 << (pattern_len - 1)
+    pv = full  # 纵向差值+1的位置
+    mv = 0  # 纵向差值-1的位置
+    score = pattern_len
+    for char in text:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & last_bit:
+            score += 1
+        elif mh & last_bit:
+            score -= 1
+        # 第0行的横向差值恒为+1（全局编辑距离），移位时补1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+    return score
+
+
+def levenshtein_distance(s1: str, s2: str) -> int:
+    """
+    计算两个字符串的编辑距离
+
+    Args:
+        s1: 第一个字符串
+        s2: 第二个字符串
+
+    Returns:
+        int: 编辑距离
+    """
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    if not s2:
+        return len(s1)
+    # 较短的串作为模式串，位向量更短
+    return _bit_parallel_distance(_pattern_bitmasks(s2), len(s2), s1)
+
+
+def levenshtein_distances(query: str, candidates: Iterable[str]) -> List[int]:
+    """
+    计算一个查询串与多个候选串的编辑距离（查询串的位掩码只生成一次）
+
+    Args:
+        query: 查询串
+        candidates: 候选串
+
+    Returns:
+        与候选串一一对应的编辑距离列表
+    """
+    if not query:
+        return [len(candidate) for candidate in candidates]
+    peq = _pattern_bitmasks(query)
+    return [_bit_parallel_distance(peq, len(query), candidate) for candidate in candidates]
+
+
+def _distance_to_similarity(distance: int, len1: int, len2: int) -> float:
+    max_len = max(len1, len2)
+    return 1 - (distance / max_len if max_len > 0 else 0)
+
+
+def string_similarity(s1: str, s2: str) -> float:
+    """
+    基于编辑距离的字符串相似度：1 - 编辑距离 / 较长串长度
+
+    Args:
+        s1: 第一个字符串
+        s2: 第二个字符串
+
+    Returns:
+        float: 相似度，范围0-1，1表示完全相同
+    """
+    if s1 == s2:
+        return 1.0
+    if not s1 or not s2:
+        return 0.0
+    return _distance_to_similarity(levenshtein_distance(s1, s2), len(s1), len(s2))
+
+
+def string_similarities(query: str, candidates: Sequence[str]) -> List[float]:
+    """
+    计算一个查询串与多个候选串的相似度（定义同string_similarity）
+
+    Args:
+        query: 查询串
+        candidates: 候选串
+
+    Returns:
+        与候选串一一对应的相似度列表
+    """
+    distances = levenshtein_distances(query, candidates)
+    return [
+        1.0
+        if candidate == query
+        else 0.0
+        if not query or not candidate
+        else _distance_to_similarity(distance, len(query), len(candidate))
+        for candidate, distance in zip(candidates, distances, strict=True)
+    ]
+
+
+def sequence_similarity(text1: str, text2: str) -> float:
+    """
+    基于最长匹配块的文本相似度（difflib.SequenceMatcher.ratio），返回0-1之间的值
+
+    Args:
+        text1: 第一个文本
+        text2: 第二个文本
+
+    Returns:
+        float: 相似度值，范围0-1
+    """
+    return difflib.SequenceMatcher(None, text1, text2).ratio()
+
+
+def find_first_similar(query: str, candidates: Iterable[str], threshold: float) -> Optional[int]:
+    """
+    查找第一个与查询文本的sequence_similarity达到阈值的候选
+
+    查询文本只预处理一次，并先以长度与字符计数给出的相似度上界剪枝，结果与逐个计算ratio()相同
+
+    Args:
+        query: 查询文本
+        candidates: 候选文本
+        threshold: 相似度阈值
+
+    Returns:
+        第一个达到阈值的候选下标，均未达到时返回None
+    """
+    matcher = difflib.SequenceMatcher(None)
+    # SequenceMatcher缓存第二个序列的预处理结果，因此把查询文本放在第二个位置
+    matcher.set_seq2(query)
+    for idx, candidate in enumerate(candidates):
+        matcher.set_seq1(candidate)
+        if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+            continue
+        if matcher.ratio() >= threshold:
+            return idx
+    return None
+
+
+def length_ratio(query: str, target: str) -> float:
+    """
+    查询词长度占目标字符串长度的比例（用于已确认包含关系的模糊匹配）
+
+    Args:
+        query: 查询词
+        target: 目标字符串
+
+    Returns:
+        float: 相似度比例（0.0-1.0），查询词长度 / 目标字符串长度
+    """
+    if not query or not target:
+        return 0.0
+    return len(query) / len(target)
+
+
+# ---------------------------------------------------------------------------
+# 动态TopK
+# ---------------------------------------------------------------------------
+
+
+def dyn_select_top_k(
+    score: List[Tuple[Any, float]], jmp_factor: float, var_factor: float
+) -> List[Tuple[Any, float, float]]:
+    """
+    动态TopK选择：将分数归一化后，以跳变点与均值方差构造动态阈值，保留显著高于阈值的结果
+
+    Args:
+        score: (项, 分数)列表
+        jmp_factor: 跳变阈值的权重
+        var_factor: 方差的权重
+
+    Returns:
+        按分数降序排列的(项, 分数, 归一化分数)列表；分数全部相同时保留所有结果
+    """
+    if not score:
+        return []
+
+    scores = np.fromiter((item[1] for item in score), dtype=np.float64, count=len(score))
+    # 按照分数排序（降序，稳定）
+    order = np.argsort(-scores, kind="stable")
+    sorted_scores = scores[order]
+
+    # 归一化
+    max_score = sorted_scores[0]
+    min_score = sorted_scores[-1]
+    if max_score == min_score:
+        # 没有显著差异，保留所有结果
+        return [(score[idx][0], score[idx][1], 1.0) for idx in order]
+    normalized = (sorted_scores - min_score) / (max_score - min_score)
+
+    # 寻找跳变点：score变化最大的位置（下标0处与末项比较，取首个最大值）
+    jumps = np.empty_like(normalized)
+    jumps[0] = abs(normalized[0] - normalized[-1])
+    jumps[1:] = np.abs(np.diff(normalized))
+    jump_threshold = normalized[int(np.argmax(jumps))]
+
+    # 均值与方差
+    mean_score = normalized.mean()
+    var_score = normalized.var()
+
+    # 动态阈值
+    threshold = jmp_factor * jump_threshold + (1 - jmp_factor) * (mean_score + var_factor * var_score)
+
+    # 重新过滤
+    keep = np.flatnonzero(normalized > threshold)
+    return [(score[order[i]][0], score[order[i]][1], float(normalized[i])) for i in keep]
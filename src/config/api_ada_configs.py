@@ -91,6 +91,24 @@ class TaskConfig(ConfigBase):
     slow_threshold: float = 15.0
     """慢请求阈值（秒），超过此值会输出警告日志"""
 
+    enable_hedging: bool = False
+    """是否启用对冲请求（首选模型超过动态阈值仍未返回时，向下一个模型并发发送相同请求，取先完成者）"""
+
+    hedge_percentile: float = 0.9
+    """对冲触发阈值使用的历史耗时分位数（如0.9即p90）"""
+
+    hedge_min_delay: float = 2.0
+    """对冲触发的最短等待时间（秒），避免阈值过低导致请求量翻倍"""
+
+    coalesce_requests: bool = False
+    """是否合并进行中的相同请求（后来者直接共享同一次调用的结果）；输出随机的任务合并后不同调用方会拿到相同回复，仅建议输出确定的任务开启。嵌入请求始终合并"""
+
+    response_cache_ttl: float = 0.0
+    """响应缓存有效期（秒），0为不启用；相同模型列表、提示词与温度的请求在有效期内直接复用结果，仅建议输出确定的工具类任务开启"""
+
+    response_cache_size: int = 256
+    """响应缓存的最大条目数，超出时淘汰最久未使用的条目"""
+
 
 @dataclass
 class ModelTaskConfig(ConfigBase):
@@ -573,6 +573,9 @@ class ResponseSplitterConfig(ConfigBase):
     enable_overflow_return_all: bool = False
     """是否在超出句子数量限制时合并后一次性返回"""
 
+    enable_stream_send: bool = False
+    """是否启用流式发送（回复模型边生成边分句发送，缩短首条消息的等待时间）"""
+
 
 @dataclass
 class TelemetryConfig(ConfigBase):
@@ -707,6 +710,54 @@ class LPMMKnowledgeConfig(ConfigBase):
     embedding_dimension: int = 1024
     """嵌入向量维度，应该与模型的输出维度一致"""
 
+    faiss_index_type: Literal["flat", "ivf_flat", "hnsw", "ivf_pq"] = "flat"
+    """向量索引类型：flat精确暴力检索，ivf_flat倒排近似检索，hnsw图近似检索，ivf_pq倒排+乘积量化（最省内存）"""
+
+    faiss_ivf_nlist: int = 0
+    """IVF索引的聚类中心数，0为按向量数自动设置（约4*sqrt(N)）"""
+
+    faiss_ivf_nprobe: int = 16
+    """IVF索引检索时访问的聚类数，越大召回越高、速度越慢"""
+
+    faiss_hnsw_m: int = 32
+    """HNSW索引每个节点的邻居数"""
+
+    faiss_hnsw_ef_search: int = 64
+    """HNSW索引检索时的候选队列长度，越大召回越高、速度越慢"""
+
+    faiss_pq_m: int = 64
+    """IVF-PQ索引的子量化器数量，需能整除嵌入维度"""
+
+    faiss_pq_nbits: int = 8
+    """IVF-PQ索引每个子量化器的编码位数"""
+
+    faiss_scalar_quantizer: Literal["none", "fp16", "int8"] = "none"
+    """flat/ivf_flat/hnsw索引内向量的标量量化：none不量化，fp16半精度（内存减半），int8标量量化（内存约1/4）"""
+
+    embedding_storage_dtype: Literal["float32", "float16"] = "float32"
+    """嵌入矩阵文件（及其映射）的存储精度，float16可减半磁盘与内存占用（修改后加载时自动转换）"""
+
+    qa_bm25_enable: bool = False
+    """是否启用段落BM25关键词检索，并与向量检索结果按倒数排名融合（RRF）"""
+
+    qa_bm25_search_top_k: int = 100
+    """BM25检索返回的段落数"""
+
+    qa_rrf_k: int = 60
+    """RRF平滑常数，越大则排名靠后的结果权重衰减越慢"""
+
+    qa_cache_ttl: float = 300.0
+    """知识查询结果缓存的有效期（秒），0为不缓存；嵌入库或KG变化时缓存立即失效"""
+
+    qa_cache_max_size: int = 256
+    """知识查询结果缓存的最大条数"""
+
+    qa_cache_similarity_threshold: float = 0.97
+    """问题嵌入与已缓存问题的余弦相似度达到该值时，视为同一问题直接复用缓存结果"""
+
+    warm_up_wait_timeout: float = 5.0
+    """知识库在后台加载时，知识查询最多等待的秒数（超时则提示知识库正在加载）"""
+
 
 @dataclass
 class JargonConfig(ConfigBase):
@@ -1,5 +1,4 @@
 import re
-import difflib
 import random
 from datetime import datetime
 from typing import Optional, List, Dict
@@ -30,21 +29,6 @@ def filter_message_content(content: Optional[str]) -> str:
     return content.strip()
 
 
-def calculate_similarity(text1: str, text2: str) -> float:
-    """
-    计算两个文本的相似度，返回0-1之间的值
-    使用SequenceMatcher计算相似度
-
-    Args:
-        text1: 第一个文本
-        text2: 第二个文本
-
-    Returns:
-        float: 相似度值，范围0-1
-    """
-    return difflib.SequenceMatcher(None, text1, text2).ratio()
-
-
 def format_create_date(timestamp: float) -> str:
     """
     将时间戳格式化为可读的日期字符串
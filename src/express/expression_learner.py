@@ -16,7 +16,8 @@ from src.chat.utils.chat_message_builder import (
 )
 from src.chat.utils.prompt_builder import Prompt, global_prompt_manager
 from src.chat.message_receive.chat_stream import get_chat_manager
-from src.express.express_utils import filter_message_content, calculate_similarity
+from src.express.express_utils import filter_message_content
+from src.common.similarity import find_first_similar
 from json_repair import repair_json
 
 
@@ -449,12 +450,7 @@ class ExpressionLearner:
         filtered_with_up: List[Tuple[str, str, str, str]] = []  # (situation, style, context, up_content)
         for situation, style, context in matched_expressions:
             # 在 bare_lines 中找到第一处相似度达到85%的行
-            pos = None
-            for i, (_, c) in enumerate(bare_lines):
-                similarity = calculate_similarity(c, context)
-                if similarity >= 0.85:  # 85%相似度阈值
-                    pos = i
-                    break
+            pos = find_first_similar(context, (c for _, c in bare_lines), 0.85)
 
             if pos is None or pos == 0:
                 # 没有匹配到目标句或没有上一句，跳过该表达
@@ -0,0 +1,140 @@
+"""
+图片压缩的纯计算部分
+
+仅依赖PIL与标准库，便于在进程池的子进程中执行；日志由调用方在主进程中输出
+"""
+
+import base64
+import io
+import traceback
+
+from PIL import Image
+
+LogLines = list[tuple[str, str]]
+"""[(日志级别, 日志内容), ...]"""
+
+
+def reformat_static_image(image_data: bytes, logs: LogLines) -> bytes:
+    """
+    将静态图片转换为JPEG格式
+    :param image_data: 图片数据
+    :param logs: 日志收集列表
+    :return: 转换后的图片数据
+    """
+    try:
+        image = Image.open(io.BytesIO(image_data))
+
+        # 仅在非动图时进行格式转换
+        if (
+            not getattr(image, "is_animated", False)
+            and image.format
+            and (image.format.upper() in ["JPEG", "JPG", "PNG", "WEBP"])
+        ):
+            reformated_image_data = io.BytesIO()
+            img_to_save = image
+            if img_to_save.mode in ("RGBA", "LA", "P"):
+                img_to_save = img_to_save.convert("RGB")
+            img_to_save.save(reformated_image_data, format="JPEG", quality=95, optimize=True)
+            image_data = reformated_image_data.getvalue()
+
+        return image_data
+    except Exception as e:
+        logs.append(("error", f"图片转换格式失败: {str(e)}"))
+        return image_data
+
+
+def rescale_image(
+    image_data: bytes, scale: float, logs: LogLines
+) -> tuple[bytes, tuple[int, int] | None, tuple[int, int] | None]:
+    """
+    缩放图片
+    :param image_data: 图片数据
+    :param scale: 缩放比例
+    :param logs: 日志收集列表
+    :return: 缩放后的图片数据
+    """
+    try:
+        image = Image.open(io.BytesIO(image_data))
+
+        # 原始尺寸
+        original_size = (image.width, image.height)
+
+        # 计算新的尺寸，防止为0
+        new_w = max(1, int(original_size[0] * scale))
+        new_h = max(1, int(original_size[1] * scale))
+        new_size = (new_w, new_h)
+
+        output_buffer = io.BytesIO()
+
+        if getattr(image, "is_animated", False):
+            # 动态图片，处理所有帧
+            frames = []
+            new_size = (max(1, new_size[0] // 2), max(1, new_size[1] // 2))  # 动图，缩放尺寸再打折
+            for frame_idx in range(getattr(image, "n_frames", 1)):
+                image.seek(frame_idx)
+                new_frame = image.copy()
+                new_frame = new_frame.resize(new_size, Image.Resampling.LANCZOS)
+                frames.append(new_frame)
+
+            # 保存到缓冲区
+            frames[0].save(
+                output_buffer,
+                format="GIF",
+                save_all=True,
+                append_images=frames[1:],
+                optimize=True,
+                duration=image.info.get("duration", 100),
+                loop=image.info.get("loop", 0),
+            )
+        else:
+            if image.format == "JPEG":
+                # JPEG草稿模式：解码时直接按1/2、1/4、1/8缩小，不必完整解码大图
+                image.draft("RGB", new_size)
+            # reducing_gap: 先用reduce()做整数倍快速缩小，再用LANCZOS缩放到目标尺寸
+            resized_image = image.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+            if resized_image.mode in ("RGBA", "LA", "P"):
+                resized_image = resized_image.convert("RGB")
+            resized_image.save(output_buffer, format="JPEG", quality=95, optimize=True)
+
+        return output_buffer.getvalue(), original_size, new_size
+
+    except Exception as e:
+        logs.append(("error", f"图片缩放失败: {str(e)}\n{traceback.format_exc()}"))
+        return image_data, None, None
+
+
+def compress_base64_image(base64_data: str, target_size: int = 1 * 1024 * 1024) -> tuple[str, LogLines]:
+    """
+    压缩base64编码的图片至目标大小以内
+    :param base64_data: 图片的base64编码
+    :param target_size: 目标大小（base64编码后的长度）
+    :return: (压缩后的base64编码, 日志列表)
+    """
+    logs: LogLines = []
+    original_b64_data_size = len(base64_data)  # 计算原始数据大小
+
+    image_data = base64.b64decode(base64_data)
+
+    # 先尝试转换格式为JPEG
+    image_data = reformat_static_image(image_data, logs)
+    base64_data = base64.b64encode(image_data).decode("utf-8")
+    if len(base64_data) <= target_size:
+        # 如果转换后小于目标大小，直接返回
+        logs.append(("info", f"成功将图片转为JPEG格式，编码后大小: {len(base64_data) / 1024:.1f}KB"))
+        return base64_data, logs
+
+    # 如果转换后仍然大于目标大小，进行尺寸压缩
+    scale = min(1.0, target_size / len(base64_data))
+    image_data, original_size, new_size = rescale_image(image_data, scale, logs)
+    base64_data = base64.b64encode(image_data).decode("utf-8")
+
+    if original_size and new_size:
+        logs.append(
+            (
+                "info",
+                f"压缩图片: {original_size[0]}x{original_size[1]} -> {new_size[0]}x{new_size[1]}\n"
+                f"压缩前大小: {original_b64_data_size / 1024:.1f}KB, 压缩后大小: {len(base64_data) / 1024:.1f}KB",
+            )
+        )
+
+    return base64_data, logs
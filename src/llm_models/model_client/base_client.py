@@ -1,7 +1,7 @@
 import asyncio
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
-from typing import Callable, Any, Optional
+from typing import Callable, Any, Coroutine, Optional
 
 from src.config.api_ada_configs import ModelInfo, APIProvider
 from ..payload_content.message import Message
@@ -49,6 +49,9 @@ class APIResponse:
     embedding: list[float] | None = None
     """嵌入向量"""
 
+    embeddings: list[list[float]] | None = None
+    """批量嵌入向量（与输入顺序一致）"""
+
     usage: UsageRecord | None = None
     """使用情况 (prompt_tokens, completion_tokens, total_tokens)"""
 
@@ -81,6 +84,7 @@ class BaseClient(ABC):
         async_response_parser: Callable[[Any], tuple[APIResponse, tuple[int, int, int]]] | None = None,
         interrupt_flag: asyncio.Event | None = None,
         extra_params: dict[str, Any] | None = None,
+        content_delta_callback: Callable[[str], Coroutine[Any, Any, None]] | None = None,
     ) -> APIResponse:
         """
         获取对话响应
@@ -93,6 +97,7 @@ class BaseClient(ABC):
         :param stream_response_handler: 流式响应处理函数（可选）
         :param async_response_parser: 响应解析函数（可选）
         :param interrupt_flag: 中断信号量（可选，默认为None）
+        :param content_delta_callback: 正式内容增量回调（可选，提供时强制使用流式请求）
         :return: (响应文本, 推理文本, 工具调用, 其他数据)
         """
         raise NotImplementedError("'get_response' method should be overridden in subclasses")
@@ -112,6 +117,33 @@ class BaseClient(ABC):
         """
         raise NotImplementedError("'get_embedding' method should be overridden in subclasses")
 
+    async def get_embeddings(
+        self,
+        model_info: ModelInfo,
+        embedding_inputs: list[str],
+        extra_params: dict[str, Any] | None = None,
+    ) -> APIResponse:
+        """
+        批量获取文本嵌入（默认逐条并发请求，支持批量输入的客户端应覆盖此方法）
+        :param model_info: 模型信息
+        :param embedding_inputs: 嵌入输入文本列表
+        :return: 嵌入响应（embeddings与输入顺序一致）
+        """
+        responses = await asyncio.gather(
+            *(self.get_embedding(model_info, embedding_input, extra_params) for embedding_input in embedding_inputs)
+        )
+        response = APIResponse(embeddings=[resp.embedding or [] for resp in responses])
+        usages = [resp.usage for resp in responses if resp.usage]
+        if usages:
+            response.usage = UsageRecord(
+                model_name=model_info.name,
+                provider_name=model_info.api_provider,
+                prompt_tokens=sum(usage.prompt_tokens for usage in usages),
+                completion_tokens=sum(usage.completion_tokens for usage in usages),
+                total_tokens=sum(usage.total_tokens for usage in usages),
+            )
+        return response
+
     @abstractmethod
     async def get_audio_transcriptions(
         self,
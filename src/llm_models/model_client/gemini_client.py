@@ -1,4 +1,5 @@
 import asyncio
+import functools
 import io
 import base64
 from typing import Callable, AsyncIterator, Optional, Coroutine, Any, List, Dict
@@ -276,10 +277,12 @@ def _build_stream_api_resp(
 async def _default_stream_response_handler(
     resp_stream: AsyncIterator[GenerateContentResponse],
     interrupt_flag: asyncio.Event | None,
+    content_delta_callback: Callable[[str], Coroutine[Any, Any, None]] | None = None,
 ) -> tuple[APIResponse, Optional[tuple[int, int, int]]]:
     """
     流式响应处理函数 - 处理Gemini API的流式响应
     :param resp_stream: 流式响应对象,是一个神秘的iterator，我完全不知道这个玩意能不能跑，不过遍历一遍之后它就空了，如果跑不了一点的话可以考虑改成别的东西
+    :param content_delta_callback: 正式内容增量回调（可选），每收到新的正式内容即以增量文本调用
     :return: APIResponse对象
     """
     _fc_delta_buffer = io.StringIO()  # 正式内容缓冲区，用于存储接收到的正式内容
@@ -287,6 +290,7 @@ async def _default_stream_response_handler(
     _usage_record = None  # 使用情况记录
     last_resp: GenerateContentResponse | None = None  # 保存最后一个 chunk
     resp = APIResponse()
+    _fc_delivered_len = 0  # 已通过回调输出的正式内容长度
 
     def _insure_buffer_closed():
         if _fc_delta_buffer and not _fc_delta_buffer.closed:
@@ -306,6 +310,12 @@ async def _default_stream_response_handler(
             resp=resp,
         )
 
+        if content_delta_callback and _fc_delta_buffer.tell() > _fc_delivered_len:
+            # 将新增的正式内容交给回调（thought 不会输出）
+            new_content = _fc_delta_buffer.getvalue()[_fc_delivered_len:]
+            _fc_delivered_len = _fc_delta_buffer.tell()
+            await content_delta_callback(new_content)
+
         if chunk.usage_metadata:
             # 如果有使用情况，则将其存储在APIResponse对象中
             _usage_record = (
@@ -516,6 +526,7 @@ class GeminiClient(BaseClient):
         ] = None,
         interrupt_flag: asyncio.Event | None = None,
         extra_params: dict[str, Any] | None = None,
+        content_delta_callback: Callable[[str], Coroutine[Any, Any, None]] | None = None,
     ) -> APIResponse:
         """
         获取对话响应
@@ -529,11 +540,16 @@ class GeminiClient(BaseClient):
             stream_response_handler: 流式响应处理函数（可选，默认为default_stream_response_handler）
             async_response_parser: 响应解析函数（可选，默认为default_response_parser）
             interrupt_flag: 中断信号量（可选，默认为None）
+            content_delta_callback: 正式内容增量回调（可选，提供时强制使用流式请求）
         Returns:
             APIResponse对象，包含响应内容、推理内容、工具调用等信息
         """
         if stream_response_handler is None:
             stream_response_handler = _default_stream_response_handler
+            if content_delta_callback:
+                stream_response_handler = functools.partial(
+                    _default_stream_response_handler, content_delta_callback=content_delta_callback
+                )
 
         if async_response_parser is None:
             async_response_parser = _default_normal_response_parser
@@ -590,7 +606,7 @@ class GeminiClient(BaseClient):
         generation_config = GenerateContentConfig(**generation_config_dict)
 
         try:
-            if model_info.force_stream_mode:
+            if model_info.force_stream_mode or content_delta_callback:
                 req_task = asyncio.create_task(
                     self.client.aio.models.generate_content_stream(
                         model=model_info.model_identifier,
@@ -631,8 +647,8 @@ class GeminiClient(BaseClient):
         ) as e:
             # 工具调用相关错误
             raise RespParseException(None, f"工具调用参数错误: {str(e)}") from None
-        except EmptyResponseException as e:
-            # 保持原始异常，便于区分“空响应”和网络异常
+        except (EmptyResponseException, ReqAbortException) as e:
+            # 保持原始异常，便于区分“空响应”/“主动中断”和网络异常
             raise e
         except Exception as e:
             # 其他未预料的错误，才归为网络连接类
@@ -691,6 +707,45 @@ class GeminiClient(BaseClient):
 
         return response
 
+    async def get_embeddings(
+        self,
+        model_info: ModelInfo,
+        embedding_inputs: list[str],
+        extra_params: dict[str, Any] | None = None,
+    ) -> APIResponse:
+        """
+        批量获取文本嵌入（单次请求）
+        :param model_info: 模型信息
+        :param embedding_inputs: 嵌入输入文本列表
+        :return: 嵌入响应（embeddings与输入顺序一致）
+        """
+        try:
+            raw_response: EmbedContentResponse = await self.client.aio.models.embed_content(
+                model=model_info.model_identifier,
+                contents=embedding_inputs,
+                config=EmbedContentConfig(task_type="SEMANTIC_SIMILARITY"),
+            )
+        except (ClientError, ServerError) as e:
+            # 重封装ClientError和ServerError为RespNotOkException
+            raise RespNotOkException(e.code) from None
+        except Exception as e:
+            raise NetworkConnectionError() from e
+
+        if not raw_response.embeddings or len(raw_response.embeddings) != len(embedding_inputs):
+            raise RespParseException(raw_response, "响应解析失败，embeddings数量与输入数量不一致")
+
+        response = APIResponse(embeddings=[embedding.values or [] for embedding in raw_response.embeddings])
+        input_length = sum(len(embedding_input) for embedding_input in embedding_inputs)
+        response.usage = UsageRecord(
+            model_name=model_info.name,
+            provider_name=model_info.api_provider,
+            prompt_tokens=input_length,
+            completion_tokens=0,
+            total_tokens=input_length,
+        )
+
+        return response
+
     async def get_audio_transcriptions(
         self,
         model_info: ModelInfo,
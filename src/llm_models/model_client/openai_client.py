@@ -1,4 +1,5 @@
 import asyncio
+import functools
 import io
 import json
 import re
@@ -271,10 +272,12 @@ def _build_stream_api_resp(
 async def _default_stream_response_handler(
     resp_stream: AsyncStream[ChatCompletionChunk],
     interrupt_flag: asyncio.Event | None,
+    content_delta_callback: Callable[[str], Coroutine[Any, Any, None]] | None = None,
 ) -> tuple[APIResponse, Optional[tuple[int, int, int]]]:
     """
     流式响应处理函数 - 处理OpenAI API的流式响应
     :param resp_stream: 流式响应对象
+    :param content_delta_callback: 正式内容增量回调（可选），每收到新的正式内容即以增量文本调用
     :return: APIResponse对象
     """
 
@@ -286,6 +289,7 @@ async def _default_stream_response_handler(
     _usage_record = None  # 使用情况记录
     finish_reason: str | None = None  # 记录最后的 finish_reason
     _model_name: str | None = None  # 记录模型名
+    _fc_delivered_len = 0  # 已通过回调输出的正式内容长度
 
     def _insure_buffer_closed():
         # 确保缓冲区被关闭
@@ -332,6 +336,12 @@ async def _default_stream_response_handler(
             _tool_calls_buffer,
         )
 
+        if content_delta_callback and _fc_delta_buffer.tell() > _fc_delivered_len:
+            # 将新增的正式内容交给回调（推理内容不会输出）
+            new_content = _fc_delta_buffer.getvalue()[_fc_delivered_len:]
+            _fc_delivered_len = _fc_delta_buffer.tell()
+            await content_delta_callback(new_content)
+
         if event.usage:
             # 如果有使用情况，则将其存储在APIResponse对象中
             _usage_record = (
@@ -505,6 +515,7 @@ class OpenaiClient(BaseClient):
         ] = None,
         interrupt_flag: asyncio.Event | None = None,
         extra_params: dict[str, Any] | None = None,
+        content_delta_callback: Callable[[str], Coroutine[Any, Any, None]] | None = None,
     ) -> APIResponse:
         """
         获取对话响应
@@ -518,11 +529,16 @@ class OpenaiClient(BaseClient):
             stream_response_handler: 流式响应处理函数（可选，默认为default_stream_response_handler）
             async_response_parser: 响应解析函数（可选，默认为default_response_parser）
             interrupt_flag: 中断信号量（可选，默认为None）
+            content_delta_callback: 正式内容增量回调（可选，提供时强制使用流式请求）
         Returns:
             (响应文本, 推理文本, 工具调用, 其他数据)
         """
         if stream_response_handler is None:
             stream_response_handler = _default_stream_response_handler
+            if content_delta_callback:
+                stream_response_handler = functools.partial(
+                    _default_stream_response_handler, content_delta_callback=content_delta_callback
+                )
 
         if async_response_parser is None:
             async_response_parser = _default_normal_response_parser
@@ -533,7 +549,7 @@ class OpenaiClient(BaseClient):
         tools: Iterable[ChatCompletionToolParam] = _convert_tool_options(tool_options) if tool_options else NOT_GIVEN  # type: ignore
 
         try:
-            if model_info.force_stream_mode:
+            if model_info.force_stream_mode or content_delta_callback:
                 req_task = asyncio.create_task(
                     self.client.chat.completions.create(
                         model=model_info.model_identifier,
@@ -602,20 +618,20 @@ class OpenaiClient(BaseClient):
 
         return resp
 
-    async def get_embedding(
+    async def _create_embeddings(
         self,
         model_info: ModelInfo,
-        embedding_input: str,
+        embedding_input: str | list[str],
         extra_params: dict[str, Any] | None = None,
-    ) -> APIResponse:
+    ) -> Any:
         """
-        获取文本嵌入
+        请求嵌入接口，并将异常重封装为统一的异常类型
         :param model_info: 模型信息
-        :param embedding_input: 嵌入输入文本
-        :return: 嵌入响应
+        :param embedding_input: 嵌入输入文本（或文本列表）
+        :return: 原始响应
         """
         try:
-            raw_response = await self.client.embeddings.create(
+            return await self.client.embeddings.create(
                 model=model_info.model_identifier,
                 input=embedding_input,
                 extra_body=extra_params,
@@ -631,6 +647,33 @@ class OpenaiClient(BaseClient):
             # 重封装APIError为RespNotOkException
             raise RespNotOkException(e.status_code) from e
 
+    @staticmethod
+    def _parse_embedding_usage(model_info: ModelInfo, raw_response: Any) -> UsageRecord | None:
+        """解析嵌入响应的使用情况"""
+        if not hasattr(raw_response, "usage") or raw_response.usage is None:
+            return None
+        return UsageRecord(
+            model_name=model_info.name,
+            provider_name=model_info.api_provider,
+            prompt_tokens=raw_response.usage.prompt_tokens or 0,
+            completion_tokens=getattr(raw_response.usage, "completion_tokens", 0),
+            total_tokens=raw_response.usage.total_tokens or 0,
+        )
+
+    async def get_embedding(
+        self,
+        model_info: ModelInfo,
+        embedding_input: str,
+        extra_params: dict[str, Any] | None = None,
+    ) -> APIResponse:
+        """
+        获取文本嵌入
+        :param model_info: 模型信息
+        :param embedding_input: 嵌入输入文本
+        :return: 嵌入响应
+        """
+        raw_response = await self._create_embeddings(model_info, embedding_input, extra_params)
+
         response = APIResponse()
 
         # 解析嵌入响应
@@ -643,15 +686,35 @@ class OpenaiClient(BaseClient):
             )
 
         # 解析使用情况
-        if hasattr(raw_response, "usage"):
-            response.usage = UsageRecord(
-                model_name=model_info.name,
-                provider_name=model_info.api_provider,
-                prompt_tokens=raw_response.usage.prompt_tokens or 0,
-                completion_tokens=getattr(raw_response.usage, "completion_tokens", 0),
-                total_tokens=raw_response.usage.total_tokens or 0,
+        response.usage = self._parse_embedding_usage(model_info, raw_response)
+
+        return response
+
+    async def get_embeddings(
+        self,
+        model_info: ModelInfo,
+        embedding_inputs: list[str],
+        extra_params: dict[str, Any] | None = None,
+    ) -> APIResponse:
+        """
+        批量获取文本嵌入（单次请求）
+        :param model_info: 模型信息
+        :param embedding_inputs: 嵌入输入文本列表
+        :return: 嵌入响应（embeddings与输入顺序一致）
+        """
+        raw_response = await self._create_embeddings(model_info, embedding_inputs, extra_params)
+
+        if len(raw_response.data) != len(embedding_inputs):
+            raise RespParseException(
+                raw_response,
+                f"响应解析失败，嵌入数量({len(raw_response.data)})与输入数量({len(embedding_inputs)})不一致。",
             )
 
+        response = APIResponse()
+        # 按index还原输入顺序
+        response.embeddings = [item.embedding for item in sorted(raw_response.data, key=lambda item: item.index)]
+        response.usage = self._parse_embedding_usage(model_info, raw_response)
+
         return response
 
     async def get_audio_transcriptions(
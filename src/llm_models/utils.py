@@ -1,8 +1,14 @@
-import base64
-import io
+import asyncio
+import atexit
+import hashlib
+import os
+import threading
 
-from PIL import Image
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from typing import Any, Deque, Dict, Optional
 
 from src.common.logger import get_logger
 from src.common.database.database import db  # 确保 db 被导入用于 create_tables
@@ -10,139 +16,69 @@ from src.common.database.database_model import LLMUsage
 from src.config.api_ada_configs import ModelInfo
 from .payload_content.message import Message, MessageBuilder
 from .model_client.base_client import UsageRecord
+from .image_compress import LogLines, compress_base64_image
 
 logger = get_logger("消息压缩工具")
 
 
-def compress_messages(messages: list[Message], img_target_size: int = 1 * 1024 * 1024) -> list[Message]:
-    """
-    压缩消息列表中的图片
-    :param messages: 消息列表
-    :param img_target_size: 图片目标大小，默认1MB
-    :return: 压缩后的消息列表
-    """
+_COMPRESS_CACHE_SIZE = 64
+"""图片压缩结果缓存的最大条目数"""
 
-    def reformat_static_image(image_data: bytes) -> bytes:
-        """
-        将静态图片转换为JPEG格式
-        :param image_data: 图片数据
-        :return: 转换后的图片数据
-        """
-        try:
-            image = Image.open(io.BytesIO(image_data))
-
-            # 仅在非动图时进行格式转换
-            if (
-                not getattr(image, "is_animated", False)
-                and image.format
-                and (image.format.upper() in ["JPEG", "JPG", "PNG", "WEBP"])
-            ):
-                reformated_image_data = io.BytesIO()
-                img_to_save = image
-                if img_to_save.mode in ("RGBA", "LA", "P"):
-                    img_to_save = img_to_save.convert("RGB")
-                img_to_save.save(reformated_image_data, format="JPEG", quality=95, optimize=True)
-                image_data = reformated_image_data.getvalue()
-
-            return image_data
-        except Exception as e:
-            logger.error(f"图片转换格式失败: {str(e)}")
-            return image_data
+_compress_cache: "OrderedDict[tuple[str, int, str], str]" = OrderedDict()
+"""(原图sha256, 目标大小, 图片格式) -> 压缩后的base64编码"""
+
+_compress_cache_lock = threading.Lock()
+
+_compress_executor: Optional[ProcessPoolExecutor] = None
+"""图片压缩进程池（按需创建）"""
 
-    def rescale_image(image_data: bytes, scale: float) -> tuple[bytes, tuple[int, int] | None, tuple[int, int] | None]:
-        """
-        缩放图片
-        :param image_data: 图片数据
-        :param scale: 缩放比例
-        :return: 缩放后的图片数据
-        """
-        try:
-            image = Image.open(io.BytesIO(image_data))
-
-            # 原始尺寸
-            original_size = (image.width, image.height)
-
-            # 计算新的尺寸，防止为0
-            new_w = max(1, int(original_size[0] * scale))
-            new_h = max(1, int(original_size[1] * scale))
-            new_size = (new_w, new_h)
-
-            output_buffer = io.BytesIO()
-
-            if getattr(image, "is_animated", False):
-                # 动态图片，处理所有帧
-                frames = []
-                new_size = (max(1, new_size[0] // 2), max(1, new_size[1] // 2))  # 动图，缩放尺寸再打折
-                for frame_idx in range(getattr(image, "n_frames", 1)):
-                    image.seek(frame_idx)
-                    new_frame = image.copy()
-                    new_frame = new_frame.resize(new_size, Image.Resampling.LANCZOS)
-                    frames.append(new_frame)
-
-                # 保存到缓冲区
-                frames[0].save(
-                    output_buffer,
-                    format="GIF",
-                    save_all=True,
-                    append_images=frames[1:],
-                    optimize=True,
-                    duration=image.info.get("duration", 100),
-                    loop=image.info.get("loop", 0),
-                )
-            else:
-                # 静态图片，直接缩放保存
-                resized_image = image.resize(new_size, Image.Resampling.LANCZOS)
-                if resized_image.mode in ("RGBA", "LA", "P"):
-                    resized_image = resized_image.convert("RGB")
-                resized_image.save(output_buffer, format="JPEG", quality=95, optimize=True)
-
-            return output_buffer.getvalue(), original_size, new_size
 
+def _get_compress_executor() -> Optional[ProcessPoolExecutor]:
+    """获取图片压缩进程池，创建失败时返回None（退回线程执行）"""
+    global _compress_executor
+    if _compress_executor is None:
+        try:
+            _compress_executor = ProcessPoolExecutor(max_workers=min(2, os.cpu_count() or 1))
         except Exception as e:
-            logger.error(f"图片缩放失败: {str(e)}")
-            import traceback
+            logger.warning(f"创建图片压缩进程池失败，将在线程中压缩: {e}")
+            return None
+    return _compress_executor
 
-            logger.error(traceback.format_exc())
-            return image_data, None, None
 
-    def compress_base64_image(base64_data: str, target_size: int = 1 * 1024 * 1024) -> str:
-        original_b64_data_size = len(base64_data)  # 计算原始数据大小
+def _compress_cache_key(image_format: str, base64_data: str, target_size: int) -> tuple[str, int, str]:
+    return hashlib.sha256(base64_data.encode("utf-8")).hexdigest(), target_size, image_format
 
-        image_data = base64.b64decode(base64_data)
 
-        # 先尝试转换格式为JPEG
-        image_data = reformat_static_image(image_data)
-        base64_data = base64.b64encode(image_data).decode("utf-8")
-        if len(base64_data) <= target_size:
-            # 如果转换后小于目标大小，直接返回
-            logger.info(f"成功将图片转为JPEG格式，编码后大小: {len(base64_data) / 1024:.1f}KB")
-            return base64_data
+def _get_cached_compression(key: tuple[str, int, str]) -> Optional[str]:
+    with _compress_cache_lock:
+        if key in _compress_cache:
+            _compress_cache.move_to_end(key)
+            return _compress_cache[key]
+    return None
 
-        # 如果转换后仍然大于目标大小，进行尺寸压缩
-        scale = min(1.0, target_size / len(base64_data))
-        image_data, original_size, new_size = rescale_image(image_data, scale)
-        base64_data = base64.b64encode(image_data).decode("utf-8")
 
-        if original_size and new_size:
-            logger.info(
-                f"压缩图片: {original_size[0]}x{original_size[1]} -> {new_size[0]}x{new_size[1]}\n"
-                f"压缩前大小: {original_b64_data_size / 1024:.1f}KB, 压缩后大小: {len(base64_data) / 1024:.1f}KB"
-            )
+def _cache_compression(key: tuple[str, int, str], compressed: str, logs: LogLines) -> None:
+    for level, text in logs:
+        getattr(logger, level)(text)
+    with _compress_cache_lock:
+        _compress_cache[key] = compressed
+        _compress_cache.move_to_end(key)
+        while len(_compress_cache) > _COMPRESS_CACHE_SIZE:
+            _compress_cache.popitem(last=False)
 
-        return base64_data
 
+def _rebuild_messages(
+    messages: list[Message], compressed_images: dict[tuple[str, int, str], str], img_target_size: int
+) -> list[Message]:
     compressed_messages = []
     for message in messages:
         if isinstance(message.content, list):
-            # 检查content，如有图片则压缩
+            # 检查content，如有图片则替换为压缩后的图片
             message_builder = MessageBuilder()
             for content_item in message.content:
                 if isinstance(content_item, tuple):
-                    # 图片，进行压缩
-                    message_builder.add_image_content(
-                        content_item[0],
-                        compress_base64_image(content_item[1], target_size=img_target_size),
-                    )
+                    key = _compress_cache_key(content_item[0], content_item[1], img_target_size)
+                    message_builder.add_image_content(content_item[0], compressed_images[key])
                 else:
                     message_builder.add_text_content(content_item)
             compressed_messages.append(message_builder.build())
@@ -152,12 +88,77 @@ def compress_messages(messages: list[Message], img_target_size: int = 1 * 1024 *
     return compressed_messages
 
 
+def _collect_images(messages: list[Message], img_target_size: int) -> dict[tuple[str, int, str], str]:
+    """收集消息中需要压缩的图片：缓存键 -> 原始base64"""
+    images: dict[tuple[str, int, str], str] = {}
+    for message in messages:
+        if isinstance(message.content, list):
+            for content_item in message.content:
+                if isinstance(content_item, tuple):
+                    key = _compress_cache_key(content_item[0], content_item[1], img_target_size)
+                    images.setdefault(key, content_item[1])
+    return images
+
+
+def compress_messages(messages: list[Message], img_target_size: int = 1 * 1024 * 1024) -> list[Message]:
+    """
+    压缩消息列表中的图片（同步执行，结果会被缓存）
+    :param messages: 消息列表
+    :param img_target_size: 图片目标大小，默认1MB
+    :return: 压缩后的消息列表
+    """
+    compressed_images: dict[tuple[str, int, str], str] = {}
+    for key, base64_data in _collect_images(messages, img_target_size).items():
+        if (cached := _get_cached_compression(key)) is None:
+            cached, logs = compress_base64_image(base64_data, target_size=img_target_size)
+            _cache_compression(key, cached, logs)
+        compressed_images[key] = cached
+
+    return _rebuild_messages(messages, compressed_images, img_target_size)
+
+
+async def compress_messages_async(messages: list[Message], img_target_size: int = 1 * 1024 * 1024) -> list[Message]:
+    """
+    压缩消息列表中的图片，解码与编码在进程池中执行，不阻塞事件循环；
+    相同图片（按内容sha256、目标大小和格式）的压缩结果会被缓存复用
+    :param messages: 消息列表
+    :param img_target_size: 图片目标大小，默认1MB
+    :return: 压缩后的消息列表
+    """
+    global _compress_executor
+    loop = asyncio.get_running_loop()
+    compressed_images: dict[tuple[str, int, str], str] = {}
+    for key, base64_data in _collect_images(messages, img_target_size).items():
+        if (cached := _get_cached_compression(key)) is None:
+            executor = _get_compress_executor()
+            try:
+                if executor is None:
+                    raise BrokenProcessPool("进程池不可用")
+                cached, logs = await loop.run_in_executor(executor, compress_base64_image, base64_data, img_target_size)
+            except BrokenProcessPool:
+                _compress_executor = None  # 下次重新创建进程池
+                cached, logs = await asyncio.to_thread(compress_base64_image, base64_data, img_target_size)
+            _cache_compression(key, cached, logs)
+        compressed_images[key] = cached
+
+    return _rebuild_messages(messages, compressed_images, img_target_size)
+
+
 class LLMUsageRecorder:
     """
     LLM使用情况记录器
+
+    记录先进入内存队列，由后台写入线程批量插入数据库，避免每次请求都在事件循环上同步写盘；
+    统计与仪表盘查询前调用flush，使尚在队列中的记录也计入统计。
     """
 
-    def __init__(self):
+    def __init__(self, batch_size: int = 200, flush_interval: float = 2.0, max_pending: int = 20000):
+        """
+        Args:
+            batch_size: 单次批量插入的最大条数
+            flush_interval: 后台写入间隔（秒）
+            max_pending: 内存中最多暂存的记录数，超出时丢弃最旧的记录
+        """
         try:
             # 使用 Peewee 创建表，safe=True 表示如果表已存在则不会抛出错误
             db.create_tables([LLMUsage], safe=True)
@@ -165,6 +166,24 @@ class LLMUsageRecorder:
         except Exception as e:
             logger.error(f"创建 LLMUsage 表失败: {str(e)}")
 
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._pending: Deque[Dict[str, Any]] = deque()
+        """待写入的记录"""
+        self._lock = threading.Lock()
+        """保护待写入队列"""
+        self._write_lock = threading.Lock()
+        """保证同一时间只有一个线程在写数据库"""
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._writer: Optional[threading.Thread] = None
+        self.dropped_count = 0
+        """因队列已满而丢弃的记录数"""
+
+        atexit.register(self.stop)
+
     def record_usage_to_database(
         self,
         model_info: ModelInfo,
@@ -177,31 +196,99 @@ class LLMUsageRecorder:
         input_cost = (model_usage.prompt_tokens / 1000000) * model_info.price_in
         output_cost = (model_usage.completion_tokens / 1000000) * model_info.price_out
         total_cost = round(input_cost + output_cost, 6)
-        try:
-            # 使用 Peewee 模型创建记录
-            LLMUsage.create(
-                model_name=model_info.model_identifier,
-                model_assign_name=model_info.name,
-                model_api_provider=model_info.api_provider,
-                user_id=user_id,
-                request_type=request_type,
-                endpoint=endpoint,
-                prompt_tokens=model_usage.prompt_tokens or 0,
-                completion_tokens=model_usage.completion_tokens or 0,
-                total_tokens=model_usage.total_tokens or 0,
-                cost=total_cost or 0.0,
-                time_cost=round(time_cost or 0.0, 3),
-                status="success",
-                timestamp=datetime.now(),  # Peewee 会处理 DateTimeField
-            )
-            logger.debug(
-                f"Token使用情况 - 模型: {model_usage.model_name}, "
-                f"用户: {user_id}, 类型: {request_type}, "
-                f"提示词: {model_usage.prompt_tokens}, 完成: {model_usage.completion_tokens}, "
-                f"总计: {model_usage.total_tokens}"
-            )
-        except Exception as e:
-            logger.error(f"记录token使用情况失败: {str(e)}")
+        record = {
+            "model_name": model_info.model_identifier,
+            "model_assign_name": model_info.name,
+            "model_api_provider": model_info.api_provider,
+            "user_id": user_id,
+            "request_type": request_type,
+            "endpoint": endpoint,
+            "prompt_tokens": model_usage.prompt_tokens or 0,
+            "completion_tokens": model_usage.completion_tokens or 0,
+            "total_tokens": model_usage.total_tokens or 0,
+            "cost": total_cost or 0.0,
+            "time_cost": round(time_cost or 0.0, 3),
+            "status": "success",
+            "timestamp": datetime.now(),
+        }
+
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()
+                self.dropped_count += 1
+                if self.dropped_count % 1000 == 1:
+                    logger.warning(f"LLM使用记录积压过多，已丢弃 {self.dropped_count} 条最旧的记录")
+            self._pending.append(record)
+            need_wakeup = len(self._pending) >= self.batch_size
+
+        if self._stopped:
+            # 已停止后台写入（进程退出阶段），直接同步写入
+            self.flush()
+        else:
+            self._ensure_writer()
+            if need_wakeup:
+                self._wakeup.set()
+
+        logger.debug(
+            f"Token使用情况 - 模型: {model_usage.model_name}, "
+            f"用户: {user_id}, 类型: {request_type}, "
+            f"提示词: {model_usage.prompt_tokens}, 完成: {model_usage.completion_tokens}, "
+            f"总计: {model_usage.total_tokens}"
+        )
+
+    def _ensure_writer(self) -> None:
+        """按需启动后台写入线程"""
+        if self._stopped or (self._writer and self._writer.is_alive()):
+            return
+        with self._lock:
+            if self._writer and self._writer.is_alive():
+                return
+            self._writer = threading.Thread(target=self._writer_loop, name="llm-usage-writer", daemon=True)
+            self._writer.start()
+
+    def _writer_loop(self) -> None:
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        将暂存的记录全部写入数据库
+        Returns:
+            int: 本次写入的记录数
+        """
+        written = 0
+        with self._write_lock:
+            while True:
+                with self._lock:
+                    batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                if not batch:
+                    break
+                try:
+                    with db.atomic():
+                        LLMUsage.insert_many(batch).execute()
+                    written += len(batch)
+                except Exception as e:
+                    logger.error(f"批量记录token使用情况失败: {str(e)}")
+                    with self._lock:
+                        # 放回队首等待下次重试，超出容量的部分丢弃
+                        self._pending.extendleft(reversed(batch))
+                        while len(self._pending) > self.max_pending:
+                            self._pending.popleft()
+                            self.dropped_count += 1
+                    break
+        return written
+
+    def stop(self) -> None:
+        """停止后台写入线程并写入剩余记录"""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._wakeup.set()
+        if self._writer and self._writer.is_alive():
+            self._writer.join(timeout=5.0)
+        self.flush()
 
 
 llm_usage_recorder = LLMUsageRecorder()
@@ -1,10 +1,13 @@
 import re
 import asyncio
+import functools
+import hashlib
 import time
 
+from collections import OrderedDict, deque
 from enum import Enum
 from rich.traceback import install
-from typing import Tuple, List, Dict, Optional, Callable, Any, Set
+from typing import Tuple, List, Dict, Optional, Callable, Any, Set, Deque, Awaitable, Hashable
 import traceback
 
 from src.common.logger import get_logger
@@ -14,12 +17,13 @@ from .payload_content.message import MessageBuilder, Message
 from .payload_content.resp_format import RespFormat
 from .payload_content.tool_option import ToolOption, ToolCall, ToolOptionBuilder, ToolParamType
 from .model_client.base_client import BaseClient, APIResponse, client_registry
-from .utils import compress_messages, llm_usage_recorder
+from .utils import compress_messages_async, llm_usage_recorder
 from .exceptions import (
     NetworkConnectionError,
     RespNotOkException,
     EmptyResponseException,
     ModelAttemptFailed,
+    ReqAbortException,
 )
 
 install(extra_lines=3)
@@ -35,6 +39,193 @@ class RequestType(Enum):
     AUDIO = "audio"
 
 
+class HedgeStatistics:
+    """对冲请求统计：记录各模型的响应耗时分布，并统计各任务的对冲触发次数与胜率"""
+
+    def __init__(self, window_size: int = 200, min_samples: int = 20) -> None:
+        self._window_size = window_size
+        self._min_samples = min_samples
+        self._latencies: Dict[str, Deque[float]] = {}
+        """模型名称 -> 最近成功请求的耗时窗口"""
+        self._hedge_counts: Dict[str, Dict[str, int]] = {}
+        """任务名称 -> {"fired": 触发次数, "primary_win": 首选模型胜出次数, "hedge_win": 对冲模型胜出次数}"""
+
+    def record_latency(self, model_name: str, time_cost: float) -> None:
+        """记录一次成功请求的耗时"""
+        if model_name not in self._latencies:
+            self._latencies[model_name] = deque(maxlen=self._window_size)
+        self._latencies[model_name].append(time_cost)
+
+    def get_hedge_delay(self, model_name: str, percentile: float, fallback: float, min_delay: float) -> float:
+        """
+        获取对冲触发阈值
+        Args:
+            model_name: 首选模型名称
+            percentile: 使用的耗时分位数（0~1）
+            fallback: 样本不足时使用的阈值
+            min_delay: 阈值下限
+        Returns:
+            float: 等待首选模型的时长（秒）
+        """
+        samples = self._latencies.get(model_name)
+        if not samples or len(samples) < self._min_samples:
+            return max(fallback, min_delay)
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, int(len(ordered) * percentile)))
+        return max(ordered[index], min_delay)
+
+    def record_hedge(self, task_name: str, hedge_won: Optional[bool]) -> None:
+        """
+        记录一次已触发的对冲请求结果
+        Args:
+            task_name: 任务名称
+            hedge_won: 对冲模型是否胜出，None表示两路均失败
+        """
+        counts = self._hedge_counts.setdefault(task_name, {"fired": 0, "primary_win": 0, "hedge_win": 0})
+        counts["fired"] += 1
+        if hedge_won is True:
+            counts["hedge_win"] += 1
+        elif hedge_won is False:
+            counts["primary_win"] += 1
+
+    def get_win_rates(self) -> Dict[str, Dict[str, float]]:
+        """获取各任务的对冲统计，包括触发次数与对冲模型胜率"""
+        return {
+            task_name: {
+                "fired": counts["fired"],
+                "primary_win": counts["primary_win"],
+                "hedge_win": counts["hedge_win"],
+                "hedge_win_rate": counts["hedge_win"] / counts["fired"] if counts["fired"] else 0.0,
+            }
+            for task_name, counts in self._hedge_counts.items()
+        }
+
+
+hedge_statistics = HedgeStatistics()
+
+
+class ResponseCoalescer:
+    """
+    LLM请求合并器
+    - 单飞（single-flight）：对开启合并的请求，相同请求仍在进行中时，后来者直接等待同一次调用的结果
+    - 响应缓存：对开启缓存的任务，按（模型列表, 请求内容）缓存成功的响应，带TTL和容量上限
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        """(事件循环, 命名空间, 请求键) -> 进行中的请求任务"""
+        self._caches: Dict[Hashable, "OrderedDict[Hashable, Tuple[float, Tuple[APIResponse, ModelInfo]]]"] = {}
+        """命名空间 -> {请求键: (写入时间, (响应, 模型信息))}，按最近使用排序"""
+        self.stats: Dict[str, int] = {"coalesced": 0, "cache_hit": 0}
+        """合并次数与缓存命中次数"""
+
+    async def run(
+        self,
+        namespace: Hashable,
+        key: Hashable,
+        request_func: Callable[[], Awaitable[Tuple[APIResponse, ModelInfo]]],
+        cache_ttl: float = 0.0,
+        cache_size: int = 0,
+        coalesce: bool = True,
+    ) -> Tuple[Tuple[APIResponse, ModelInfo], bool]:
+        """
+        执行（或加入）一次请求
+        Args:
+            namespace: 命名空间（同一任务配置共享）
+            key: 请求键
+            request_func: 实际发起请求的函数
+            cache_ttl: 缓存有效期（秒），0为不缓存
+            cache_size: 该命名空间的缓存容量上限
+            coalesce: 是否与进行中的相同请求合并
+        Returns:
+            ((响应, 模型信息), 是否为共享结果)，共享结果未产生新的token消耗
+        """
+        if cache_ttl > 0 and (cached := self._get_cached(namespace, key, cache_ttl)) is not None:
+            self.stats["cache_hit"] += 1
+            return cached, True
+
+        if not coalesce:
+            result = await request_func()
+            self._store(namespace, key, result, cache_ttl, cache_size)
+            return result, False
+
+        # 任务绑定在创建它的事件循环上（嵌入等场景会在线程内临时创建事件循环），因此按循环区分
+        inflight_key = (id(asyncio.get_running_loop()), namespace, key)
+        task = self._inflight.get(inflight_key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.create_task(request_func())
+            self._inflight[inflight_key] = task
+            task.add_done_callback(
+                functools.partial(self._on_request_done, inflight_key, namespace, key, cache_ttl, cache_size)
+            )
+        else:
+            self.stats["coalesced"] += 1
+
+        # shield: 单个等待方被取消时不影响其他等待方
+        return await asyncio.shield(task), shared
+
+    def _get_cached(self, namespace: Hashable, key: Hashable, ttl: float) -> Optional[Tuple[APIResponse, ModelInfo]]:
+        cache = self._caches.get(namespace)
+        if not cache or key not in cache:
+            return None
+        stored_at, result = cache[key]
+        if time.time() - stored_at > ttl:
+            del cache[key]
+            return None
+        cache.move_to_end(key)
+        return result
+
+    def _on_request_done(
+        self,
+        inflight_key: Hashable,
+        namespace: Hashable,
+        key: Hashable,
+        cache_ttl: float,
+        cache_size: int,
+        task: asyncio.Task,
+    ) -> None:
+        if self._inflight.get(inflight_key) is task:
+            del self._inflight[inflight_key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._store(namespace, key, task.result(), cache_ttl, cache_size)
+
+    def _store(
+        self,
+        namespace: Hashable,
+        key: Hashable,
+        result: Tuple[APIResponse, ModelInfo],
+        cache_ttl: float,
+        cache_size: int,
+    ) -> None:
+        if cache_ttl <= 0 or cache_size <= 0:
+            return
+        cache = self._caches.setdefault(namespace, OrderedDict())
+        cache[key] = (time.time(), result)
+        cache.move_to_end(key)
+        while len(cache) > cache_size:
+            cache.popitem(last=False)
+
+
+response_coalescer = ResponseCoalescer()
+
+
+class StreamDeltaRelay:
+    """流式正文增量转发器，记录是否已有内容交付给下游（已交付后不能再重试或切换模型，否则会重复输出）"""
+
+    def __init__(self, callback: Callable[[str], Awaitable[None]]) -> None:
+        self._callback = callback
+        self.delivered = False
+        """是否已向下游交付过内容"""
+
+    async def __call__(self, delta: str) -> None:
+        if not delta:
+            return
+        self.delivered = True
+        await self._callback(delta)
+
+
 class LLMRequest:
     """LLM请求类"""
 
@@ -89,11 +280,12 @@ class LLMRequest:
             )
             return [message_builder.build()]
 
-        response, model_info = await self._execute_request(
-            request_type=RequestType.RESPONSE,
-            message_factory=message_factory,
+        (response, model_info), shared = await self._execute_shared_request(
+            ("image", prompt, image_format, image_base64),
             temperature=temperature,
             max_tokens=max_tokens,
+            request_type=RequestType.RESPONSE,
+            message_factory=message_factory,
         )
         content = response.content or ""
         reasoning_content = response.reasoning_content or ""
@@ -102,6 +294,8 @@ class LLMRequest:
             content, extracted_reasoning = self._extract_reasoning(content)
             reasoning_content = extracted_reasoning
         time_cost = time.time() - start_time
+        if shared:
+            return content, (reasoning_content, model_info.name, tool_calls)
         self._check_slow_request(time_cost, model_info.name)
         if usage := response.usage:
             llm_usage_recorder.record_usage_to_database(
@@ -135,6 +329,7 @@ class LLMRequest:
         max_tokens: Optional[int] = None,
         tools: Optional[List[Dict[str, Any]]] = None,
         raise_when_empty: bool = True,
+        content_delta_callback: Optional[Callable[[str], Awaitable[None]]] = None,
     ) -> Tuple[str, Tuple[str, str, Optional[List[ToolCall]]]]:
         """
         异步生成响应
@@ -144,6 +339,7 @@ class LLMRequest:
             max_tokens (int, optional): 最大token数
             tools (Optional[List[Dict[str, Any]]]): 工具列表
             raise_when_empty (bool): 当响应为空时是否抛出异常
+            content_delta_callback (Optional[Callable[[str], Awaitable[None]]]): 正式内容增量回调，提供时使用流式请求边生成边输出
         Returns:
             (Tuple[str, str, str, Optional[List[ToolCall]]]): 响应内容、推理内容、模型名称、工具调用列表
         """
@@ -156,13 +352,26 @@ class LLMRequest:
 
         tool_built = self._build_tool_options(tools)
 
-        response, model_info = await self._execute_request(
-            request_type=RequestType.RESPONSE,
-            message_factory=message_factory,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            tool_options=tool_built,
-        )
+        if content_delta_callback:
+            # 流式输出的增量需要直接送达调用方，不参与合并与缓存
+            response, model_info = await self._execute_request(
+                request_type=RequestType.RESPONSE,
+                message_factory=message_factory,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                tool_options=tool_built,
+                content_delta_callback=content_delta_callback,
+            )
+            shared = False
+        else:
+            (response, model_info), shared = await self._execute_shared_request(
+                ("text", prompt, tools),
+                temperature=temperature,
+                max_tokens=max_tokens,
+                request_type=RequestType.RESPONSE,
+                message_factory=message_factory,
+                tool_options=tool_built,
+            )
 
         logger.debug(f"LLM请求总耗时: {time.time() - start_time}")
         logger.debug(f"LLM生成内容: {response}")
@@ -173,7 +382,7 @@ class LLMRequest:
         if not reasoning_content and content:
             content, extracted_reasoning = self._extract_reasoning(content)
             reasoning_content = extracted_reasoning
-        if usage := response.usage:
+        if not shared and (usage := response.usage):
             llm_usage_recorder.record_usage_to_database(
                 model_info=model_info,
                 model_usage=usage,
@@ -246,12 +455,13 @@ class LLMRequest:
             (Tuple[List[float], str]): (嵌入向量，使用的模型名称)
         """
         start_time = time.time()
-        response, model_info = await self._execute_request(
+        (response, model_info), shared = await self._execute_shared_request(
+            ("embedding", embedding_input),
             request_type=RequestType.EMBEDDING,
             embedding_input=embedding_input,
         )
         embedding = response.embedding
-        if usage := response.usage:
+        if not shared and (usage := response.usage):
             llm_usage_recorder.record_usage_to_database(
                 model_info=model_info,
                 model_usage=usage,
@@ -264,6 +474,70 @@ class LLMRequest:
             raise RuntimeError("获取embedding失败")
         return embedding, model_info.name
 
+    async def get_embeddings(self, embedding_inputs: List[str]) -> Tuple[List[List[float]], str]:
+        """
+        批量获取嵌入向量（单次请求，批大小应不超过服务商的限制）
+        Args:
+            embedding_inputs (List[str]): 获取嵌入的目标列表
+        Returns:
+            (Tuple[List[List[float]], str]): (与输入顺序一致的嵌入向量列表，使用的模型名称)
+        """
+        start_time = time.time()
+        response, model_info = await self._execute_request(
+            request_type=RequestType.EMBEDDING,
+            embedding_input=list(embedding_inputs),
+        )
+        embeddings = response.embeddings
+        if usage := response.usage:
+            llm_usage_recorder.record_usage_to_database(
+                model_info=model_info,
+                model_usage=usage,
+                user_id="system",
+                request_type=self.request_type,
+                endpoint="/embeddings",
+                time_cost=time.time() - start_time,
+            )
+        if not embeddings or len(embeddings) != len(embedding_inputs) or not all(embeddings):
+            raise RuntimeError("批量获取embedding失败")
+        return embeddings, model_info.name
+
+    async def _execute_shared_request(
+        self,
+        payload: Tuple[Any, ...],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **request_kwargs: Any,
+    ) -> Tuple[Tuple[APIResponse, ModelInfo], bool]:
+        """
+        通过请求合并器执行请求：嵌入请求与开启合并的任务中，相同的进行中请求只发起一次；开启缓存的任务还会复用TTL内的响应
+        Args:
+            payload: 决定请求内容的参数（提示词、图片、工具等）
+            temperature: 温度参数
+            max_tokens: 最大token数
+            **request_kwargs: 传递给_execute_request的其余参数
+        Returns:
+            ((响应, 模型信息), 是否为共享结果)
+        """
+        task_config = self.model_for_task
+        # 不同用途的请求即使模型与内容相同也不共享结果
+        namespace = (self.request_type, tuple(task_config.model_list))
+        # 生成结果随机，默认不合并；嵌入结果确定，始终合并
+        coalesce = task_config.coalesce_requests or request_kwargs.get("request_type") == RequestType.EMBEDDING
+        digest = hashlib.sha256(repr(payload).encode("utf-8")).hexdigest()
+        key = (
+            digest,
+            task_config.temperature if temperature is None else temperature,
+            task_config.max_tokens if max_tokens is None else max_tokens,
+        )
+        return await response_coalescer.run(
+            namespace,
+            key,
+            lambda: self._execute_request(temperature=temperature, max_tokens=max_tokens, **request_kwargs),
+            cache_ttl=task_config.response_cache_ttl,
+            cache_size=task_config.response_cache_size,
+            coalesce=coalesce,
+        )
+
     def _select_model(self, exclude_models: Optional[Set[str]] = None) -> Tuple[ModelInfo, APIProvider, BaseClient]:
         """
         根据总tokens和惩罚值选择的模型
@@ -302,12 +576,16 @@ class LLMRequest:
         async_response_parser: Optional[Callable],
         temperature: Optional[float],
         max_tokens: Optional[int],
-        embedding_input: str | None,
+        embedding_input: str | List[str] | None,
         audio_base64: str | None,
+        interrupt_flag: asyncio.Event | None = None,
+        content_delta_relay: StreamDeltaRelay | None = None,
     ) -> APIResponse:
         """
         在单个模型上执行请求，包含针对临时错误的重试逻辑。
         如果成功，返回APIResponse。如果失败（重试耗尽或硬错误），则抛出ModelAttemptFailed异常。
+        被interrupt_flag中断时，直接抛出ReqAbortException。
+        流式内容已交付给下游后出错时不再重试，直接抛出ModelAttemptFailed。
         """
         retry_remain = api_provider.max_retry
         compressed_messages: Optional[List[Message]] = None
@@ -324,10 +602,18 @@ class LLMRequest:
                         response_format=response_format,
                         stream_response_handler=stream_response_handler,
                         async_response_parser=async_response_parser,
+                        interrupt_flag=interrupt_flag,
                         extra_params=model_info.extra_params,
+                        content_delta_callback=content_delta_relay,
                     )
                 elif request_type == RequestType.EMBEDDING:
                     assert embedding_input is not None, "嵌入输入不能为空"
+                    if isinstance(embedding_input, list):
+                        return await client.get_embeddings(
+                            model_info=model_info,
+                            embedding_inputs=embedding_input,
+                            extra_params=model_info.extra_params,
+                        )
                     return await client.get_embedding(
                         model_info=model_info,
                         embedding_input=embedding_input,
@@ -340,9 +626,14 @@ class LLMRequest:
                         audio_base64=audio_base64,
                         extra_params=model_info.extra_params,
                     )
+            except ReqAbortException:
+                # 被外部信号中断（如对冲请求中已有其他模型胜出），不重试也不计入失败
+                raise
+
             except EmptyResponseException as e:
                 # 空回复：通常为临时问题，单独记录并重试
                 original_error_info = self._get_original_error_info(e)
+                self._raise_if_stream_delivered(model_info, content_delta_relay, e)
                 retry_remain -= 1
                 if retry_remain <= 0:
                     logger.error(f"模型 '{model_info.name}' 在多次出现空回复后仍然失败。{original_error_info}")
@@ -355,6 +646,7 @@ class LLMRequest:
                 # 网络错误：单独记录并重试
                 # 尝试从链式异常中获取原始错误信息以诊断具体原因
                 original_error_info = self._get_original_error_info(e)
+                self._raise_if_stream_delivered(model_info, content_delta_relay, e)
 
                 retry_remain -= 1
                 if retry_remain <= 0:
@@ -371,6 +663,7 @@ class LLMRequest:
 
             except RespNotOkException as e:
                 original_error_info = self._get_original_error_info(e)
+                self._raise_if_stream_delivered(model_info, content_delta_relay, e)
 
                 # 可重试的HTTP错误
                 if e.status_code == 429 or e.status_code >= 500:
@@ -389,7 +682,7 @@ class LLMRequest:
                 if e.status_code == 413 and message_list and not compressed_messages:
                     logger.warning(f"模型 '{model_info.name}' 返回413请求体过大，尝试压缩后重试...")
                     # 压缩消息本身不消耗重试次数
-                    compressed_messages = compress_messages(message_list)
+                    compressed_messages = await compress_messages_async(message_list)
                     continue
 
                 # 不可重试的HTTP错误
@@ -416,52 +709,62 @@ class LLMRequest:
         async_response_parser: Optional[Callable] = None,
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
-        embedding_input: str | None = None,
+        embedding_input: str | List[str] | None = None,
         audio_base64: str | None = None,
+        content_delta_callback: Optional[Callable[[str], Awaitable[None]]] = None,
     ) -> Tuple[APIResponse, ModelInfo]:
         """
         调度器函数，负责模型选择、故障切换。
         """
+        content_delta_relay = StreamDeltaRelay(content_delta_callback) if content_delta_callback else None
+        request_kwargs: Dict[str, Any] = {
+            "request_type": request_type,
+            "message_factory": message_factory,
+            "tool_options": tool_options,
+            "response_format": response_format,
+            "stream_response_handler": stream_response_handler,
+            "async_response_parser": async_response_parser,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "embedding_input": embedding_input,
+            "audio_base64": audio_base64,
+            "content_delta_relay": content_delta_relay,
+        }
         failed_models_this_request: Set[str] = set()
         max_attempts = len(self.model_for_task.model_list)
         last_exception: Optional[Exception] = None
 
-        for _ in range(max_attempts):
+        if (
+            self.model_for_task.enable_hedging
+            and request_type == RequestType.RESPONSE
+            and max_attempts > 1
+            and not content_delta_relay  # 流式输出无法在两路请求间切换
+        ):
+            result, last_exception = await self._execute_hedged_request(request_kwargs, failed_models_this_request)
+            if result:
+                return result
+
+        for _ in range(max_attempts - len(failed_models_this_request)):
             model_info, api_provider, client = self._select_model(exclude_models=failed_models_this_request)
 
-            message_list = []
-            if message_factory:
-                message_list = message_factory(client)
-
             try:
+                start_time = time.time()
                 response = await self._attempt_request_on_model(
-                    model_info,
-                    api_provider,
-                    client,
-                    request_type,
-                    message_list=message_list,
-                    tool_options=tool_options,
-                    response_format=response_format,
-                    stream_response_handler=stream_response_handler,
-                    async_response_parser=async_response_parser,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    embedding_input=embedding_input,
-                    audio_base64=audio_base64,
+                    model_info, api_provider, client, **self._build_attempt_kwargs(client, request_kwargs)
                 )
-                total_tokens, penalty, usage_penalty = self.model_usage[model_info.name]
-                if response_usage := response.usage:
-                    total_tokens += response_usage.total_tokens
-                self.model_usage[model_info.name] = (total_tokens, penalty, usage_penalty - 1)
+                self._on_attempt_success(model_info, response, request_type, time.time() - start_time)
                 return response, model_info
 
             except ModelAttemptFailed as e:
                 last_exception = e.original_exception or e
                 logger.warning(f"模型 '{model_info.name}' 尝试失败，切换到下一个模型。原因: {e}")
-                total_tokens, penalty, usage_penalty = self.model_usage[model_info.name]
-                self.model_usage[model_info.name] = (total_tokens, penalty + 1, usage_penalty - 1)
+                self._on_attempt_failed(model_info)
                 failed_models_this_request.add(model_info.name)
 
+                if content_delta_relay and content_delta_relay.delivered:
+                    logger.warning("流式内容已部分输出，不再切换模型。")
+                    break
+
                 if isinstance(last_exception, RespNotOkException) and last_exception.status_code == 400:
                     logger.warning("收到客户端错误 (400)，跳过当前模型并继续尝试其他模型。")
                     continue
@@ -471,6 +774,150 @@ class LLMRequest:
             raise last_exception
         raise RuntimeError("请求失败，所有可用模型均已尝试失败。")
 
+    async def _execute_hedged_request(
+        self,
+        request_kwargs: Dict[str, Any],
+        failed_models: Set[str],
+    ) -> Tuple[Optional[Tuple[APIResponse, ModelInfo]], Optional[Exception]]:
+        """
+        对冲请求：首选模型超过动态阈值（历史耗时分位数）仍未返回时，向下一个模型并发发送相同请求，
+        取先成功者，并通过interrupt_flag中断落后的请求。
+        Args:
+            request_kwargs: 请求参数
+            failed_models: 本次请求中已失败的模型集合，失败的模型会被加入其中
+        Returns:
+            ((响应, 模型信息) 或 None, 最后一次失败的异常)，两路均失败时由调用方继续故障切换
+        """
+        request_type: RequestType = request_kwargs["request_type"]
+        running: Dict[asyncio.Task, Tuple[ModelInfo, asyncio.Event, float]] = {}
+        last_exception: Optional[Exception] = None
+
+        def start_attempt() -> asyncio.Task:
+            model_info, api_provider, client = self._select_model(
+                exclude_models=failed_models | {info.name for info, _, _ in running.values()}
+            )
+            interrupt_flag = asyncio.Event()
+            task = asyncio.create_task(
+                self._attempt_request_on_model(
+                    model_info,
+                    api_provider,
+                    client,
+                    interrupt_flag=interrupt_flag,
+                    **self._build_attempt_kwargs(client, request_kwargs),
+                )
+            )
+            running[task] = (model_info, interrupt_flag, time.time())
+            return task
+
+        primary_task = start_attempt()
+        primary_name = running[primary_task][0].name
+        hedge_delay = hedge_statistics.get_hedge_delay(
+            primary_name,
+            percentile=self.model_for_task.hedge_percentile,
+            fallback=self.model_for_task.slow_threshold,
+            min_delay=self.model_for_task.hedge_min_delay,
+        )
+        try:
+            await asyncio.wait({primary_task}, timeout=hedge_delay)
+
+            hedged = False
+            if not primary_task.done() and len(self.model_for_task.model_list) - len(failed_models) > 1:
+                hedge_task = start_attempt()
+                hedged = True
+                logger.info(
+                    f"{self.request_type or '未知任务'} 首选模型 {primary_name} 超过 {hedge_delay:.1f}s 未响应，"
+                    f"发起对冲请求至模型 {running[hedge_task][0].name}"
+                )
+
+            pending = set(running)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    model_info, _, start_time = running[task]
+                    try:
+                        response = task.result()
+                    except ModelAttemptFailed as e:
+                        last_exception = e.original_exception or e
+                        logger.warning(f"模型 '{model_info.name}' 尝试失败。原因: {e}")
+                        self._on_attempt_failed(model_info)
+                        failed_models.add(model_info.name)
+                        continue
+
+                    now = time.time()
+                    self._on_attempt_success(model_info, response, request_type, now - start_time)
+                    for loser in (pending | done) - {task}:
+                        loser_info, loser_flag, loser_start_time = running[loser]
+                        loser_flag.set()
+                        loser.add_done_callback(self._discard_task_result)
+                        self._on_attempt_interrupted(loser_info)
+                        if request_type == RequestType.RESPONSE and not loser.done():
+                            # 被中断请求的真实耗时至少为已等待的时长，作为下界计入耗时分布，
+                            # 否则慢请求的样本被丢弃，分位数偏低，对冲会越来越频繁
+                            hedge_statistics.record_latency(loser_info.name, now - loser_start_time)
+                    if hedged:
+                        task_name = self.request_type or "未知任务"
+                        hedge_statistics.record_hedge(self.request_type, hedge_won=task is not primary_task)
+                        stats = hedge_statistics.get_win_rates().get(self.request_type, {})
+                        logger.info(
+                            f"{task_name} 对冲请求由模型 {model_info.name} 胜出，"
+                            f"累计触发 {stats.get('fired', 0)} 次，对冲模型胜率 {stats.get('hedge_win_rate', 0.0):.0%}"
+                        )
+                    return (response, model_info), last_exception
+
+            if hedged:
+                hedge_statistics.record_hedge(self.request_type, hedge_won=None)
+            return None, last_exception
+        finally:
+            # 调用方被取消时，同样中断仍在进行的请求
+            for task, (_, interrupt_flag, _) in running.items():
+                if not task.done():
+                    interrupt_flag.set()
+                    task.add_done_callback(self._discard_task_result)
+
+    @staticmethod
+    def _build_attempt_kwargs(client: BaseClient, request_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """根据客户端构建单次模型尝试的参数"""
+        attempt_kwargs = dict(request_kwargs)
+        message_factory = attempt_kwargs.pop("message_factory")
+        attempt_kwargs["message_list"] = message_factory(client) if message_factory else []
+        return attempt_kwargs
+
+    def _on_attempt_success(
+        self, model_info: ModelInfo, response: APIResponse, request_type: RequestType, time_cost: float
+    ) -> None:
+        """模型请求成功后更新负载均衡记录与耗时统计"""
+        total_tokens, penalty, usage_penalty = self.model_usage[model_info.name]
+        if response_usage := response.usage:
+            total_tokens += response_usage.total_tokens
+        self.model_usage[model_info.name] = (total_tokens, penalty, usage_penalty - 1)
+        if request_type == RequestType.RESPONSE:
+            hedge_statistics.record_latency(model_info.name, time_cost)
+
+    def _on_attempt_failed(self, model_info: ModelInfo) -> None:
+        """模型请求失败后增加惩罚值"""
+        total_tokens, penalty, usage_penalty = self.model_usage[model_info.name]
+        self.model_usage[model_info.name] = (total_tokens, penalty + 1, usage_penalty - 1)
+
+    def _on_attempt_interrupted(self, model_info: ModelInfo) -> None:
+        """模型请求被主动中断，仅释放使用中的惩罚值"""
+        total_tokens, penalty, usage_penalty = self.model_usage[model_info.name]
+        self.model_usage[model_info.name] = (total_tokens, penalty, usage_penalty - 1)
+
+    @staticmethod
+    def _raise_if_stream_delivered(
+        model_info: ModelInfo, content_delta_relay: StreamDeltaRelay | None, e: Exception
+    ) -> None:
+        """流式内容已交付给下游时，直接放弃重试"""
+        if content_delta_relay and content_delta_relay.delivered:
+            logger.warning(f"模型 '{model_info.name}' 在流式输出过程中出错，已输出部分内容，放弃重试: {str(e)}")
+            raise ModelAttemptFailed(f"模型 '{model_info.name}' 流式输出中断", original_exception=e) from e
+
+    @staticmethod
+    def _discard_task_result(task: asyncio.Task) -> None:
+        """取回被中断任务的结果，避免未处理异常的告警"""
+        if not task.cancelled():
+            task.exception()
+
     def _build_tool_options(self, tools: Optional[List[Dict[str, Any]]]) -> Optional[List[ToolOption]]:
         # sourcery skip: extract-method
         """构建工具选项列表"""
@@ -14,7 +14,7 @@ from src.chat.message_receive.bot import chat_bot
 from src.common.logger import get_logger
 from src.common.server import get_global_server, Server
 from src.mood.mood_manager import mood_manager
-from src.chat.knowledge import lpmm_start_up
+from src.chat.knowledge import start_lpmm_in_background
 from rich.traceback import install
 # from src.api.main import start_api_server
 
@@ -92,6 +92,8 @@ class MainSystem:
     async def _init_components(self):
         """初始化其他组件"""
         init_start_time = time.time()
+        phase_times = {}  # 各阶段耗时
+        phase_start = time.perf_counter()
 
         # 添加在线时间统计任务
         await async_task_manager.add_task(OnlineTimeRecordTask())
@@ -114,26 +116,36 @@ class MainSystem:
         # start_api_server()
         # logger.info("API服务器启动成功")
 
-        # 启动LPMM
-        lpmm_start_up()
+        phase_times["定时任务"] = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
+
+        # 启动LPMM（后台加载，不阻塞后续初始化；加载完成前知识查询会等待或提示正在加载）
+        start_lpmm_in_background()
 
         # 加载所有actions，包括默认的和插件的
         plugin_manager.load_all_plugins()
+        phase_times["插件"] = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
 
         # 初始化表情管理器
         get_emoji_manager().initialize()
         logger.info("表情包管理器初始化成功")
+        phase_times["表情包"] = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
 
         # 启动情绪管理器
         if global_config.mood.enable_mood:
             await mood_manager.start()
             logger.info("情绪管理器初始化成功")
+            phase_times["情绪"] = time.perf_counter() - phase_start
+            phase_start = time.perf_counter()
 
         # 初始化聊天管理器
         await get_chat_manager()._initialize()
         asyncio.create_task(get_chat_manager()._auto_save_task())
 
         logger.info("聊天管理器初始化成功")
+        phase_times["聊天管理器"] = time.perf_counter() - phase_start
 
         # await asyncio.sleep(0.5) #防止logger输出飞了
 
@@ -150,6 +162,7 @@ class MainSystem:
         try:
             init_time = int(1000 * (time.time() - init_start_time))
             logger.info(f"初始化完成，神经元放电{init_time}次")
+            logger.info("各阶段耗时：" + "，".join(f"{phase} {seconds:.2f}s" for phase, seconds in phase_times.items()))
         except Exception as e:
             logger.error(f"启动大脑和外部世界失败: {e}")
             raise
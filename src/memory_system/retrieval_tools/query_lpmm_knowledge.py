@@ -4,7 +4,7 @@
 
 from src.common.logger import get_logger
 from src.config.config import global_config
-from src.chat.knowledge import get_qa_manager
+from src.chat.knowledge import is_lpmm_warming_up, wait_for_qa_manager
 from .tool_registry import register_memory_retrieval_tool
 
 logger = get_logger("memory_retrieval_tools")
@@ -34,8 +34,12 @@ async def query_lpmm_knowledge(query: str, limit: int = 5) -> str:
             logger.debug("LPMM知识库未启用")
             return "LPMM知识库未启用"
 
-        qa_manager = get_qa_manager()
+        # 知识库在后台加载，未完成时等待一段时间
+        qa_manager = await wait_for_qa_manager()
         if qa_manager is None:
+            if is_lpmm_warming_up():
+                logger.debug("LPMM知识库仍在加载，跳过查询")
+                return "LPMM知识库正在加载中，暂时无法查询"
             logger.debug("LPMM知识库未初始化，跳过查询")
             return "LPMM知识库未初始化"
 
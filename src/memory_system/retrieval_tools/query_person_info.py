@@ -7,30 +7,12 @@ import json
 from datetime import datetime
 from src.common.logger import get_logger
 from src.common.database.database_model import PersonInfo
+from src.common.similarity import length_ratio
 from .tool_registry import register_memory_retrieval_tool
 
 logger = get_logger("memory_retrieval_tools")
 
 
-def _calculate_similarity(query: str, target: str) -> float:
-    """计算查询词在目标字符串中的相似度比例
-
-    Args:
-        query: 查询词
-        target: 目标字符串
-
-    Returns:
-        float: 相似度比例（0.0-1.0），查询词长度 / 目标字符串长度
-    """
-    if not query or not target:
-        return 0.0
-    query_len = len(query)
-    target_len = len(target)
-    if target_len == 0:
-        return 0.0
-    return query_len / target_len
-
-
 def _format_group_nick_names(group_nick_name_field) -> str:
     """格式化群昵称信息
 
@@ -111,7 +93,7 @@ async def query_person_info(person_name: str) -> str:
                 filtered_records.append(record)
             else:
                 # 模糊匹配需要检查相似度
-                similarity = _calculate_similarity(person_name, record.person_name.strip())
+                similarity = length_ratio(person_name, record.person_name.strip())
                 if similarity >= SIMILARITY_THRESHOLD:
                     filtered_records.append(record)
 
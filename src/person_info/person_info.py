@@ -4,13 +4,17 @@ import json
 import time
 import random
 import math
+import threading
+import atexit
+from collections import OrderedDict
 
 from json_repair import repair_json
-from typing import Union, Optional
+from typing import Any, Dict, Iterable, Union, Optional, Tuple
 
 from src.common.logger import get_logger
 from src.common.database.database import db
 from src.common.database.database_model import PersonInfo
+from src.common.similarity import string_similarities
 from src.llm_models.utils_model import LLMRequest
 from src.config.config import global_config, model_config
 from src.chat.message_receive.chat_stream import get_chat_manager
@@ -22,6 +26,278 @@ relation_selection_model = LLMRequest(
     model_set=model_config.model_task_config.utils_small, request_type="relation_selection"
 )
 
+PERSON_CACHE_SIZE = 2048  # 进程内缓存的用户数上限（LRU淘汰）
+PERSON_PREFETCH_BATCH_SIZE = 500  # 批量查询时每条IN语句包含的person_id数量上限（避免超出SQLite变量数限制）
+PERSON_WRITE_BACK_DELAY = 30.0  # 延迟写回的合并窗口（秒），窗口内对同一用户的多次写入只落库最后一次
+
+_PERSON_FIELDS = (
+    "person_id",
+    "is_known",
+    "platform",
+    "user_id",
+    "nickname",
+    "person_name",
+    "name_reason",
+    "know_times",
+    "know_since",
+    "last_know",
+    "memory_points",
+    "group_nick_name",
+)
+
+
+def _parse_json_list(raw: Optional[str], person_id: str, field: str) -> list:
+    """解析JSON格式的列表字段，解析失败或不是列表时返回空列表"""
+    if not raw:
+        return []
+    try:
+        loaded = json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        logger.warning(f"解析用户 {person_id} 的{field}字段失败，使用默认值")
+        return []
+    return loaded if isinstance(loaded, list) else []
+
+
+class _PersonState:
+    """一个用户在数据库中的当前状态（与PersonInfo一行对应）
+
+    memory_points与group_nick_name保存原始JSON，首次访问时才解析。
+    """
+
+    __slots__ = ("fields", "_memory_points", "_group_nick_name")
+
+    def __init__(self, fields: Dict[str, Any]):
+        self.fields = fields
+        self._memory_points: Optional[list] = None
+        self._group_nick_name: Optional[list] = None
+
+    @classmethod
+    def from_record(cls, record: PersonInfo) -> "_PersonState":
+        return cls({field: getattr(record, field) for field in _PERSON_FIELDS})
+
+    def memory_points(self) -> list:
+        if self._memory_points is None:
+            points = _parse_json_list(self.fields["memory_points"], self.fields["person_id"], "points")
+            # 过滤掉None值，确保数据质量
+            self._memory_points = [point for point in points if point is not None]
+        return self._memory_points
+
+    def group_nick_name(self) -> list:
+        if self._group_nick_name is None:
+            self._group_nick_name = _parse_json_list(
+                self.fields["group_nick_name"], self.fields["person_id"], "group_nick_name"
+            )
+        return self._group_nick_name
+
+
+class _PersonCache:
+    """用户状态的进程内缓存（person_id -> 状态，None表示数据库中不存在）
+
+    - 容量有限，按LRU淘汰
+    - Person.sync_to_database写穿：写入数据库的同时以写入的数据更新缓存，无需重新查询
+    - 延迟写回：只更新缓存并登记待写数据，PERSON_WRITE_BACK_DELAY秒后合并落库；
+      待写数据独立于LRU保存，被淘汰的用户再次读取时仍以待写数据为准
+    """
+
+    def __init__(self, max_size: int, write_back_delay: float):
+        self.max_size = max_size
+        self.write_back_delay = write_back_delay
+        self._states: OrderedDict[str, Optional[_PersonState]] = OrderedDict()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._flush_timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writes = 0
+        self.deferred_writes = 0
+        self.names_version = 0
+        """用户名称版本号：任一用户的person_name或nickname可能发生变化时递增"""
+
+    def get(self, person_id: str) -> Tuple[bool, Optional[_PersonState]]:
+        """返回(是否命中, 状态)"""
+        with self._lock:
+            if person_id in self._states:
+                self.hits += 1
+                self._states.move_to_end(person_id)
+                return True, self._states[person_id]
+            if person_id in self._pending:
+                self.hits += 1
+                state = _PersonState(dict(self._pending[person_id]))
+                self._put_locked(person_id, state)
+                return True, state
+            self.misses += 1
+            return False, None
+
+    def contains(self, person_id: str) -> bool:
+        """是否已缓存（不计入命中统计）"""
+        with self._lock:
+            return person_id in self._states or person_id in self._pending
+
+    def put(self, person_id: str, state: Optional[_PersonState]) -> None:
+        with self._lock:
+            self._put_locked(person_id, state)
+
+    def _put_locked(self, person_id: str, state: Optional[_PersonState]) -> None:
+        self._states[person_id] = state
+        self._states.move_to_end(person_id)
+        while len(self._states) > self.max_size:
+            self._states.popitem(last=False)
+            self.evictions += 1
+
+    def _track_name_change_locked(self, person_id: str, data: Dict[str, Any]) -> None:
+        # person_name为空时显示名称回退到nickname，因此二者任一变化都视为名称变化
+        previous = self._states.get(person_id)
+        if previous is None or (previous.fields["person_name"], previous.fields["nickname"]) != (
+            data["person_name"],
+            data["nickname"],
+        ):
+            self.names_version += 1
+
+    def invalidate(self, person_id: Optional[str] = None) -> None:
+        """丢弃缓存与尚未落库的延迟写入（数据库被外部修改时，以外部修改为准）"""
+        with self._lock:
+            self.names_version += 1
+            if person_id is None:
+                self._states.clear()
+                self._pending.clear()
+            else:
+                self._states.pop(person_id, None)
+                self._pending.pop(person_id, None)
+
+    def write(self, data: Dict[str, Any]) -> None:
+        """立即写入数据库并更新缓存（写穿），同时取消该用户尚未落库的延迟写入
+
+        与flush互斥：否则flush已取出的旧快照可能在本次写入之后落库，覆盖较新的数据
+        """
+        person_id = data["person_id"]
+        with self._flush_lock:
+            with self._lock:
+                self._pending.pop(person_id, None)
+            try:
+                _write_person_data(data)
+            except Exception:
+                # 写入失败时数据库状态未知，丢弃缓存
+                self.invalidate(person_id)
+                raise
+            with self._lock:
+                self.writes += 1
+                self._track_name_change_locked(person_id, data)
+                self._put_locked(person_id, _PersonState(data))
+
+    def write_deferred(self, data: Dict[str, Any]) -> None:
+        """更新缓存并登记延迟写入，窗口结束后合并落库"""
+        person_id = data["person_id"]
+        with self._lock:
+            self.deferred_writes += 1
+            self._pending[person_id] = data
+            self._track_name_change_locked(person_id, data)
+            self._put_locked(person_id, _PersonState(data))
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.write_back_delay, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self) -> None:
+        """将所有延迟写入落库"""
+        with self._flush_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                pending, self._pending = self._pending, {}
+            written = 0
+            for person_id, data in pending.items():
+                try:
+                    _write_person_data(data)
+                    written += 1
+                except Exception as e:
+                    logger.error(f"延迟写回用户 {person_id} 信息到数据库时出错: {e}")
+                    self.invalidate(person_id)
+            with self._lock:
+                self.writes += written
+            if pending:
+                logger.debug(f"已延迟写回 {len(pending)} 个用户的信息到数据库")
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._states),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "writes": self.writes,
+                "deferred_writes": self.deferred_writes,
+                "pending_writes": len(self._pending),
+            }
+
+
+def _write_person_data(data: Dict[str, Any]) -> None:
+    """写入一行用户数据：先按person_id更新，不存在时再创建"""
+    person_id = data["person_id"]
+    if PersonInfo.update(**data).where(PersonInfo.person_id == person_id).execute() == 0:
+        PersonInfo.create(**data)
+        logger.debug(f"已创建用户 {person_id} 的信息到数据库")
+    else:
+        logger.debug(f"已同步用户 {person_id} 的信息到数据库")
+
+
+_person_cache = _PersonCache(PERSON_CACHE_SIZE, PERSON_WRITE_BACK_DELAY)
+# 退出时写回尚未落库的延迟写入
+atexit.register(_person_cache.flush)
+
+
+def invalidate_person_cache(person_id: Optional[str] = None) -> None:
+    """使用户缓存失效（在Person.sync_to_database之外直接修改PersonInfo表后调用，不传person_id则清空全部）"""
+    _person_cache.invalidate(person_id)
+
+
+def flush_person_writes() -> None:
+    """立即写回所有尚未落库的延迟写入"""
+    _person_cache.flush()
+
+
+def get_person_names_version() -> int:
+    """获取用户名称版本号：任一用户的person_name或nickname可能发生变化时递增，用于失效依赖用户名称的缓存"""
+    return _person_cache.names_version
+
+
+def get_person_cache_stats() -> Dict[str, Union[int, float]]:
+    """获取用户缓存的统计信息：容量、命中/未命中次数、命中率、淘汰次数、写入次数与待写回数量"""
+    return _person_cache.stats()
+
+
+def _get_person_state(person_id: str) -> Optional[_PersonState]:
+    """获取用户状态（优先读取缓存）"""
+    hit, state = _person_cache.get(person_id)
+    if hit:
+        return state
+    record = PersonInfo.get_or_none(PersonInfo.person_id == person_id)
+    state = _PersonState.from_record(record) if record else None
+    _person_cache.put(person_id, state)
+    return state
+
+
+def prefetch_person_records(person_ids: Iterable[str]) -> None:
+    """以IN查询批量加载尚未缓存的用户记录（不存在的用户同样缓存，避免重复查询）"""
+    missing = [person_id for person_id in dict.fromkeys(person_ids) if not _person_cache.contains(person_id)]
+    for start in range(0, len(missing), PERSON_PREFETCH_BATCH_SIZE):
+        batch = missing[start : start + PERSON_PREFETCH_BATCH_SIZE]
+        try:
+            records = {
+                record.person_id: record for record in PersonInfo.select().where(PersonInfo.person_id.in_(batch))
+            }
+        except Exception as e:
+            logger.error(f"批量查询用户信息时出错: {e}")
+            return
+        for person_id in batch:
+            record = records.get(person_id)
+            _person_cache.put(person_id, _PersonState.from_record(record) if record else None)
+
 
 def get_person_id(platform: str, user_id: Union[int, str]) -> str:
     """获取唯一id"""
@@ -44,16 +320,16 @@ def get_person_id_by_person_name(person_name: str) -> str:
 
 def is_person_known(person_id: str = None, user_id: str = None, platform: str = None, person_name: str = None) -> bool:  # type: ignore
     if person_id:
-        person = PersonInfo.get_or_none(PersonInfo.person_id == person_id)
-        return person.is_known if person else False
+        state = _get_person_state(person_id)
+        return bool(state.fields["is_known"]) if state else False
     elif user_id and platform:
         person_id = get_person_id(platform, user_id)
-        person = PersonInfo.get_or_none(PersonInfo.person_id == person_id)
-        return person.is_known if person else False
+        state = _get_person_state(person_id)
+        return bool(state.fields["is_known"]) if state else False
     elif person_name:
         person_id = get_person_id_by_person_name(person_name)
-        person = PersonInfo.get_or_none(PersonInfo.person_id == person_id)
-        return person.is_known if person else False
+        state = _get_person_state(person_id)
+        return bool(state.fields["is_known"]) if state else False
     else:
         return False
 
@@ -102,64 +378,12 @@ def extract_categories_from_response(response: str) -> list[str]:
     return matches
 
 
-def calculate_string_similarity(s1: str, s2: str) -> float:
-    """
-    计算两个字符串的相似度
-
-    Args:
-        s1: 第一个字符串
-        s2: 第二个字符串
-
-    Returns:
-        float: 相似度，范围0-1，1表示完全相同
-    """
-    if s1 == s2:
-        return 1.0
-
-    if not s1 or not s2:
-        return 0.0
-
-    # 计算Levenshtein距离
-
-    distance = levenshtein_distance(s1, s2)
-    max_len = max(len(s1), len(s2))
-
-    # 计算相似度：1 - (编辑距离 / 最大长度)
-    similarity = 1 - (distance / max_len if max_len > 0 else 0)
-    return similarity
-
-
-def levenshtein_distance(s1: str, s2: str) -> int:
-    """
-    计算两个字符串的编辑距离
-
-    Args:
-        s1: 第一个字符串
-        s2: 第二个字符串
-
-    Returns:
-        int: 编辑距离
-    """
-    if len(s1) < len(s2):
-        return levenshtein_distance(s2, s1)
-
-    if len(s2) == 0:
-        return len(s1)
-
-    previous_row = range(len(s2) + 1)
-    for i, c1 in enumerate(s1):
-        current_row = [i + 1]
-        for j, c2 in enumerate(s2):
-            insertions = previous_row[j + 1] + 1
-            deletions = current_row[j] + 1
-            substitutions = previous_row[j] + (c1 != c2)
-            current_row.append(min(insertions, deletions, substitutions))
-        previous_row = current_row
-
-    return previous_row[-1]
-
-
 class Person:
+    _state: Optional[_PersonState] = None
+    """加载时的数据库状态（与缓存共享，只读），memory_points与group_nick_name首次访问时从中解析并复制"""
+    _memory_points: Optional[list] = None
+    _group_nick_name: Optional[list[dict[str, str]]] = None
+
     @classmethod
     def register_person(
         cls,
@@ -236,7 +460,7 @@ class Person:
             self.platform = platform
             self.nickname = global_config.bot.nickname
             self.person_name = global_config.bot.nickname
-            self.group_nick_name: list[dict[str, str]] = []
+            self.group_nick_name = []
             return
 
         self.user_id = ""
@@ -275,11 +499,36 @@ class Person:
         self.know_since = None
         self.last_know: Optional[float] = None
         self.memory_points = []
-        self.group_nick_name: list[dict[str, str]] = []  # 群昵称列表，存储 {"group_id": str, "group_nick_name": str}
+        self.group_nick_name = []
 
         # 从数据库加载数据
         self.load_from_database()
 
+    @property
+    def memory_points(self) -> list:
+        if self._memory_points is None:
+            self._memory_points = list(self._state.memory_points()) if self._state else []
+        return self._memory_points
+
+    @memory_points.setter
+    def memory_points(self, value: list):
+        self._memory_points = value
+
+    @property
+    def group_nick_name(self) -> list[dict[str, str]]:
+        """群昵称列表，存储 {"group_id": str, "group_nick_name": str}"""
+        if self._group_nick_name is None:
+            self._group_nick_name = (
+                [dict(item) if isinstance(item, dict) else item for item in self._state.group_nick_name()]
+                if self._state
+                else []
+            )
+        return self._group_nick_name
+
+    @group_nick_name.setter
+    def group_nick_name(self, value: list[dict[str, str]]):
+        self._group_nick_name = value
+
     def del_memory(self, category: str, memory_content: str, similarity_threshold: float = 0.95):
         """
         删除指定分类和记忆内容的记忆点
@@ -295,10 +544,10 @@ class Person:
         if not self.memory_points:
             return 0
 
-        deleted_count = 0
-        memory_points_to_keep = []
+        # 同分类的记忆点：(下标, 记忆内容)，稍后与要删除的内容批量比对
+        candidates: list[tuple[int, str]] = []
 
-        for memory_point in self.memory_points:
+        for idx, memory_point in enumerate(self.memory_points):
             # 跳过None值
             if memory_point is None:
                 continue
@@ -306,7 +555,6 @@ class Person:
             parts = memory_point.split(":", 2)  # 最多分割2次，保留记忆内容中的冒号
             if len(parts) < 3:
                 # 格式不正确，保留原样
-                memory_points_to_keep.append(memory_point)
                 continue
 
             memory_category = parts[0].strip()
@@ -315,18 +563,23 @@ class Person:
 
             # 检查分类是否匹配
             if memory_category != category:
-                memory_points_to_keep.append(memory_point)
                 continue
 
-            # 计算记忆内容的相似度
-            similarity = calculate_string_similarity(memory_content, memory_text)
+            candidates.append((idx, memory_text))
 
-            # 如果相似度达到阈值，则删除（不添加到保留列表）
+        # 计算记忆内容的相似度，达到阈值的记忆点将被删除
+        similarities = string_similarities(memory_content, [memory_text for _, memory_text in candidates])
+        deleted_idxs = set()
+        for (idx, _), similarity in zip(candidates, similarities, strict=True):
             if similarity >= similarity_threshold:
-                deleted_count += 1
-                logger.debug(f"删除记忆点: {memory_point} (相似度: {similarity:.4f})")
-            else:
-                memory_points_to_keep.append(memory_point)
+                deleted_idxs.add(idx)
+                logger.debug(f"删除记忆点: {self.memory_points[idx]} (相似度: {similarity:.4f})")
+        deleted_count = len(deleted_idxs)
+        memory_points_to_keep = [
+            memory_point
+            for idx, memory_point in enumerate(self.memory_points)
+            if memory_point is not None and idx not in deleted_idxs
+        ]
 
         # 更新memory_points
         self.memory_points = memory_points_to_keep
@@ -377,61 +630,40 @@ class Person:
         # 检查是否已存在该群号的记录
         for item in self.group_nick_name:
             if item.get("group_id") == group_id:
-                # 更新现有记录
+                if item.get("group_nick_name") == group_nick_name:
+                    return
+                # 更新现有记录（随消息频繁触发，延迟写回）
                 item["group_nick_name"] = group_nick_name
-                self.sync_to_database()
+                self.sync_to_database(debounce=True)
                 logger.debug(f"更新用户 {self.person_id} 在群 {group_id} 的群昵称为 {group_nick_name}")
                 return
 
         # 添加新记录
         self.group_nick_name.append({"group_id": group_id, "group_nick_name": group_nick_name})
-        self.sync_to_database()
+        self.sync_to_database(debounce=True)
         logger.debug(f"添加用户 {self.person_id} 在群 {group_id} 的群昵称 {group_nick_name}")
 
     def load_from_database(self):
-        """从数据库加载个人信息数据"""
+        """从数据库加载个人信息数据（memory_points与group_nick_name在首次访问时解析）"""
         try:
             # 查询数据库中的记录
-            record = PersonInfo.get_or_none(PersonInfo.person_id == self.person_id)
-
-            if record:
-                self.user_id = record.user_id or ""
-                self.platform = record.platform or ""
-                self.is_known = record.is_known or False
-                self.nickname = record.nickname or ""
-                self.person_name = record.person_name or self.nickname
-                self.name_reason = record.name_reason or None
-                self.know_times = record.know_times or 0
-
-                # 处理points字段（JSON格式的列表）
-                if record.memory_points:
-                    try:
-                        loaded_points = json.loads(record.memory_points)
-                        # 过滤掉None值，确保数据质量
-                        if isinstance(loaded_points, list):
-                            self.memory_points = [point for point in loaded_points if point is not None]
-                        else:
-                            self.memory_points = []
-                    except (json.JSONDecodeError, TypeError):
-                        logger.warning(f"解析用户 {self.person_id} 的points字段失败，使用默认值")
-                        self.memory_points = []
-                else:
-                    self.memory_points = []
-
-                # 处理group_nick_name字段（JSON格式的列表）
-                if record.group_nick_name:
-                    try:
-                        loaded_group_nick_names = json.loads(record.group_nick_name)
-                        # 确保是列表格式
-                        if isinstance(loaded_group_nick_names, list):
-                            self.group_nick_name = loaded_group_nick_names
-                        else:
-                            self.group_nick_name = []
-                    except (json.JSONDecodeError, TypeError):
-                        logger.warning(f"解析用户 {self.person_id} 的group_nick_name字段失败，使用默认值")
-                        self.group_nick_name = []
-                else:
-                    self.group_nick_name = []
+            state = _get_person_state(self.person_id)
+
+            if state:
+                fields = state.fields
+                self.user_id = fields["user_id"] or ""
+                self.platform = fields["platform"] or ""
+                self.is_known = fields["is_known"] or False
+                self.nickname = fields["nickname"] or ""
+                self.person_name = fields["person_name"] or self.nickname
+                self.name_reason = fields["name_reason"] or None
+                self.know_times = fields["know_times"] or 0
+                # 旧版加载时不读取这两个字段，之后的同步会把数据库中的值覆盖为NULL
+                self.know_since = fields["know_since"]
+                self.last_know = fields["last_know"]
+                self._state = state
+                self._memory_points = None
+                self._group_nick_name = None
 
                 logger.debug(f"已从数据库加载用户 {self.person_id} 的信息")
             else:
@@ -442,8 +674,14 @@ class Person:
             logger.error(f"从数据库加载用户 {self.person_id} 信息时出错: {e}")
             # 出错时保持默认值
 
-    def sync_to_database(self):
-        """将所有属性同步回数据库"""
+    def sync_to_database(self, debounce: bool = False):
+        """
+        将所有属性同步回数据库，并以写入的数据更新用户缓存
+
+        Args:
+            debounce: 是否延迟写回。为True时立即更新缓存，数据库写入合并到PERSON_WRITE_BACK_DELAY秒后进行，
+                适用于随消息频繁发生的更新
+        """
         if not self.is_known:
             return
         try:
@@ -469,20 +707,10 @@ class Person:
                 else json.dumps([], ensure_ascii=False),
             }
 
-            # 检查记录是否存在
-            record = PersonInfo.get_or_none(PersonInfo.person_id == self.person_id)
-
-            if record:
-                # 更新现有记录
-                for field, value in data.items():
-                    if hasattr(record, field):
-                        setattr(record, field, value)
-                record.save()
-                logger.debug(f"已同步用户 {self.person_id} 的信息到数据库")
+            if debounce:
+                _person_cache.write_deferred(data)
             else:
-                # 创建新记录
-                PersonInfo.create(**data)
-                logger.debug(f"已创建用户 {self.person_id} 的信息到数据库")
+                _person_cache.write(data)
 
         except Exception as e:
             logger.error(f"同步用户 {self.person_id} 信息到数据库时出错: {e}")
@@ -565,6 +793,21 @@ class Person:
         return relation_info
 
 
+def resolve_persons(platform_user_pairs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Person]:
+    """
+    批量获取多个用户的Person对象：先以一次IN查询加载所有未缓存的用户记录，再逐个构造
+
+    Args:
+        platform_user_pairs: (platform, user_id)列表，可包含重复项
+
+    Returns:
+        (platform, user_id) -> Person
+    """
+    pairs = list(dict.fromkeys(platform_user_pairs))
+    prefetch_person_records(get_person_id(platform, user_id) for platform, user_id in pairs)
+    return {(platform, user_id): Person(platform=platform, user_id=user_id) for platform, user_id in pairs}
+
+
 class PersonInfoManager:
     def __init__(self):
         self.person_name_list = {}
@@ -8,15 +8,16 @@
     success, reply_set, _ = await generator_api.generate_reply(chat_stream, action_data, reasoning)
 """
 
+import asyncio
 import traceback
-from typing import Tuple, Any, Dict, List, Optional, TYPE_CHECKING
+from typing import Tuple, Any, Dict, List, Optional, Callable, Awaitable, TYPE_CHECKING
 from rich.traceback import install
 from src.common.logger import get_logger
 from src.common.data_models.message_data_model import ReplySetModel
 from src.chat.replyer.group_generator import DefaultReplyer
 from src.chat.replyer.private_generator import PrivateReplyer
 from src.chat.message_receive.chat_stream import ChatStream
-from src.chat.utils.utils import process_llm_response
+from src.chat.utils.utils import process_llm_response, StreamingResponseSplitter
 from src.chat.replyer.replyer_manager import replyer_manager
 from src.plugin_system.base.component_types import ActionInfo
 
@@ -91,6 +92,7 @@ async def generate_reply(
     request_type: str = "generator_api",
     from_plugin: bool = True,
     reply_time_point: Optional[float] = None,
+    reply_sentence_callback: Optional[Callable[[str, Optional[List[int]]], Awaitable[None]]] = None,
 ) -> Tuple[bool, Optional["LLMGenerationDataModel"]]:
     """生成回复
 
@@ -111,9 +113,13 @@ async def generate_reply(
         request_type: 请求类型（可选，记录LLM使用）
         from_plugin: 是否来自插件
         reply_time_point: 回复时间点
+        reply_sentence_callback: 流式发送回调，提供时边生成边分句，并按顺序以每个句子及所用表达方式调用该回调；
+            此时返回的 reply_set 为已交给回调的句子。生成中途失败时返回失败，但 llm_response 的 reply_set
+            仍为已发出的句子；AFTER_LLM 事件在生成结束后才触发，插件对回复内容的修改不会影响已发出的句子
     Returns:
         Tuple[bool, List[Tuple[str, Any]], Optional[str]]: (是否成功, 回复集合, 提示词)
     """
+    stream_dispatcher: Optional[_StreamingReplyDispatcher] = None
     try:
         # 获取回复器
         logger.debug("[GeneratorAPI] 开始生成回复")
@@ -128,6 +134,12 @@ async def generate_reply(
         if not reply_reason and action_data:
             reply_reason = action_data.get("reason", "")
 
+        if reply_sentence_callback:
+            stream_dispatcher = _StreamingReplyDispatcher(reply_sentence_callback, enable_splitter, enable_chinese_typo)
+            selected_expressions_callback = stream_dispatcher.set_selected_expressions
+        else:
+            selected_expressions_callback = None
+
         # 调用回复器生成回复
         success, llm_response = await replyer.generate_reply_with_context(
             extra_info=extra_info,
@@ -139,7 +151,26 @@ async def generate_reply(
             from_plugin=from_plugin,
             stream_id=chat_stream.stream_id if chat_stream else chat_id,
             reply_time_point=reply_time_point,
+            content_delta_callback=stream_dispatcher.feed if stream_dispatcher else None,
+            selected_expressions_callback=selected_expressions_callback,
         )
+        if stream_dispatcher:
+            sent_sentences = await stream_dispatcher.finish(flush=success)
+            if not sent_sentences:
+                logger.warning("[GeneratorAPI] 流式回复生成失败")
+                return False, None
+            reply_set = ReplySetModel()
+            for text in sent_sentences:
+                reply_set.add_text_content(text)
+            llm_response.reply_set = reply_set
+            if not success:
+                # 已发出的句子无法撤回，仍通过 reply_set 告知调用方，但本次生成按失败处理
+                logger.warning(f"[GeneratorAPI] 流式回复生成中断，已发送 {len(sent_sentences)} 个回复项")
+                llm_response.content = stream_dispatcher.raw_text
+                return False, llm_response
+            logger.debug(f"[GeneratorAPI] 流式回复生成完成，发送了 {len(reply_set)} 个回复项")
+            return True, llm_response
+
         if not success:
             logger.warning("[GeneratorAPI] 回复生成失败")
             return False, None
@@ -163,6 +194,10 @@ async def generate_reply(
         logger.error(traceback.format_exc())
         return False, None
 
+    finally:
+        if stream_dispatcher:
+            await stream_dispatcher.finish(flush=False)
+
 
 async def rewrite_reply(
     chat_stream: Optional[ChatStream] = None,
@@ -232,6 +267,62 @@ async def rewrite_reply(
         return False, None
 
 
+class _StreamingReplyDispatcher:
+    """流式回复分发器：将LLM增量输出分句后，按顺序交给发送回调，发送与生成并行进行"""
+
+    def __init__(
+        self,
+        sentence_callback: Callable[[str, Optional[List[int]]], Awaitable[None]],
+        enable_splitter: bool,
+        enable_chinese_typo: bool,
+    ):
+        self._splitter = StreamingResponseSplitter(enable_splitter, enable_chinese_typo)
+        self._sentence_callback = sentence_callback
+        self._queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        self._sender_task = asyncio.create_task(self._send_loop())
+        self.sent_sentences: List[str] = []
+        """已交给发送回调的句子"""
+        self.selected_expressions: Optional[List[int]] = None
+        """回复器选中的表达方式，随每个句子交给发送回调"""
+
+    @property
+    def raw_text(self) -> str:
+        return self._splitter.raw_text
+
+    def set_selected_expressions(self, selected_expressions: Optional[List[int]]) -> None:
+        self.selected_expressions = selected_expressions
+
+    async def feed(self, delta: str) -> None:
+        """接收LLM增量输出，切出的句子进入发送队列（不等待发送完成，避免阻塞流式读取）"""
+        for sentence in self._splitter.feed(delta):
+            self._queue.put_nowait(sentence)
+
+    async def finish(self, flush: bool = True) -> List[str]:
+        """
+        结束分发并等待队列中的句子发送完毕
+        Args:
+            flush: 是否发送分句器中剩余的内容（生成失败时不发送不完整的尾部）
+        Returns:
+            List[str]: 已交给发送回调的句子
+        """
+        if self._sender_task.done():
+            return self.sent_sentences
+        if flush:
+            for sentence in self._splitter.finish():
+                self._queue.put_nowait(sentence)
+        self._queue.put_nowait(None)
+        await self._sender_task
+        return self.sent_sentences
+
+    async def _send_loop(self) -> None:
+        while (sentence := await self._queue.get()) is not None:
+            try:
+                await self._sentence_callback(sentence, self.selected_expressions)
+                self.sent_sentences.append(sentence)
+            except Exception as e:
+                logger.error(f"[GeneratorAPI] 流式发送回复时出错: {e}")
+
+
 def process_human_text(content: str, enable_splitter: bool, enable_chinese_typo: bool) -> Optional[ReplySetModel]:
     """将文本处理为更拟人化的文本
 
@@ -11,7 +11,7 @@
 import time
 from typing import List, Dict, Any, Tuple, Optional
 from src.common.data_models.database_data_model import DatabaseMessages
-from src.common.database.database_model import Images
+from src.chat.utils.utils_image import get_image_manager
 from src.config.config import global_config
 from src.chat.utils.chat_message_builder import (
     get_raw_msg_by_timestamp,
@@ -515,10 +515,9 @@ def filter_mai_messages(messages: List[DatabaseMessages]) -> List[DatabaseMessag
 
 
 def translate_pid_to_description(pid: str) -> str:
-    image = Images.get_or_none(Images.image_id == pid)
-    description = ""
-    if image and image.description and image.description.strip():
-        description = image.description.strip()
+    description = get_image_manager().get_image_description_by_id(pid)
+    if description and description.strip():
+        description = description.strip()
     else:
         description = "[图片]"
     return description
@@ -2,7 +2,7 @@ from typing import Dict, Any
 
 from src.common.logger import get_logger
 from src.config.config import global_config
-from src.chat.knowledge import qa_manager
+from src.chat.knowledge import is_lpmm_warming_up, wait_for_qa_manager
 from src.plugin_system import BaseTool, ToolParamType
 
 logger = get_logger("lpmm_get_knowledge_tool")
@@ -39,10 +39,19 @@ class SearchKnowledgeFromLPMMTool(BaseTool):
             # threshold = function_args.get("threshold", 0.4)
 
             # 检查LPMM知识库是否启用
-            if qa_manager is None:
+            if not global_config.lpmm_knowledge.enable:
                 logger.debug("LPMM知识库已禁用，跳过知识获取")
                 return {"type": "info", "id": query, "content": "LPMM知识库已禁用"}
 
+            # 知识库在后台加载，未完成时等待一段时间
+            qa_manager = await wait_for_qa_manager()
+            if qa_manager is None:
+                if is_lpmm_warming_up():
+                    logger.debug("LPMM知识库仍在加载，跳过知识获取")
+                    return {"type": "info", "id": query, "content": "LPMM知识库正在加载中，请稍后再试"}
+                logger.debug("LPMM知识库未初始化，跳过知识获取")
+                return {"type": "info", "id": query, "content": "LPMM知识库未初始化"}
+
             # 调用知识库搜索
 
             knowledge_info = await qa_manager.get_knowledge(query, limit=limit_value)
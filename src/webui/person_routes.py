@@ -5,6 +5,7 @@ from pydantic import BaseModel
 from typing import Optional, List, Dict
 from src.common.logger import get_logger
 from src.common.database.database_model import PersonInfo
+from src.person_info.person_info import invalidate_person_cache
 from .auth import verify_auth_token_from_cookie_or_header
 import json
 import time
@@ -263,6 +264,7 @@ async def update_person(person_id: str, request: PersonUpdateRequest, maibot_ses
             setattr(person, field, value)
 
         person.save()
+        invalidate_person_cache(person_id)
 
         logger.info(f"人物信息已更新: {person_id}, 字段: {list(update_data.keys())}")
 
@@ -302,6 +304,7 @@ async def delete_person(person_id: str, maibot_session: Optional[str] = Cookie(N
 
         # 执行删除
         person.delete_instance()
+        invalidate_person_cache(person_id)
 
         logger.info(f"人物信息已删除: {person_id} ({person_name})")
 
@@ -374,6 +377,7 @@ async def batch_delete_persons(request: BatchDeleteRequest, maibot_session: Opti
                 person = PersonInfo.get_or_none(PersonInfo.person_id == person_id)
                 if person:
                     person.delete_instance()
+                    invalidate_person_cache(person_id)
                     deleted_count += 1
                     logger.info(f"批量删除: {person_id}")
                 else:
@@ -8,6 +8,7 @@ from peewee import fn
 
 from src.common.logger import get_logger
 from src.common.database.database_model import LLMUsage, OnlineTime, Messages
+from src.llm_models.utils import llm_usage_recorder
 
 logger = get_logger("webui.statistics")
 
@@ -69,6 +70,8 @@ async def get_dashboard_data(hours: int = 24):
         仪表盘数据
     """
     try:
+        # 先写入后台队列中尚未落库的使用记录，避免统计遗漏最近的请求
+        llm_usage_recorder.flush()
         now = datetime.now()
         start_time = now - timedelta(hours=hours)
 
@@ -283,6 +286,8 @@ async def get_summary(hours: int = 24):
         hours: 统计时间范围（小时）
     """
     try:
+        # 先写入后台队列中尚未落库的使用记录，避免统计遗漏最近的请求
+        llm_usage_recorder.flush()
         now = datetime.now()
         start_time = now - timedelta(hours=hours)
         summary = await _get_summary_statistics(start_time, now)
@@ -301,6 +306,8 @@ async def get_model_stats(hours: int = 24):
         hours: 统计时间范围（小时）
     """
     try:
+        # 先写入后台队列中尚未落库的使用记录，避免统计遗漏最近的请求
+        llm_usage_recorder.flush()
         now = datetime.now()
         start_time = now - timedelta(hours=hours)
         stats = await _get_model_statistics(start_time)